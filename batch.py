@@ -0,0 +1,224 @@
+"""Headless find/replace and line-ending conversion over files (kept free of Qt imports).
+
+Run as `main.py --batch ...`; see `main.py --batch --help`. Patterns mean what
+they mean in the Replace dialog (textsearch.compile_pattern / replacement_for).
+Literal searches are streamed line by line; regex searches read each file whole,
+as the editor would, so ^, $, \\s and multi-line patterns behave the same.
+"""
+import os
+import re
+import sys
+import glob
+import argparse
+from bisect import bisect_left
+from fnmatch import fnmatch
+import textsearch
+
+EOLS = {"lf": "\n", "crlf": "\r\n"}
+POOL_CHUNK = 8  # files per worker round trip
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(prog="main.py --batch",
+                                description="Find, replace or convert line endings in files without the GUI.")
+    p.add_argument("files", nargs="+", metavar="GLOB", help="files or globs (** recurses)")
+    p.add_argument("--find", help="text (or regex with --regex) to look for; alone, only counts matches")
+    p.add_argument("--replace", metavar="TEXT", help="replacement; \\1 and \\g<name> expand with --regex")
+    p.add_argument("--regex", action="store_true")
+    p.add_argument("--ignore-case", action="store_true")
+    p.add_argument("--word", action="store_true", help="whole words only")
+    p.add_argument("--eol", choices=sorted(EOLS), help="also convert line endings")
+    p.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="skip matching files")
+    p.add_argument("--dry-run", action="store_true", help="report what would change; write nothing")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = p.parse_args(argv)
+    if args.find is None and args.eol is None:
+        p.error("nothing to do: give --find and/or --eol")
+    if args.replace is not None and not args.find:
+        p.error("--replace needs --find")
+    return args
+
+
+def expand(patterns, exclude=()):
+    """Yield the regular files named by `patterns`, each once, in order."""
+    seen = set()
+    for pattern in patterns:
+        names = glob.iglob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for path in names:
+            if path in seen or not os.path.isfile(path):
+                continue
+            if any(fnmatch(path, g) or fnmatch(os.path.basename(path), g) for g in exclude):
+                continue
+            seen.add(path)
+            yield path
+
+
+class Output:
+    """A temp file next to `path` that replaces it on commit (keeping its mode)."""
+
+    def __init__(self, path, newline):
+        import tempfile  # only needed once something is written; keeps startup short
+        self.path = path = os.path.realpath(path)  # replace a symlink's target, not the link
+        fd, self.tmp = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+        self.fh = open(fd, "w", encoding="utf-8", newline=newline)
+
+    def commit(self):
+        self.fh.close()
+        os.chmod(self.tmp, os.stat(self.path).st_mode & 0o7777)
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        self.fh.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
+
+
+def _stream(path, pattern, repl, eol, dry_run):
+    """Literal search / conversion, one line at a time; each line keeps its own ending
+    unless `eol` is given. Returns (matches, changed)."""
+    count = 0
+    changed = False
+    out = None if dry_run or (repl is None and eol is None) else Output(path, "")
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            for line in fh:
+                body = line.rstrip("\r\n")
+                ending = line[len(body):]
+                if pattern is not None:
+                    n = 0
+                    if repl is None:
+                        n = sum(1 for _ in pattern.finditer(body))
+                    elif pattern.search(body):
+                        body, n = pattern.subn(lambda m: textsearch.replacement_for(m, repl, False), body)
+                    count += n
+                    changed = changed or (n > 0 and repl is not None)
+                if eol is not None and ending and ending != eol:
+                    ending = eol
+                    changed = True
+                if out is not None:
+                    out.fh.write(body + ending)
+        if out is not None:
+            if changed:
+                out.commit()
+            else:
+                out.discard()
+    except BaseException:
+        if out is not None:
+            out.discard()
+        raise
+    return count, changed
+
+
+def _whole(path, pattern, repl, regex, eol, dry_run):
+    """Regex (or multi-line) search on the file's text with its newlines read as \\n,
+    like the editor. Text outside the matches keeps its own line endings, so a mixed
+    file stays mixed unless `eol` is given. Returns (matches, changed)."""
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        raw = fh.read()
+    # index in `text` of the \n each \r\n became; a lone \r reads as \n in place
+    crlf = [m.start() - k for k, m in enumerate(re.finditer("\r\n", raw))]
+    text = raw.replace("\r\n", "\n").replace("\r", "\n") if "\r" in raw else raw
+    rest = raw.replace("\r\n", "") if crlf else raw
+    endings = {e for e, present in (("\r\n", crlf), ("\n", "\n" in rest), ("\r", "\r" in rest)) if present}
+    edits = textsearch.find_replacements(text, pattern, repl if repl is not None else "", regex)
+    converted = eol is not None and bool(endings - {eol})
+    changed = (bool(edits) and repl is not None) or converted
+    if changed and not dry_run:
+        if eol is not None:
+            source, newline = text, eol  # everything is rewritten with `eol`
+        else:
+            # unchanged stretches are copied from the raw text; line breaks in the
+            # replacements follow the file's style when it has just one
+            source, newline = raw, ""
+            style = next(iter(endings)) if len(endings) == 1 else "\n" if endings else os.linesep
+        parts = []
+        pos = 0
+        for start, end, replacement in edits if repl is not None else ():
+            if eol is None:
+                start += bisect_left(crlf, start)
+                end += bisect_left(crlf, end)
+                replacement = replacement.replace("\n", style)
+            parts.append(source[pos:start])
+            parts.append(replacement)
+            pos = end
+        parts.append(source[pos:])
+        out = Output(path, newline)
+        try:
+            out.fh.write("".join(parts))
+            out.commit()
+        except BaseException:
+            out.discard()
+            raise
+    return len(edits), changed
+
+
+def process_file(path, pattern, repl, regex, eol, dry_run):
+    """Pool task: (path, matches, changed, error or None)."""
+    try:
+        if textsearch.is_binary(path):
+            return path, 0, False, "binary, skipped"
+        if pattern is not None and (regex or "\n" in pattern.pattern):
+            count, changed = _whole(path, pattern, repl, regex, eol, dry_run)
+        else:
+            count, changed = _stream(path, pattern, repl, eol, dry_run)
+        return path, count, changed, None
+    except UnicodeDecodeError:
+        return path, 0, False, "not UTF-8, skipped"
+    except OSError as e:
+        return path, 0, False, e.strerror or str(e)
+
+
+def results(paths, task_args, jobs):
+    """process_file over `paths`, in order; a process pool only when there is work for one."""
+    if jobs <= 1 or len(paths) < 2:
+        for path in paths:
+            yield process_file(path, *task_args)
+        return
+    from itertools import repeat
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        yield from pool.map(process_file, paths, *[repeat(a) for a in task_args], chunksize=POOL_CHUNK)
+
+
+def main(argv):
+    args = parse_args(argv)
+    pattern = None
+    if args.find:
+        try:
+            pattern = textsearch.compile_pattern(args.find, regex=args.regex, case=not args.ignore_case,
+                                                 whole_word=args.word)
+        except re.error as e:
+            print(f"invalid pattern: {e}", file=sys.stderr)
+            return 2
+    eol = EOLS[args.eol] if args.eol else None
+    paths = list(expand(args.files, args.exclude))
+    task_args = (pattern, args.replace, args.regex, eol, args.dry_run)
+    noun = "matches" if args.replace is None else "replacements"
+    total = matched = changed = errors = 0
+    for path, count, was_changed, error in results(paths, task_args, args.jobs):
+        if error:
+            errors += 1
+            print(f"{path}: {error}", file=sys.stderr)
+            continue
+        total += count
+        matched += count > 0
+        changed += was_changed
+        if count or was_changed:
+            what = [f"{count} {noun}"] if pattern is not None else []
+            if was_changed and (pattern is None or args.replace is None):
+                what.append("line endings converted")
+            print(f"{path}: {', '.join(what)}")
+    summary = f"{len(paths)} files"
+    if pattern is not None:
+        summary += f", {total} {noun} in {matched}"
+    if args.replace is not None or eol:
+        summary += f", {changed} {'would change' if args.dry_run else 'changed'}"
+    if errors:
+        summary += f", {errors} skipped"
+    print(summary)
+    if errors and not (matched or changed):
+        return 2
+    return 0 if matched or changed else 1
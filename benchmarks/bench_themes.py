@@ -0,0 +1,72 @@
+"""Theme switching benchmark: switch themes N times with many tabs open.
+
+    python benchmarks/bench_themes.py --tabs 200 --switches 100 [--legacy]
+
+--legacy replays the old apply_theme (clear the stylesheet, re-read the .qss)
+for comparison. Runs on Qt's offscreen platform unless QT_QPA_PLATFORM is set.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def legacy_apply(app, name):
+    app.setStyleSheet("")
+    qss = os.path.join(ROOT, "themes", name)
+    if os.path.isfile(qss):
+        with open(qss, "r", encoding="utf-8") as fh:
+            app.setStyleSheet(fh.read())
+        return
+    try:
+        import qt_themes
+        qt_themes.set_theme(name)
+    except Exception:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tabs", type=int, default=200)
+    parser.add_argument("--switches", type=int, default=100)
+    parser.add_argument("--legacy", action="store_true", help="use the pre-registry apply_theme")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # .ui and themes/ are looked up relative to the working directory
+    import main as notepad
+    tmp = tempfile.mkdtemp(prefix="notepad-bench-")
+    notepad.SETTINGS_FILE = os.path.join(tmp, "settings.json")
+    notepad.SESSION_FOLDER = os.path.join(tmp, "session")
+    app = notepad.NotepadApp([sys.argv[0]])
+    for i in range(args.tabs):
+        app.tab_widget.insert_new_tab(f"tab {i}\n" * 50, f"tab{i}")
+    app.processEvents()
+
+    qss = app.themes.qss_files()
+    themes = (qss + ["atom_one", "nord"])[:4] if qss else ["atom_one", "nord"]
+    apply = (lambda name: legacy_apply(app, name)) if args.legacy else app.apply_theme
+    start = time.perf_counter()
+    for i in range(args.switches):
+        apply(themes[i % len(themes)])
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "benchmark": "theme_switch",
+        "mode": "legacy" if args.legacy else "registry",
+        "tabs": args.tabs,
+        "switches": args.switches,
+        "themes": themes,
+        "total_s": round(elapsed, 4),
+        "per_switch_ms": round(elapsed * 1000 / args.switches, 3),
+    }))
+
+
+if __name__ == "__main__":
+    main()
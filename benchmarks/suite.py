@@ -0,0 +1,373 @@
+"""Benchmark suite for the editor's hot paths, driven headless on Qt's offscreen platform.
+
+    python benchmarks/suite.py [--only open,save,find,replace,keys,tabs,themes,startup]
+                               [--sizes 1,10,100,1024] [--tabs 10,100,1000] [--out run.json]
+                               [--compare baseline.json]
+
+Every case prints one JSON line as it finishes; --out writes the whole run as
+{"meta": {...}, "results": [...]} and --compare prints the ratio of each *_ms
+metric against such a file from another version. Synthetic files go to a temp
+folder; settings and session files are redirected there too.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+CASES = ["open", "save", "find", "replace", "keys", "tabs", "themes", "startup"]
+LINE = "the quick brown fox jumps over the lazy dog {:>9} needle lorem ipsum dolor sit\n"
+TIMEOUT_S = 600
+
+STARTUP_SNIPPET = """
+import sys
+sys.argv = ["main.py", "--profile-startup"]
+sys.path.insert(0, {root!r})
+import notepad
+notepad.SETTINGS_FILE = {settings!r}
+notepad.SESSION_FOLDER = {session!r}
+from PySide6.QtCore import QTimer
+app = notepad.NotepadApp(sys.argv)
+QTimer.singleShot(0, app.quit)
+app.exec()
+"""
+
+
+def summary(samples):
+    """min/median/p95/max of a list of seconds, in ms."""
+    s = sorted(samples)
+    return {
+        "n": len(s),
+        "min_ms": round(s[0] * 1000, 3),
+        "median_ms": round(median(s) * 1000, 3),
+        "p95_ms": round(s[min(len(s) - 1, int(len(s) * 0.95))] * 1000, 3),
+        "max_ms": round(s[-1] * 1000, 3),
+    }
+
+
+def make_file(folder, mb):
+    """A synthetic text file of `mb` MiB with one "needle" per line (reused across runs)."""
+    path = os.path.join(folder, f"synthetic_{mb}mb.txt")
+    if os.path.exists(path):
+        return path
+    block = "".join(LINE.format(i) for i in range(12000)).encode("utf-8")
+    target = mb * 1024 * 1024
+    with open(path, "wb") as fh:
+        written = 0
+        while written < target:
+            chunk = block[:target - written]
+            fh.write(chunk)
+            written += len(chunk)
+    return path
+
+
+class Bench:
+    def __init__(self, args, tmp):
+        import notepad
+        self.notepad = notepad
+        self.args = args
+        self.tmp = tmp
+        notepad.SETTINGS_FILE = os.path.join(tmp, "settings.json")
+        notepad.SESSION_FOLDER = os.path.join(tmp, "session")
+        self.app = notepad.NotepadApp([sys.argv[0]])
+        self.results = []
+
+    # --- helpers ---
+    def wait(self, done, timeout=TIMEOUT_S):
+        deadline = time.perf_counter() + timeout
+        while not done():
+            self.app.processEvents()
+            if time.perf_counter() > deadline:
+                raise TimeoutError("benchmark step timed out")
+            time.sleep(0.0005)
+
+    def reset(self):
+        """Close every tab without prompts."""
+        tw = self.app.tab_widget
+        for i in reversed(range(tw.count() - 1)):
+            ed = tw.get_editor(i)
+            if ed:
+                ed.document().setModified(False)
+            tw.close_tab(i)
+        self.app.processEvents()
+
+    def record(self, case, params, **metrics):
+        result = {"case": case, "params": params, **metrics}
+        self.results.append(result)
+        print(json.dumps(result))
+        sys.stdout.flush()
+
+    def open_path(self, path):
+        tw = self.app.tab_widget
+        start = time.perf_counter()
+        self.app.open_file(path)
+        ed = tw.get_editor()
+        first = None
+        if ed is not None:
+            self.wait(lambda: not ed.document().isEmpty() or tw.get_loader() is None)
+            first = time.perf_counter() - start
+            self.wait(lambda: tw.get_loader() is None)
+        else:
+            view = tw.get_large_view()
+            self.wait(lambda: view.indexed)
+        return ed, first, time.perf_counter() - start
+
+    # --- cases ---
+    def bench_open(self, mb):
+        path = make_file(self.tmp, mb)
+        self.reset()
+        ed, first, total = self.open_path(path)
+        self.record("open_file", {"mb": mb}, mode="editor" if ed else "large_view",
+                    first_text_ms=round(first * 1000, 3) if first is not None else None,
+                    total_ms=round(total * 1000, 3))
+
+    def bench_save(self, mb):
+        # a copy, so the shared synthetic file stays as generated
+        path = os.path.join(self.tmp, f"save_{mb}mb.txt")
+        shutil.copyfile(make_file(self.tmp, mb), path)
+        self.reset()
+        ed, _, _ = self.open_path(path)
+        if ed is None:
+            self.record("save_file", {"mb": mb}, skipped="large file tabs are read-only")
+            return
+        ed.textCursor().insertText("x")
+        start = time.perf_counter()
+        future = self.app.save_file()
+        snapshot = time.perf_counter() - start
+        future.result()
+        self.wait(lambda: not ed.document().isModified())
+        self.record("save_file", {"mb": mb}, snapshot_ms=round(snapshot * 1000, 3),
+                    total_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    def bench_find(self, mb):
+        path = make_file(self.tmp, mb)
+        self.reset()
+        ed, _, _ = self.open_path(path)
+        if ed is None:
+            self.record("find_text", {"mb": mb}, skipped="large file tabs search on demand")
+            return
+        bar = self.app.find_bar
+        self.app.find_text()
+        bar.edit.setText("needle")
+        start = time.perf_counter()
+        bar.search()
+        scanner = bar.scanner()
+        self.wait(lambda: not scanner.scanning)
+        total = time.perf_counter() - start
+        start = time.perf_counter()
+        bar.next()
+        step = time.perf_counter() - start
+        matches = scanner.count()  # close_bar() detaches the scanner, which empties it
+        bar.close_bar()
+        assert matches, "find scan found nothing; the synthetic file always holds 'needle'"
+        self.record("find_text", {"mb": mb}, matches=matches,
+                    scan_ms=round(total * 1000, 3), next_ms=round(step * 1000, 3))
+
+    def bench_replace(self, mb):
+        path = make_file(self.tmp, mb)
+        self.reset()
+        ed, _, _ = self.open_path(path)
+        if ed is None:
+            self.record("replace_text", {"mb": mb}, skipped="large file tabs are read-only")
+            return
+        pattern = self.notepad.textsearch.compile_pattern("needle")
+        run = {"pending": 1, "count": 0, "tabs": 0, "label": "needle"}
+        start = time.perf_counter()
+        self.app.start_replace(ed, pattern, "NEEDLE", False, False, run)
+        self.wait(lambda: run["pending"] == 0)
+        self.record("replace_text", {"mb": mb}, replaced=run["count"],
+                    total_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    def bench_keys(self, lines, keys):
+        from PySide6.QtCore import QEvent, Qt
+        from PySide6.QtGui import QKeyEvent, QTextCursor
+        from PySide6.QtWidgets import QApplication
+        self.reset()
+        text = "".join(f"def f{i}(x):  # line {i}\n    return x * {i}\n" for i in range(lines // 2))
+        self.app.tab_widget.insert_new_tab(text, "keys.py")
+        ed = self.app.tab_widget.get_editor()
+        highlighter = ed.document().findChild(self.notepad.SyntaxHighlighter)
+        if highlighter:
+            highlighter.set_language(self.notepad.syntax.language_for("keys.py"))
+        ed.moveCursor(QTextCursor.Start)
+        ed.setFocus()
+        self.wait(lambda: highlighter is None or highlighter.dirty_from is None)
+        key, status, paint, total = [], [], [], []
+        for i in range(keys):
+            t0 = time.perf_counter()
+            QApplication.sendEvent(ed, QKeyEvent(QEvent.KeyPress, Qt.Key_A, Qt.NoModifier, "a"))
+            t1 = time.perf_counter()
+            self.app.update_status(ed)
+            t2 = time.perf_counter()
+            ed.viewport().repaint()
+            t3 = time.perf_counter()
+            key.append(t1 - t0)
+            status.append(t2 - t1)
+            paint.append(t3 - t2)
+            total.append(t3 - t0)
+            self.app.processEvents()  # idle work (highlighting, timers) between keystrokes
+        ed.document().setModified(False)
+        self.record("keystroke", {"lines": lines, "keys": keys}, key=summary(key), update_status=summary(status),
+                    paint=summary(paint), total=summary(total))
+
+    def bench_tabs(self, n):
+        self.reset()
+        tw = self.app.tab_widget
+        start = time.perf_counter()
+        for i in range(n):
+            tw.insert_new_tab(f"tab {i}\n" * 50, f"tab{i}")
+        self.app.processEvents()
+        create = time.perf_counter() - start
+        switches = []
+        for i in range(min(n * 2, 2000)):
+            t0 = time.perf_counter()
+            tw.setCurrentIndex((i * 7) % n)
+            self.app.processEvents()
+            switches.append(time.perf_counter() - t0)
+        self.record("tabs", {"tabs": n}, create_ms=round(create * 1000, 3),
+                    create_per_tab_ms=round(create * 1000 / n, 3), switch=summary(switches))
+
+    def bench_themes(self, tabs, switches):
+        self.reset()
+        for i in range(tabs):
+            self.app.tab_widget.insert_new_tab(f"tab {i}\n" * 50, f"tab{i}")
+        self.app.processEvents()
+        qss = self.app.themes.qss_files()
+        themes = (qss + ["atom_one", "nord"])[:4] if qss else ["atom_one", "nord"]
+        samples = []
+        for i in range(switches):
+            t0 = time.perf_counter()
+            self.app.apply_theme(themes[i % len(themes)])
+            self.app.processEvents()
+            samples.append(time.perf_counter() - t0)
+        self.record("theme_switch", {"tabs": tabs, "switches": switches, "themes": themes}, switch=summary(samples))
+
+
+def bench_startup(tmp, runs):
+    """Cold start in a fresh interpreter: spawn to the end of the first event-loop turn."""
+    code = STARTUP_SNIPPET.format(root=ROOT, settings=os.path.join(tmp, "startup-settings.json"),
+                                  session=os.path.join(tmp, "startup-session"))
+    walls, totals = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                             timeout=TIMEOUT_S).stdout
+        walls.append(time.perf_counter() - start)
+        for line in out.splitlines():
+            if line.startswith("total"):
+                totals.append(float(line.split()[-2]) / 1000)
+    result = {"case": "startup", "params": {"runs": runs}, "process": summary(walls)}
+    if totals:
+        result["in_process"] = summary(totals)
+    print(json.dumps(result))
+    return result
+
+
+def metrics(result, prefix=""):
+    """Flatten a result's *_ms numbers into {"name": value}."""
+    out = {}
+    for key, value in result.items():
+        if isinstance(value, dict) and key != "params":
+            out.update(metrics(value, prefix + key + "."))
+        elif key.endswith("_ms") and isinstance(value, (int, float)):
+            out[prefix + key] = value
+    return out
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)["results"]
+    old = {(r["case"], json.dumps(r["params"], sort_keys=True)): metrics(r) for r in baseline}
+    print(f"\n{'case':<14} {'params':<36} {'metric':<26} {'old':>10} {'new':>10} {'ratio':>7}")
+    for r in results:
+        key = (r["case"], json.dumps(r["params"], sort_keys=True))
+        for name, value in metrics(r).items():
+            before = old.get(key, {}).get(name)
+            if before:
+                print(f"{r['case']:<14} {key[1][:36]:<36} {name:<26} {before:>10.2f} {value:>10.2f} "
+                      f"{value / before:>7.2f}")
+
+
+def int_list(text):
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(CASES), help="comma-separated cases: " + ",".join(CASES))
+    parser.add_argument("--sizes", type=int_list, default=[1, 10, 100], help="file sizes in MiB (1024 = 1 GiB)")
+    parser.add_argument("--tabs", type=int_list, default=[10, 100, 1000])
+    parser.add_argument("--lines", type=int, default=100000, help="document size for the keystroke case")
+    parser.add_argument("--keys", type=int, default=300)
+    parser.add_argument("--theme-tabs", type=int, default=200)
+    parser.add_argument("--theme-switches", type=int, default=50)
+    parser.add_argument("--startup-runs", type=int, default=5)
+    parser.add_argument("--data", help="folder for synthetic files (kept between runs)")
+    parser.add_argument("--out", help="write the run as JSON")
+    parser.add_argument("--compare", help="a previous --out file to compare against")
+    args = parser.parse_args()
+    cases = [c.strip() for c in args.only.split(",") if c.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error("unknown case(s): " + ", ".join(sorted(unknown)))
+
+    os.chdir(ROOT)  # .ui and themes/ are looked up relative to the working directory
+    tmp = tempfile.mkdtemp(prefix="notepad-bench-")
+    data = args.data or tmp
+    os.makedirs(data, exist_ok=True)
+
+    results = []
+    if "startup" in cases:
+        # first, before this process has warmed any caches for the child
+        results.append(bench_startup(tmp, args.startup_runs))
+    if set(cases) - {"startup"}:
+        bench = Bench(args, data)
+        for mb in args.sizes:
+            for case in ("open", "save", "find", "replace"):
+                if case in cases:
+                    getattr(bench, "bench_" + case)(mb)
+        if "keys" in cases:
+            bench.bench_keys(args.lines, args.keys)
+        if "tabs" in cases:
+            for n in args.tabs:
+                bench.bench_tabs(n)
+        if "themes" in cases:
+            bench.bench_themes(args.theme_tabs, args.theme_switches)
+        bench.reset()
+        results += bench.results
+
+    from PySide6 import __version__ as pyside_version
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True).stdout.strip() or None
+    except OSError:
+        rev = None
+    run = {
+        "meta": {
+            "git": rev,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside6": pyside_version,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(run, fh, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
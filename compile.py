@@ -1,13 +1,27 @@
 import sys
 import os
+import subprocess
 import PyInstaller.__main__
 
+# --onedir skips the per-launch unpacking a --onefile build does (faster cold start)
+onedir = "--onedir" in sys.argv
+
 # Determine the proper separator for add-data
 if sys.platform.startswith("win"):
     sep = ";"
 else:
     sep = ":"
 
+# Compile the .ui files to Python so the app doesn't parse XML at startup;
+# notepad.py falls back to loading the .ui files when these modules are missing.
+compiled_ui = []
+for name in ("main", "settings", "replace"):
+    try:
+        subprocess.run(["pyside6-uic", f"{name}.ui", "-o", f"ui_{name}.py"], check=True)
+        compiled_ui.append(f"ui_{name}")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"pyside6-uic failed for {name}.ui ({e}); using runtime .ui loading")
+
 # Paths to include manually
 datas = [
     f"main.py{sep}.",
@@ -24,12 +38,14 @@ hiddenimports = [
     "PySide6.QtCore",
     "PySide6.QtUiTools",
     "qt_themes",
-]
+    "notepad",  # main.py imports the app and batch modules lazily
+    "batch",
+] + compiled_ui
 
 opts = [
     "main.py",
     "--name=NotepadApp",
-    "--onefile",
+    "--onedir" if onedir else "--onefile",
     "--windowed",
     "--collect-data=qt_themes",
 ]
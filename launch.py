@@ -0,0 +1,140 @@
+"""Command-line handling for the editor (kept free of Qt imports)."""
+import os
+import re
+import sys
+import json
+import stat
+import struct
+import getpass
+import tempfile
+
+LINE_SUFFIX = re.compile(r"^(.*?):(\d+)$")
+# Qt's own command-line options that take a value (QGuiApplication / QApplication, X11)
+QT_VALUE_OPTIONS = {
+    "-platform", "-platformpluginpath", "-platformtheme", "-plugin", "-qwindowgeometry",
+    "-qwindowicon", "-qwindowtitle", "-style", "-stylesheet", "-session", "-display",
+    "-geometry", "-title", "-name", "-qmljsdebugger",
+}
+
+
+def parse_file_args(args):
+    """[(path, line or None), ...] from `file` and `file:line` arguments; options, including
+    Qt's (`-platform offscreen`, `-style=fusion`) and their values, are skipped.
+    A name that really ends in ":<digits>" is kept whole when such a file exists."""
+    files = []
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+            continue
+        if arg.startswith("-"):
+            skip_value = arg in QT_VALUE_OPTIONS
+            continue
+        m = LINE_SUFFIX.match(arg)
+        if m and not os.path.exists(arg):
+            files.append((os.path.abspath(m.group(1)), max(1, int(m.group(2)))))
+        else:
+            files.append((os.path.abspath(arg), None))
+    return files
+
+
+# ---------- Single instance ----------
+SERVER_NAME = "NotepadApp"
+FORWARD_TIMEOUT_S = 2.0  # how long a second launch waits for the running app to answer
+
+
+def single_instance_enabled(args, settings_file):
+    """--single-instance / --new-instance win; otherwise settings.json "single_instance"."""
+    if "--new-instance" in args:
+        return False
+    if "--single-instance" in args:
+        return True
+    try:
+        with open(settings_file, "r", encoding="utf-8") as fh:
+            return bool(json.load(fh).get("single_instance", False))
+    except (OSError, ValueError):
+        return False
+
+
+def server_address():
+    """Where the running instance listens: a named pipe on Windows, else a socket file.
+    QLocalServer.listen takes the same string (a bare name maps to the same pipe)."""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    name = f"{SERVER_NAME}-{re.sub(r'[^A-Za-z0-9_.-]', '_', user)}"
+    if sys.platform.startswith("win"):
+        return name, "\\\\.\\pipe\\" + name
+    path = os.path.join(runtime_dir(name), name)
+    return path, path
+
+
+def runtime_dir(name):
+    """A directory only this user can enter, so no one else can take or plant the socket:
+    $XDG_RUNTIME_DIR, else a 0700 folder `name` under the temp dir. OSError when that
+    folder exists but is not ours and private."""
+    folder = os.environ.get("XDG_RUNTIME_DIR")
+    if folder and os.path.isdir(folder):
+        return folder
+    folder = os.path.join(tempfile.gettempdir(), name)
+    try:
+        os.mkdir(folder, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(folder)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(f"{folder} is not a private directory")
+    return folder
+
+
+def encode_request(files):
+    return json.dumps({"files": [[path, line] for path, line in files]}).encode("utf-8")
+
+
+def decode_request(data):
+    return [(path, line) for path, line in json.loads(data.decode("utf-8"))["files"]]
+
+
+def frame(payload):
+    """Messages on the instance socket are a 4-byte big-endian length plus payload."""
+    return struct.pack("!I", len(payload)) + payload
+
+
+def forward(args, settings_file):
+    """Hand the files in `args` to a running instance; True when it took them."""
+    if not single_instance_enabled(args, settings_file):
+        return False
+    request = frame(encode_request(parse_file_args(args)))
+    try:
+        _, address = server_address()
+        if sys.platform.startswith("win"):
+            return _forward_pipe(address, request)
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(FORWARD_TIMEOUT_S)
+            sock.connect(address)
+            sock.sendall(request)
+            return sock.recv(2) == b"ok"
+    except OSError:
+        return False  # nobody listening (or a stale socket file, or no private folder): start normally
+
+
+def _forward_pipe(address, request):
+    """Named-pipe I/O can't time out by itself, so it runs in a daemon thread and a
+    running instance that doesn't answer within FORWARD_TIMEOUT_S counts as absent."""
+    import threading
+    answer = []
+
+    def talk():
+        try:
+            with open(address, "r+b", buffering=0) as pipe:
+                pipe.write(request)
+                answer.append(pipe.read(2))
+        except OSError:
+            pass
+
+    worker = threading.Thread(target=talk, daemon=True)
+    worker.start()
+    worker.join(FORWARD_TIMEOUT_S)
+    return answer == [b"ok"]
@@ -0,0 +1,171 @@
+"""Whole-buffer line operations: sort, dedupe, keep/drop matching (kept free of Qt imports).
+
+run() works file to file so it can live in a worker process. The input is
+streamed; a sort that outgrows its memory budget spills sorted runs to temp
+files and merges them, so memory stays bounded whatever the buffer size.
+"""
+import os
+import heapq
+import hashlib
+import tempfile
+import time
+
+SORT_BUDGET = 256 * 1024 * 1024  # bytes of lines sorted in memory before spilling a run
+PROGRESS_SECONDS = 0.1
+LINE_OVERHEAD = 64  # rough bytes a list entry costs beyond its characters
+
+
+class Progress:
+    """Posts ("progress", percent) at most every PROGRESS_SECONDS."""
+
+    def __init__(self, out, total, start=0, span=100):
+        self.out = out
+        self.total = max(1, total)
+        self.start = start
+        self.span = span
+        self.sent = 0.0
+
+    def update(self, done):
+        now = time.monotonic()
+        if now - self.sent >= PROGRESS_SECONDS:
+            self.sent = now
+            self.out.put(("progress", min(99, self.start + done * self.span // self.total)))
+
+
+def ends_with_newline(path):
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        if fh.tell() == 0:
+            return False
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) == b"\n"
+
+
+def read_lines(path, progress=None):
+    """Yield the lines of `path` without their "\\n"; a final newline ends the last
+    line rather than starting an empty one."""
+    done = 0
+    with open(path, "r", encoding="utf-8", errors="surrogatepass", newline="\n") as fh:
+        for line in fh:
+            done += len(line)
+            if progress:
+                progress.update(done)
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def write_lines(path, lines, ended):
+    """Write `lines` joined by "\\n" (plus a final one when `ended`); returns the count."""
+    count = 0
+    with open(path, "w", encoding="utf-8", errors="surrogatepass", newline="\n") as fh:
+        for line in lines:
+            fh.write("\n" + line if count else line)
+            count += 1
+        if ended and count:
+            fh.write("\n")
+    return count
+
+
+def _spill(lines):
+    fd, path = tempfile.mkstemp(prefix="sort-run-", suffix=".txt")
+    with open(fd, "w", encoding="utf-8", errors="surrogatepass", newline="\n") as fh:
+        for line in lines:
+            fh.write(line)
+            fh.write("\n")
+    return path
+
+
+def _read_run(fh):
+    for line in fh:
+        yield line[:-1]
+
+
+def sorted_lines(lines, key=None, reverse=False, budget=SORT_BUDGET):
+    """Yield `lines` sorted (stable); runs beyond `budget` bytes go through temp files."""
+    runs = []
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line) + LINE_OVERHEAD
+        if size >= budget:
+            chunk.sort(key=key, reverse=reverse)
+            runs.append(_spill(chunk))
+            chunk = []
+            size = 0
+    chunk.sort(key=key, reverse=reverse)
+    if not runs:
+        yield from chunk
+        return
+    runs.append(_spill(chunk))
+    del chunk
+    files = []
+    try:
+        for path in runs:
+            files.append(open(path, "r", encoding="utf-8", errors="surrogatepass", newline="\n"))
+        # ties keep run order, and runs are in input order, so the merge stays stable
+        yield from heapq.merge(*[_read_run(fh) for fh in files], key=key, reverse=reverse)
+    finally:
+        for fh in files:
+            fh.close()
+        for path in runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def unique_lines(lines):
+    """Drop repeated lines, keeping the first; only a 16-byte digest per distinct line is held."""
+    seen = set()
+    for line in lines:
+        digest = hashlib.blake2b(line.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        if digest not in seen:
+            seen.add(digest)
+            yield line
+
+
+def _drop_adjacent(lines):
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+        previous = line
+
+
+def run(op, src, dst, options, out):
+    """Process entry point: apply `op` to the lines of `src`, writing `dst`.
+
+    options: sort -> reverse, ignore_case, unique, budget (bytes);
+    keep/drop -> pattern (a compiled textsearch pattern).
+    `out` gets ("progress", percent), then ("done", lines in, lines out) or ("error", message).
+    """
+    try:
+        total = os.path.getsize(src)
+        counted = [0]
+
+        def counting(lines):
+            for line in lines:
+                counted[0] += 1
+                yield line
+
+        if op == "sort":
+            # reading and run sorting is most of the work; the merge/write gets the rest
+            lines = counting(read_lines(src, Progress(out, total, 0, 80)))
+            key = str.casefold if options.get("ignore_case") else None
+            result = sorted_lines(lines, key, options.get("reverse", False),
+                                  options.get("budget", SORT_BUDGET))
+            if options.get("unique"):
+                result = _drop_adjacent(result)
+        elif op == "dedupe":
+            result = unique_lines(counting(read_lines(src, Progress(out, total))))
+        elif op in ("keep", "drop"):
+            pattern = options["pattern"]
+            keep = op == "keep"
+            result = (line for line in counting(read_lines(src, Progress(out, total)))
+                      if (pattern.search(line) is not None) == keep)
+        else:
+            raise ValueError(f"unknown line operation: {op}")
+        written = write_lines(dst, result, ends_with_newline(src))
+        out.put(("done", counted[0], written))
+    except Exception as e:
+        out.put(("error", str(e)))
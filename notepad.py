@@ -0,0 +1,4557 @@
+"""The editor application; started through main.py."""
+import time
+STARTED_AT = time.perf_counter()  # origin of the --profile-startup timings (run() passes main.py's)
+import sys
+import os
+import io
+import re
+import json
+import uuid
+import codecs
+import hashlib
+import importlib
+import queue
+import mmap
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import tempfile
+import threading
+import traceback
+from collections import deque
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+import launch
+from PySide6.QtWidgets import (
+    QApplication, QFileDialog, QMessageBox, QPlainTextEdit, QWidget,
+    QVBoxLayout, QTabWidget, QTabBar, QInputDialog, QDialog, QComboBox,
+    QDialogButtonBox, QMenu, QLabel, QLineEdit, QHBoxLayout, QPushButton, QStatusBar,
+    QProgressBar, QAbstractScrollArea, QCheckBox, QTextEdit, QDockWidget, QListWidget,
+    QListWidgetItem, QMainWindow, QMenuBar, QSplitter, QPlainTextDocumentLayout
+)
+from PySide6.QtCore import QFile, Qt, QSize, QEvent, QObject, QTimer, Signal, QPoint, QFileSystemWatcher
+from PySide6.QtGui import (
+    QMouseEvent, QTextCursor, QIcon, QFont, QAction, QPainter, QColor, QTextCharFormat, QShortcut,
+    QKeySequence, QTextLayout, QTextBlockFormat, QTextFormat, QTextDocument
+)
+import textsearch
+import syntax
+import textdiff
+import lineops
+
+SETTINGS_FILE = "settings.json"
+SESSION_FOLDER = "session"  # open tabs (session.json) and the unsaved-edit journal
+THEMES_FOLDER = "themes"  # folder containing extra .qss files
+
+# background loading: the first read is small so the first screenful shows up at once
+LOAD_FIRST_CHUNK = 64 * 1024
+LOAD_CHUNK_SIZE = 1024 * 1024
+LOAD_QUEUE_CHUNKS = 8       # decoded chunks buffered between worker and GUI
+LOAD_SLICE_MS = 15          # GUI time spent appending per event-loop turn
+
+# long-line mode: longer lines are shown as segments joined by soft breaks that
+# are not part of the file (minified JS/JSON would otherwise be laid out as one block)
+LONG_LINE_CHARS = 10000
+SEGMENT_CHARS = 4096
+SEGMENT_CUT_AFTER = ",;{}[]()<> \t"  # preferred cut points near a segment's end
+SOFT_BREAK = QTextFormat.UserProperty + 1  # block property: the break before this block is soft
+
+SAVE_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+FIND_DELAY_MS = 120         # find bar waits for a typing pause before rescanning
+STATUS_REFRESH_MS = 16     # status bar repaints at most once per frame
+
+FIND_FILES_BATCH = 32       # files per process-pool task
+FIND_FILES_MAX_HITS = 20000 # results shown before the panel stops listing
+
+JOURNAL_FLUSH_MS = 500
+JOURNAL_COMPACT_BYTES = 16 * 1024 * 1024
+SESSION_SAVE_MS = 5000
+
+# follow mode (tail -f): the buffer keeps only the last lines (settings.json: follow_max_lines)
+FOLLOW_MAX_LINES = 100000
+FOLLOW_POLL_MS = 1000       # fallback stat poll, for filesystems without change notifications
+FOLLOW_READ_MAX = 1024 * 1024  # bytes appended per event-loop turn
+FOLLOW_TAIL_BYTES = 32 * 1024 * 1024  # how far back from the end the initial view may start
+
+HIGHLIGHT_SLICE_MS = 4      # idle-time highlighting per event-loop turn
+HIGHLIGHT_EDIT_MS = 2       # highlighting done synchronously inside an edit
+HIGHLIGHT_STYLES = {
+    "keyword": ("#569cd6", True), "string": ("#ce9178", False), "comment": ("#6a9955", False),
+    "number": ("#b5cea8", False), "decorator": ("#c586c0", False), "preprocessor": ("#c586c0", False),
+    "key": ("#9cdcfe", False), "section": ("#dcdcaa", True), "error": ("#f44747", True),
+    "warning": ("#d7ba7d", True),
+}
+
+# opt-in profiling (--instrument or settings.json: instrument, stall_ms)
+STALL_MS = 250              # an event-loop turn longer than this counts as a stall
+HEARTBEAT_MS = 50
+TRACE_EVENTS = 200000       # spans kept for the Chrome trace export
+HIST_BUCKETS = 16           # duration histogram: < 0.25 ms, < 0.5 ms, ... doubling
+
+# files at least this big open in the read-only memory-mapped viewer (settings.json: large_file_mb)
+LARGE_FILE_MB = 1024
+INDEX_BLOCK = 64 * 1024     # the line index stores one newline count per block
+VIEW_MAX_LINE = 4096        # characters of a line the large viewer paints
+
+# line operations sort this much in memory before spilling runs to temp files
+# (settings.json: line_ops_memory_mb)
+LINE_OPS_MEMORY_MB = 256
+
+# inactive file tabs are unloaded (LRU first) while loaded buffers exceed the budget
+# (settings.json: tab_memory_mb, tab_idle_seconds)
+TAB_MEMORY_MB = 512
+TAB_IDLE_SECONDS = 600
+UNLOAD_CHECK_MS = 60 * 1000
+
+def resource_path(relative_path):
+    """Get absolute path for PyInstaller bundled files."""
+    if getattr(sys, "frozen", False):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.abspath(relative_path)
+
+# ---------- TabBar / TabWidget ----------
+class ModernTabBar(QTabBar):
+    def tabSizeHint(self, index):
+        s = super().tabSizeHint(index)
+        if self.tabData(index) == "plus":
+            return QSize(38, s.height())
+        return s
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        # For PySide6 QMouseEvent.position() is a QPointF; convert to QPoint
+        idx = self.tabAt(event.position().toPoint())
+        if idx == self.count() - 1:
+            # plus tab
+            if hasattr(self.parent_widget, "insert_new_tab"):
+                self.parent_widget.insert_new_tab()
+            return
+        if event.button() == Qt.MiddleButton:
+            if hasattr(self.parent_widget, "close_tab"):
+                self.parent_widget.close_tab(idx)
+            return
+        super().mouseReleaseEvent(event)
+
+class ModernTabWidget(QTabWidget):
+    _close_saved = Signal(object, bool)  # tab container, whether its save before closing succeeded
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.registry = {}  # normalized path -> the one tab container holding that file
+        self.setTabBar(ModernTabBar())
+        self.tabBar().parent_widget = self
+        self.setTabsClosable(True)
+        self.tabCloseRequested.connect(self.close_tab)
+        self.setCornerWidget(QWidget(), Qt.BottomRightCorner)
+        self.add_plus_tab()
+        self.currentChanged.connect(self.on_tab_changed)
+        self._close_saved.connect(self._on_close_saved)
+
+    def add_plus_tab(self):
+        plus = QWidget()
+        self.addTab(plus, "")
+        icon = QIcon.fromTheme("list-add")
+        self.setTabIcon(self.count() - 1, icon)
+        self.tabBar().setTabText(self.count() - 1, "")
+        self.tabBar().setTabData(self.count() - 1, "plus")
+        self.tabBar().setTabButton(self.count() - 1, QTabBar.RightSide, None)
+
+    def insert_new_tab(self, text="", title="Untitled"):
+        cont = QWidget()
+        layout = QVBoxLayout(cont)
+        layout.setContentsMargins(2, 2, 2, 2)
+        cont.setLayout(layout)
+        cont.setProperty("tab_id", uuid.uuid4().hex)
+        editor = self.create_editor(cont)
+        set_document_text(editor, str(text))
+        self.set_path(cont, None)
+        cont.setProperty("last_used", time.monotonic())
+        idx = self.count() - 1
+        self.insertTab(idx, cont, title)
+        self.setCurrentIndex(idx)
+        self.app.update_status(editor)
+        self.app.update_window_title(idx)
+
+    def insert_lazy_tab(self, path, title=None, tab_id=None):
+        """Add a placeholder for `path` that only builds its editor when first shown."""
+        cont = QWidget()
+        layout = QVBoxLayout(cont)
+        layout.setContentsMargins(2, 2, 2, 2)
+        cont.setLayout(layout)
+        cont.setProperty("tab_id", tab_id or uuid.uuid4().hex)
+        self.set_path(cont, path)
+        cont.setProperty("lazy", True)
+        cont.setProperty("last_used", 0.0)
+        idx = self.count() - 1
+        self.insertTab(idx, cont, title or os.path.basename(path))
+        if path:
+            self.setTabToolTip(idx, path)
+        return idx
+
+    def materialize(self, index):
+        """Turn a placeholder tab into a real editor and start loading its file."""
+        cont = self.widget(index)
+        if cont is None or not cont.property("lazy"):
+            return
+        cont.setProperty("lazy", False)
+        path = cont.property("filepath")
+        recovered = self.app.session.take_recovered(cont)
+        if recovered is not None and (recovered["text"] is not None or not path):
+            # the journal holds the whole buffer; no file read needed
+            editor = self.create_editor(cont)
+            self.app.session.replay(cont, editor, recovered)
+            self.app.update_status(editor)
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0  # start_load reports the missing file
+        if size >= self.app.large_file_mb * 1024 * 1024:
+            # too big for an editor: swap the placeholder for a viewer tab
+            self.removeTab(index)
+            self.app.open_file(path)
+            return
+        editor = self.create_editor(cont)
+        if cont.property("font_size"):
+            f = editor.font()
+            f.setPointSize(cont.property("font_size"))
+            editor.setFont(f)
+        self.app.start_load(cont, editor, path, recovered)
+        self.app.update_status(editor)
+
+    def unload_tab(self, index):
+        """Drop the editor of an unmodified file tab, keeping only path and view state."""
+        cont = self.widget(index)
+        ed = self.get_editor(index)
+        cont.setProperty("cursor_pos", ed.textCursor().position())
+        cont.setProperty("scroll_pos", ed.verticalScrollBar().value())
+        cont.setProperty("font_size", ed.font().pointSize())
+        cont.setProperty("lazy", True)
+        self.app.monitor.forget(cont)
+        self.unsplit(cont)
+        ed = cont.findChild(QPlainTextEdit)
+        ed.setParent(None)
+        ed.deleteLater()  # takes the document and its helpers with it
+
+    def create_editor(self, cont):
+        """A new document with its helpers, shown in the tab's first pane."""
+        editor = QPlainTextEdit()
+        doc = editor.document()
+        LongLines(doc)
+        DocumentStats(doc)
+        LineIndex(doc)
+        scanner = MatchScanner(doc)
+        scanner.changed.connect(self.app.find_bar.refresh)
+        self.app.session.watch(cont, editor)
+        highlighter = SyntaxHighlighter(editor)
+        highlighter.set_language(syntax.language_for(cont.property("filepath")))
+        self.setup_view(editor)
+        cont.layout().addWidget(editor)
+        return editor
+
+    def setup_view(self, editor):
+        editor.verticalScrollBar().valueChanged.connect(lambda: self.app.find_bar.highlight(editor))
+        editor.setFont(QFont("Consolas", 11))
+        editor.installEventFilter(self.app)
+        editor.cursorPositionChanged.connect(lambda: self.app.request_status(editor))
+        editor.selectionChanged.connect(lambda: self.app.request_status(editor))
+
+    # --- documents and panes ---
+    @staticmethod
+    def path_key(path):
+        return os.path.normcase(os.path.realpath(path))
+
+    def set_path(self, cont, path):
+        """Change the file a tab holds, keeping the path registry in step."""
+        old = cont.property("filepath")
+        if old and self.registry.get(self.path_key(old)) is cont:
+            del self.registry[self.path_key(old)]
+        cont.setProperty("filepath", path)
+        if path:
+            self.registry[self.path_key(path)] = cont
+
+    def split(self, cont, orientation):
+        """Show the tab's document in a second pane (or re-orient an existing split)."""
+        first = cont.findChild(QPlainTextEdit)
+        if first is None:
+            return None
+        splitter = cont.findChild(QSplitter)
+        if splitter is not None:
+            splitter.setOrientation(orientation)
+            return None
+        splitter = QSplitter(orientation)
+        cont.layout().replaceWidget(first, splitter)
+        splitter.addWidget(first)
+        view = QPlainTextEdit()
+        view.setDocument(first.document())  # a view, not a copy
+        self.setup_view(view)
+        view.setFont(first.font())
+        highlighter = first.document().findChild(SyntaxHighlighter)
+        if highlighter:
+            highlighter.add_view(view)
+        splitter.addWidget(view)
+        view.setTextCursor(first.textCursor())
+        view.centerCursor()
+        view.setFocus()
+        return view
+
+    def unsplit(self, cont):
+        """Back to one pane: the first one, which owns the document, keeps the active
+        pane's cursor."""
+        splitter = cont.findChild(QSplitter)
+        if splitter is None:
+            return
+        panes = self.panes(cont)
+        first, active = panes[0], self.active_pane(cont)
+        cursor = active.textCursor()
+        scroll = active.verticalScrollBar().value()
+        cont.layout().replaceWidget(splitter, first)
+        for pane in panes[1:]:
+            pane.setParent(None)
+            pane.deleteLater()
+        splitter.setParent(None)
+        splitter.deleteLater()
+        first.setTextCursor(cursor)
+        first.verticalScrollBar().setValue(scroll)
+        cont.setProperty("active_pane", 0)
+        first.setFocus()
+
+    def panes(self, cont):
+        return cont.findChildren(QPlainTextEdit)
+
+    def active_pane(self, cont):
+        panes = self.panes(cont)
+        if not panes:
+            return None
+        return panes[min(cont.property("active_pane") or 0, len(panes) - 1)]
+
+    def pane_focused(self, editor):
+        """Remember which pane of its tab `editor` is, for get_editor."""
+        for i in range(self.count() - 1):
+            cont = self.widget(i)
+            panes = self.panes(cont)
+            if editor in panes:
+                if (cont.property("active_pane") or 0) != panes.index(editor):
+                    cont.setProperty("active_pane", panes.index(editor))
+                    self.app.find_bar.tab_changed()
+                    self.app.update_status(editor)
+                return
+
+    def insert_large_file_tab(self, path):
+        cont = QWidget()
+        layout = QVBoxLayout(cont)
+        layout.setContentsMargins(2, 2, 2, 2)
+        view = LargeFileView(path)
+        view.setFont(QFont("Consolas", 11))
+        view.installEventFilter(self.app)
+        view.positionChanged.connect(lambda: self.app.update_status())
+        layout.addWidget(view)
+        cont.setLayout(layout)
+        cont.setProperty("tab_id", uuid.uuid4().hex)
+        self.set_path(cont, path)
+        idx = self.count() - 1
+        self.insertTab(idx, cont, os.path.basename(path))
+        self.setCurrentIndex(idx)
+        view.start_indexing()
+        self.app.update_status()
+        self.app.update_window_title(idx)
+        return view
+
+    def close_tab(self, index):
+        if index == self.count() - 1:
+            return
+        loader = self.get_loader(index)
+        view = self.get_large_view(index)
+        if view:
+            view.close_file()
+        follower = self.get_follower(index)
+        if follower:
+            follower.stop()
+        editor = self.get_editor(index)
+        if loader:
+            # a half-loaded buffer cannot be saved; just stop reading
+            loader.cancel()
+            self.app.skip_replaces(loader)
+        elif editor and editor.document().isModified():
+            choice = QMessageBox.question(
+                self.app.window, "Unsaved Changes",
+                "Save changes before closing?",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
+            )
+            if choice == QMessageBox.Yes:
+                future = self.app.save_file(index)
+                if future is not None:
+                    # close once the background write is done; a failed write keeps the tab
+                    cont = self.widget(index)
+                    future.add_done_callback(lambda f: self._close_saved.emit(cont, bool(f.result())))
+                return
+            elif choice == QMessageBox.Cancel:
+                return
+        elif self.app.session.has_recovered(self.widget(index)):
+            choice = QMessageBox.question(
+                self.app.window, "Recovered Changes",
+                "Discard the recovered unsaved changes of this tab?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if choice != QMessageBox.Yes:
+                return
+        self.remove_tab(index)
+
+    def _on_close_saved(self, cont, ok):
+        index = self.indexOf(cont)
+        if not ok or index < 0:
+            return
+        ed = self.get_editor(index)
+        if ed is not None and ed.document().isModified():
+            self.close_tab(index)  # edited again while saving: ask again
+        else:
+            self.remove_tab(index)
+
+    def remove_tab(self, index):
+        cont = self.widget(index)
+        self.app.session.tab_closed(cont)
+        self.app.monitor.forget(cont)
+        if self.app.compare:
+            self.app.compare.release(cont)
+        job = cont.findChild(LineJob)
+        if job:
+            job.cancel()
+        self.set_path(cont, None)
+        self.removeTab(index)
+        self.app.update_status()
+        self.app.update_window_title()
+
+    def get_editor(self, index=None):
+        """The active pane of the tab (all panes of a tab share one document)."""
+        if index is None:
+            index = self.currentIndex()
+        w = self.widget(index)
+        if w:
+            return self.active_pane(w)
+        return None
+
+    def find_tab(self, path):
+        """Index of the tab showing `path`, or -1."""
+        cont = self.registry.get(self.path_key(path))
+        return self.indexOf(cont) if cont is not None else -1
+
+    def get_large_view(self, index=None):
+        if index is None:
+            index = self.currentIndex()
+        w = self.widget(index)
+        if w:
+            return w.findChild(LargeFileView)
+        return None
+
+    def get_loader(self, index=None):
+        if index is None:
+            index = self.currentIndex()
+        w = self.widget(index)
+        if w:
+            return w.findChild(ChunkedFileLoader)
+        return None
+
+    def get_follower(self, index=None):
+        if index is None:
+            index = self.currentIndex()
+        w = self.widget(index)
+        if w:
+            return w.findChild(FileFollower)
+        return None
+
+    def on_tab_changed(self, index):
+        w = self.widget(index)
+        if w is not None and index != self.count() - 1:
+            w.setProperty("last_used", time.monotonic())
+            if w.property("lazy"):
+                self.materialize(index)
+                self.app.schedule_unload()
+            QTimer.singleShot(0, lambda: self.app.monitor.resolve(w))
+        ed = self.get_editor(index)
+        self.app.find_bar.tab_changed()
+        self.app.update_status(ed)
+        self.app.update_window_title(index)
+        self.app.update_load_progress()
+        if self.app.follow_action:
+            self.app.follow_action.setChecked(self.get_follower(index) is not None)
+
+# ---------- Background file loading ----------
+class ChunkedFileLoader(QObject):
+    """Streams a file into an editor: a worker thread decodes, the GUI appends in time slices."""
+    progress = Signal(int)  # percent of bytes read
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, path, editor, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.editor = editor
+        self.total = os.path.getsize(path)
+        self.percent = 0
+        self._queue = queue.Queue(maxsize=LOAD_QUEUE_CHUNKS)
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._drain)
+        self._first = True
+        self.signature = None  # (mtime_ns, size, digest) of the bytes read, for FileMonitor
+        self.goto_line = None  # 1-based line to show once loading finishes
+        self.replay = None     # recovered journal edits to apply once loading finishes
+        self.replaces = []     # (pattern, repl, regex, run) of "All tabs" replaces waiting for the text
+        self.appending = False  # inside _append: the document changes are the file's, not the user's
+
+    def start(self):
+        doc = self.editor.document()
+        # appends are not user edits; history starts once the file is in
+        doc.setUndoRedoEnabled(False)
+        if self.replay is not None:
+            # recovered edits apply to the whole file, so nothing may be typed before them
+            self.editor.setReadOnly(True)
+        if doc.isEmpty():
+            doc.findChild(LongLines).reset()
+        self._thread.start()
+        self._timer.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._timer.stop()
+        self._release()
+
+    def _release(self):
+        self.editor.document().setUndoRedoEnabled(True)
+        if self.replay is not None:
+            self.editor.setReadOnly(False)
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def _put(self, item):
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _read(self):
+        # worker thread: decode UTF-8 incrementally, translating newlines like text mode does
+        try:
+            decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+            digest = file_hasher()
+            size = LOAD_FIRST_CHUNK
+            with open(self.path, "rb") as fh:
+                while not self._cancelled.is_set():
+                    raw = fh.read(size)
+                    digest.update(raw)
+                    text = decoder.decode(raw, final=not raw)
+                    if text:
+                        self._put((text, fh.tell()))
+                    if not raw:
+                        break
+                    size = LOAD_CHUNK_SIZE
+                self.signature = (os.fstat(fh.fileno()).st_mtime_ns, fh.tell(), digest.hexdigest())
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def _drain(self):
+        deadline = time.perf_counter() + LOAD_SLICE_MS / 1000.0
+        while time.perf_counter() < deadline:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._timer.stop()
+                self._release()
+                self.progress.emit(100)
+                self.finished.emit()
+                return
+            if isinstance(item, Exception):
+                self._timer.stop()
+                self._release()
+                self.failed.emit(str(item))
+                return
+            text, pos = item
+            self._append(text)
+            percent = int(pos * 100 / self.total) if self.total else 100
+            if percent != self.percent:
+                self.percent = percent
+                self.progress.emit(percent)
+
+    def _append(self, text):
+        doc = self.editor.document()
+        # keep the modified flag meaning "the user typed something"
+        was_modified = doc.isModified()
+        cursor = QTextCursor(doc)
+        cursor.movePosition(QTextCursor.End)
+        self.appending = True
+        try:
+            doc.findChild(LongLines).insert(cursor, text)
+        finally:
+            self.appending = False
+        doc.setModified(was_modified)
+        if self._first:
+            self._first = False
+            self.editor.moveCursor(QTextCursor.Start)
+
+# ---------- Follow mode ----------
+class FileFollower(QObject):
+    """Keeps an editor showing the end of a growing file, reading only appended bytes.
+
+    The file is identified by (device, inode); a new identity means it was rotated and a
+    size below the read offset means it was truncated; both restart from the new tail.
+    """
+    restarted = Signal(str)  # reason
+
+    def __init__(self, path, editor, max_lines, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.editor = editor
+        self.max_lines = max(1, max_lines)
+        self.offset = 0
+        self.identity = None
+        self.trimmed = False  # the buffer no longer holds the whole file
+        self.decoder = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.check)
+        self.timer = QTimer(self)
+        self.timer.setInterval(FOLLOW_POLL_MS)
+        self.timer.timeout.connect(self.check)
+
+    def start(self):
+        doc = self.editor.document()
+        doc.setUndoRedoEnabled(False)  # appended output is not worth an undo history
+        self.editor.setReadOnly(True)
+        self.load_tail()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.watcher.removePaths(self.watcher.files())
+        self.editor.setReadOnly(False)
+        self.editor.document().setUndoRedoEnabled(True)
+
+    def load_tail(self):
+        """Replace the buffer with the last max_lines lines of the file."""
+        try:
+            st = os.stat(self.path)
+            start = self._tail_start(st.st_size)
+        except OSError:
+            return
+        self.identity = (st.st_dev, st.st_ino)
+        self.offset = start
+        self.trimmed = start > 0
+        self.decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+        doc = self.editor.document()
+        was_modified = doc.isModified()
+        self.editor.clear()
+        doc.setModified(was_modified)
+        self.check()
+
+    def _tail_start(self, size):
+        # walk back counting newlines; a newline byte never sits inside a UTF-8 sequence
+        need = self.max_lines
+        pos = size
+        with open(self.path, "rb") as fh:
+            while pos > 0 and size - pos < FOLLOW_TAIL_BYTES:
+                step = min(INDEX_BLOCK, pos)
+                pos -= step
+                fh.seek(pos)
+                chunk = fh.read(step)
+                end = len(chunk)
+                while end > 0:
+                    end = chunk.rfind(b"\n", 0, end)
+                    if end < 0:
+                        break
+                    # the newline ending the file's last line doesn't start a line
+                    if pos + end + 1 < size:
+                        need -= 1
+                        if need == 0:
+                            return pos + end + 1
+            return pos
+
+    def check(self):
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)  # dropped by the watcher after a rename or delete
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return  # rotated away; the poll picks up the new file once it exists
+        if (st.st_dev, st.st_ino) != self.identity:
+            self.restarted.emit("rotated")
+            self.load_tail()
+            return
+        if st.st_size < self.offset:
+            self.restarted.emit("truncated")
+            self.load_tail()
+            return
+        if st.st_size == self.offset:
+            return
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(self.offset)
+                raw = fh.read(FOLLOW_READ_MAX)
+        except OSError:
+            return
+        self.offset += len(raw)
+        self._append(self.decoder.decode(raw))
+        if len(raw) == FOLLOW_READ_MAX:
+            QTimer.singleShot(0, self.check)  # more to come; let the GUI breathe first
+
+    def _append(self, text):
+        if not text:
+            return
+        ed = self.editor
+        doc = ed.document()
+        bar = ed.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        was_modified = doc.isModified()
+        cursor = QTextCursor(doc)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        extra = doc.blockCount() - self.max_lines
+        if extra > 0:
+            cursor.movePosition(QTextCursor.Start)
+            cursor.setPosition(doc.findBlockByNumber(extra).position(), QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+            self.trimmed = True
+        doc.setModified(was_modified)
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+# ---------- Long lines ----------
+class LongLines(QObject):
+    """Inserts text with over-long lines cut into segments, and gives the file text back.
+
+    A segment starts a new block whose format carries SOFT_BREAK, so layout and
+    every per-block helper only ever see SEGMENT_CHARS-sized blocks; text() joins
+    soft-broken blocks without a newline, so saving writes the original line back.
+    Anything that reads the buffer as lines (search, the line index) goes through
+    TextSlice or skips soft-broken blocks.
+    """
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.doc = doc
+        self.active = False  # some block has a soft break
+        self.inserting = False
+        self.fixing = False  # clearing copied soft flags; listeners wait for the edit's own change
+        self.edited = False  # the next contentsChange is a new edit, not an undo or redo
+        self.line_len = 0    # length of the logical line the last insert ended in
+        self.soft = QTextBlockFormat()
+        self.soft.setProperty(SOFT_BREAK, True)
+        self.plain = QTextBlockFormat()
+        doc.undoCommandAdded.connect(self._on_command)
+        doc.contentsChange.connect(self._on_change)
+
+    def reset(self):
+        """The document was emptied; the next insert starts a fresh line."""
+        self.active = False
+        self.line_len = 0
+
+    def insert(self, cursor, text):
+        """Insert `text` at `cursor`, segmenting lines past LONG_LINE_CHARS."""
+        pieces = text.split("\n")
+        if (not self.active and self.line_len + len(pieces[0]) <= LONG_LINE_CHARS
+                and max(map(len, pieces)) <= LONG_LINE_CHARS):
+            cursor.insertText(text)  # the usual case
+            self.line_len = (self.line_len if len(pieces) == 1 else 0) + len(pieces[-1])
+            return
+        was, self.inserting = self.inserting, True
+        cursor.beginEditBlock()  # one contentsChange for the whole chunk
+        try:
+            self._segment(cursor, pieces[0])
+            i, n = 1, len(pieces)
+            while i < n:
+                j = i
+                while j < n and len(pieces[j]) <= LONG_LINE_CHARS:
+                    j += 1
+                if j > i:
+                    # short lines go in together; the break before them is real
+                    cursor.insertBlock(self.plain)
+                    cursor.insertText("\n".join(pieces[i:j]))
+                    self.line_len = len(pieces[j - 1])
+                    i = j
+                if i < n:
+                    cursor.insertBlock(self.plain)
+                    self.line_len = 0
+                    self._segment(cursor, pieces[i])
+                    i += 1
+        finally:
+            cursor.endEditBlock()
+            self.inserting = was
+
+    def set_text(self, cursor, text):
+        """Replace the whole buffer with `text`, segmented, as one undo step."""
+        self.inserting = True
+        cursor.beginEditBlock()
+        try:
+            cursor.select(QTextCursor.Document)
+            cursor.removeSelectedText()
+            self.reset()
+            self.insert(cursor, text)
+        finally:
+            cursor.endEditBlock()
+            self.inserting = False
+
+    def replace(self, cursor, edits):
+        """Apply [(start, end, text), ...] (ascending document positions) as one undo
+        step. Newlines in `text` are real breaks; soft breaks elsewhere stay soft."""
+        self.inserting = True
+        cursor.beginEditBlock()
+        try:
+            for start, end, text in reversed(edits):
+                cursor.setPosition(start)
+                cursor.setPosition(end, QTextCursor.KeepAnchor)
+                if not self.active or "\n" not in text:
+                    cursor.insertText(text)
+                    continue
+                lines = text.split("\n")
+                cursor.insertText(lines[0])
+                for line in lines[1:]:
+                    cursor.insertBlock(self.plain)
+                    cursor.insertText(line)
+        finally:
+            cursor.endEditBlock()
+            self.inserting = False
+
+    def _segment(self, cursor, piece):
+        if self.line_len + len(piece) <= LONG_LINE_CHARS:
+            cursor.insertText(piece)
+            self.line_len += len(piece)
+            return
+        self.line_len += len(piece)
+        self.active = True
+        seg = cursor.block().length() - 1
+        while piece:
+            room = SEGMENT_CHARS - seg
+            if len(piece) <= room:
+                cursor.insertText(piece)
+                return
+            cut = max(room, 0)
+            if cut:
+                best = max(piece.rfind(ch, max(0, cut - 512), cut) for ch in SEGMENT_CUT_AFTER)
+                if best >= 0:
+                    cut = best + 1
+                cursor.insertText(piece[:cut])
+            cursor.insertBlock(self.soft)
+            piece = piece[cut:]
+            seg = 0
+
+    def _on_command(self):
+        self.edited = True
+
+    def _on_change(self, position, removed, added):
+        # blocks created by an edit (Enter, paste) copy the soft flag of the block
+        # they split from, but the break the user typed is real; undo and redo
+        # restore blocks with the flags they had, so those are left alone
+        edited, self.edited = self.edited, False
+        if self.inserting or self.fixing or not self.active or not edited:
+            return
+        first = self.doc.findBlock(position)
+        last = self.doc.findBlock(position + added)
+        if not first.isValid() or not last.isValid() or first == last:
+            return
+        self.fixing = True
+        try:
+            block = first.next()
+            while block.isValid():
+                if block.blockFormat().property(SOFT_BREAK):
+                    QTextCursor(block).setBlockFormat(self.plain)
+                if block == last:
+                    break
+                block = block.next()
+        finally:
+            self.fixing = False
+
+    def is_soft(self, block):
+        """Whether the break before `block` is a soft one (not in the file)."""
+        return self.active and bool(block.blockFormat().property(SOFT_BREAK))
+
+    def text(self):
+        """The file's text: soft breaks dropped, real ones as \\n."""
+        return TextSlice(self.doc).text
+
+
+class TextSlice:
+    """Document positions start..end as the file has them: long-line soft breaks are
+    dropped and real ones read as \\n, so patterns only ever see real lines.
+    to_doc() maps an index into `text` back to a document position.
+    """
+
+    def __init__(self, doc, start=0, end=None):
+        last_pos = doc.characterCount() - 1
+        end = last_pos if end is None else end
+        self.base = start
+        self.soft = []  # indexes into text where a soft break was dropped
+        self._map = None
+        long_lines = doc.findChild(LongLines)
+        if long_lines is None or not long_lines.active:
+            if start == 0 and end == last_pos:
+                self.text = doc.toPlainText()
+            else:
+                c = QTextCursor(doc)
+                c.setPosition(start)
+                c.setPosition(end, QTextCursor.KeepAnchor)
+                self.text = c.selectedText().replace("\u2029", "\n")
+            return
+        first, last = doc.findBlock(start), doc.findBlock(end)
+        parts = []
+        size = 0
+        block = first
+        while True:
+            text = block.text()
+            if block == last:
+                text = text[:textsearch.Utf16Map(text).to_index(end - block.position())]
+            if block == first:
+                text = text[textsearch.Utf16Map(text).to_index(start - block.position()):]
+            else:
+                if long_lines.is_soft(block):
+                    self.soft.append(size)
+                else:
+                    parts.append("\n")
+                    size += 1
+            parts.append(text)
+            size += len(text)
+            if block == last:
+                break
+            block = block.next()
+        self.text = "".join(parts)
+
+    def to_doc(self, index, end=False):
+        """Document position of str `index`; at a dropped soft break, a start goes
+        after the break and an `end` before it."""
+        if self._map is None:
+            self._map = textsearch.Utf16Map(self.text)
+        breaks = bisect_left(self.soft, index) if end else bisect_right(self.soft, index)
+        return self.base + self._map.to_utf16(index) + breaks
+
+    def span(self, start, end):
+        """Document positions of text[start:end]; an empty span stays empty."""
+        a = self.to_doc(start)
+        return (a, a) if start == end else (a, self.to_doc(end, end=True))
+
+    def index(self, position):
+        """str index of a document position (inverse of to_doc)."""
+        if self._map is None:
+            self._map = textsearch.Utf16Map(self.text)
+        # soft break k sits at document position to_doc(soft[k], end=True)
+        breaks = bisect_left(range(len(self.soft)), position,
+                             key=lambda k: self.base + self._map.to_utf16(self.soft[k]) + k)
+        return self._map.to_index(position - self.base - breaks)
+
+def document_text(doc):
+    """What saving `doc` writes: its text with long-line segments joined back."""
+    return TextSlice(doc).text
+
+def set_document_text(editor, text):
+    """Replace the buffer like setPlainText, but with long lines segmented."""
+    doc = editor.document()
+    long_lines = doc.findChild(LongLines)
+    if long_lines is None:
+        editor.setPlainText(text)
+        return
+    doc.setUndoRedoEnabled(False)
+    editor.clear()
+    long_lines.reset()
+    long_lines.insert(QTextCursor(doc), text)
+    doc.setUndoRedoEnabled(True)
+    doc.setModified(False)
+
+# ---------- Document statistics ----------
+class DocumentStats(QObject):
+    """Word counts per block, patched from contentsChange so nothing copies the whole text."""
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.doc = doc
+        self.blocks = 0
+        self.block_words = array("l")
+        self.words = 0
+        self._count(0, 0, doc.blockCount() - 1)
+        doc.contentsChange.connect(self._on_change)
+
+    def _count(self, first, old_last, new_last):
+        # replace the counts of blocks first..old_last with a recount of first..new_last
+        counts = array("l")
+        block = self.doc.findBlockByNumber(first)
+        for _ in range(new_last - first + 1):
+            counts.append(len(block.text().split()))
+            block = block.next()
+        old = self.block_words[first:old_last + 1]
+        self.words += sum(counts) - sum(old)
+        self.block_words[first:old_last + 1] = counts
+        self.blocks = self.doc.blockCount()
+
+    def _on_change(self, position, removed, added):
+        doc = self.doc
+        first = doc.findBlock(position)
+        if not first.isValid():
+            first = doc.lastBlock()
+        last = doc.findBlock(position + added)
+        if not last.isValid():
+            last = doc.lastBlock()
+        new_last = last.blockNumber()
+        old_last = new_last - (doc.blockCount() - self.blocks)
+        self._count(first.blockNumber(), old_last, new_last)
+
+    def chars(self):
+        return self.doc.characterCount() - 1
+
+    def selection(self, cursor):
+        """(chars, words, lines) of the cursor's selection, reading only its edge blocks."""
+        start, end = cursor.selectionStart(), cursor.selectionEnd()
+        sb, eb = self.doc.findBlock(start), self.doc.findBlock(end)
+        first, last = sb.blockNumber(), eb.blockNumber()
+        # selection offsets are UTF-16 positions; the block texts are str
+        s_text, e_text = sb.text(), eb.text()
+        s_cut = textsearch.Utf16Map(s_text).to_index(start - sb.position())
+        e_cut = textsearch.Utf16Map(e_text).to_index(end - eb.position())
+        if first == last:
+            words = len(s_text[s_cut:e_cut].split())
+        else:
+            words = (len(s_text[s_cut:].split())
+                     + sum(self.block_words[first + 1:last])
+                     + len(e_text[:e_cut].split()))
+        return end - start, words, last - first + 1
+
+# ---------- Line index ----------
+class LineIndex(QObject):
+    """Start offset of every line in a compact array, patched from contentsChange.
+
+    Lines are the file's lines: in long-line mode the blocks after soft breaks are
+    not entries. Offsets behind an edit are not rewritten at once: one pending shift
+    (from, delta) covers them and is only materialized up to the next edit, so typing
+    in one place stays O(1) while lookups stay a bisect.
+    """
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.doc = doc
+        self.long_lines = doc.findChild(LongLines)
+        self.starts = array("q", [0])
+        self.shift_from = 1  # entries at or after this index are stored `shift` too low
+        self.shift = 0
+        if doc.characterCount() > 1:
+            self._on_change(0, 0, doc.characterCount())
+        doc.contentsChange.connect(self._on_change)
+
+    def _move_shift(self, index):
+        """Re-anchor the pending shift at `index`, fixing up the entries in between."""
+        p, d = self.shift_from, self.shift
+        if d and p < index:
+            self.starts[p:index] = array("q", [x + d for x in self.starts[p:index]])
+        elif d and index < p:
+            self.starts[index:p] = array("q", [x - d for x in self.starts[index:p]])
+        self.shift_from = index
+
+    def _on_change(self, position, removed, added):
+        long_lines = self.long_lines
+        if long_lines is not None and long_lines.fixing:
+            return  # the edit being fixed up reports its whole range next
+        doc = self.doc
+        # entries starting in [position, position + removed] are replaced by the line
+        # starts now in [position, position + added]
+        lo = self.line_of(position - 1) + 1 if position > 0 else 0
+        hi = self.line_of(position + removed) + 1
+        end = min(position + added, doc.characterCount() - 1)
+        c = QTextCursor(doc)
+        c.setPosition(position)
+        c.setPosition(end, QTextCursor.KeepAnchor)
+        parts = c.selectedText().split("\u2029")
+        # positions count UTF-16 units, so astral characters take two
+        lengths = [textsearch.utf16_len(part) + 1 for part in parts[:-1]]
+        block = doc.findBlock(position)
+        fresh = array("q", accumulate(lengths, initial=position))
+        if block.position() != position:
+            del fresh[0]  # the edit starts inside a line
+        if long_lines is not None and long_lines.active:
+            keep = array("q")
+            if block.position() != position:
+                block = block.next()
+            for start in fresh:
+                if not long_lines.is_soft(block):
+                    keep.append(start)
+                block = block.next()
+            fresh = keep
+        self._move_shift(hi)
+        self.shift += added - removed
+        self.starts[lo:hi] = fresh
+        self.shift_from = lo + len(fresh)
+
+    def count(self):
+        return len(self.starts)
+
+    def offset(self, line):
+        """Start offset of 0-based `line`."""
+        line = min(max(0, line), len(self.starts) - 1)
+        return self.starts[line] + (self.shift if line >= self.shift_from else 0)
+
+    def line_of(self, position):
+        """0-based line holding `position`."""
+        p = self.shift_from
+        if p < len(self.starts) and position >= self.starts[p] + self.shift:
+            return bisect_right(self.starts, position - self.shift, p) - 1
+        return bisect_right(self.starts, position, 0, p) - 1
+
+# ---------- Background replace ----------
+class ReplaceJob(QObject):
+    """Finds every replacement on a snapshot in a worker thread; the GUI applies them."""
+    done = Signal(object, object)  # job, [(utf16 start, utf16 end, text), ...]
+    failed = Signal(object, str)
+
+    def __init__(self, editor, piece, pattern, repl, regex, selection, run):
+        super().__init__(editor)
+        self.editor = editor
+        self.run = run  # the Replace All this job counts towards
+        self.piece = piece  # TextSlice of the buffer or selection
+        self.revision = editor.document().revision()
+        self.pattern = pattern
+        self.repl = repl
+        self.regex = regex
+        self.selection = selection
+        self._cancelled = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        try:
+            piece = self.piece
+            edits = textsearch.find_replacements(piece.text, self.pattern, self.repl, self.regex,
+                                                 cancelled=self._cancelled.is_set)
+            if edits is None:
+                return
+            self.done.emit(self, [(*piece.span(a, b), r) for a, b, r in edits])
+        except Exception as e:
+            self.failed.emit(self, str(e))
+
+# ---------- Line operations ----------
+class LineJob(QObject):
+    """Runs a lineops operation on a snapshot of a tab's buffer in a worker process;
+    the GUI swaps the result in as one undo step."""
+    done = Signal(object, object)   # job, (text, lines in, lines out)
+    failed = Signal(object, str)
+    progress = Signal(int)
+    _started = Signal(object)       # (process, queue) or an exception
+
+    def __init__(self, cont, editor, op, options, label):
+        super().__init__(cont)
+        self.editor = editor
+        self.revision = editor.document().revision()
+        self.op = op
+        self.options = options
+        self.label = label
+        self.percent = 0
+        self.process = None
+        self.queue = None
+        self.paths = []
+        self.cancelled = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(30)
+        self.timer.timeout.connect(self._poll)
+        self._started.connect(self._on_started)
+
+    def start(self, text):
+        threading.Thread(target=self._launch, args=(text,), daemon=True).start()
+
+    def _launch(self, text):
+        # worker thread: the snapshot goes to disk, the operation gets its own process
+        try:
+            src = write_snapshot(text)
+            self.paths.append(src)
+            fd, dst = tempfile.mkstemp(prefix="notepad-", suffix=".txt")
+            os.close(fd)
+            self.paths.append(dst)
+            self._started.emit(start_process(lineops.run, self.op, src, dst, self.options))
+        except Exception as e:
+            self._started.emit(e)
+
+    def _on_started(self, result):
+        if isinstance(result, Exception):
+            self._stop()
+            if not self.cancelled:
+                self.failed.emit(self, str(result))
+            return
+        self.process, self.queue = result
+        if self.cancelled:
+            self._stop()
+            return
+        self.timer.start()
+
+    def _poll(self):
+        while True:
+            try:
+                msg = self.queue.get_nowait()
+            except queue.Empty:
+                if self.process.exitcode is not None:
+                    self._stop()
+                    self.failed.emit(self, "the worker process stopped unexpectedly")
+                return
+            if msg[0] == "progress":
+                self.percent = msg[1]
+                self.progress.emit(self.percent)
+            elif msg[0] == "done":
+                try:
+                    with open(self.paths[1], "r", encoding="utf-8", errors="surrogatepass", newline="\n") as fh:
+                        text = fh.read()
+                except OSError as e:
+                    self._stop()
+                    self.failed.emit(self, str(e))
+                    return
+                self._stop()
+                self.done.emit(self, (text, msg[1], msg[2]))
+                return
+            else:
+                self._stop()
+                self.failed.emit(self, msg[1])
+                return
+
+    def _stop(self):
+        self.timer.stop()
+        if self.process is not None and self.process.exitcode is None:
+            self.process.terminate()
+        self.process = self.queue = None
+        remove_files(self.paths)
+
+    def cancel(self):
+        self.cancelled = True
+        self._stop()
+
+# ---------- Incremental search ----------
+class MatchScanner(QObject):
+    """Sorted match offsets (UTF-16) for one document's active find pattern.
+
+    The first scan runs on a snapshot in a worker thread; after that each
+    contentsChange only rescans the touched blocks. The offsets behind them get the
+    pending-shift treatment LineIndex uses, so an edit costs the matches between it
+    and the previous edit, not every match behind it. The text scanned is the file's
+    (TextSlice), so soft breaks never look like line ends.
+    """
+    changed = Signal()
+    _scanned = Signal(int, object)  # generation, (starts, ends)
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.doc = doc
+        self.long_lines = doc.findChild(LongLines)
+        self.pattern = None
+        self.starts = array("q")
+        self.ends = array("q")
+        self.shift_from = 0  # entries at or after this index are stored `shift` too low
+        self.shift = 0
+        self.scanning = False
+        self._generation = 0
+        self._revision = 0
+        self._scanned.connect(self._on_scanned)
+        doc.contentsChange.connect(self._on_change)
+
+    def set_pattern(self, pattern):
+        self._generation += 1
+        self.pattern = pattern
+        self.starts, self.ends = array("q"), array("q")
+        self.shift_from, self.shift = 0, 0
+        self.scanning = pattern is not None
+        if pattern is not None:
+            self._revision = self.doc.revision()
+            args = (self._generation, TextSlice(self.doc), pattern)
+            threading.Thread(target=self._scan, args=args, daemon=True).start()
+        self.changed.emit()
+
+    def _matches(self, piece, pattern, start=0, last=None, cancelled=None):
+        """Document (starts, ends) of the matches in the TextSlice `piece` from str index
+        `start` on, leaving out those starting after document position `last`."""
+        spans = []
+        for chunk in textsearch.iter_matches(piece.text, pattern, start, cancelled=cancelled):
+            spans.extend((m.start(), m.end()) for m in chunk if m.end() > m.start())
+        if piece.soft:
+            spans = [piece.span(a, b) for a, b in spans]
+        else:
+            pos, base = textsearch.Utf16Map(piece.text), piece.base
+            if pos.astral:
+                spans = [(base + pos.to_utf16(a), base + pos.to_utf16(b)) for a, b in spans]
+            elif base:
+                spans = [(base + a, base + b) for a, b in spans]
+        if last is not None:
+            spans = [span for span in spans if span[0] <= last]
+        return [a for a, _ in spans], [b for _, b in spans]
+
+    def _scan(self, generation, piece, pattern):
+        result = self._matches(piece, pattern, cancelled=lambda: generation != self._generation)
+        try:
+            self._scanned.emit(generation, result)
+        except RuntimeError:
+            pass  # document closed meanwhile
+
+    def _on_scanned(self, generation, result):
+        if generation != self._generation:
+            return
+        if self.doc.revision() != self._revision:
+            return self.set_pattern(self.pattern)  # edited during the scan
+        self.starts, self.ends = array("q", result[0]), array("q", result[1])
+        self.shift_from = len(self.starts)
+        self.scanning = False
+        self.changed.emit()
+
+    def _on_change(self, position, removed, added):
+        if self.pattern is None or self.scanning:
+            return
+        long_lines = self.long_lines
+        if long_lines is not None and long_lines.fixing:
+            return  # the edit being fixed up reports its whole range next
+        doc = self.doc
+        delta = added - removed
+        first = doc.findBlock(position)
+        last = doc.findBlock(position + added)
+        if not first.isValid():
+            first = doc.lastBlock()
+        if not last.isValid():
+            last = doc.lastBlock()
+        if long_lines is not None:
+            # a match may run across a soft break into the segments on either side
+            if long_lines.is_soft(first):
+                first = first.previous()
+            if last.next().isValid() and long_lines.is_soft(last.next()):
+                last = last.next()
+        start = first.position()
+        end = last.position() + last.length() - 1
+        # matches starting in the touched blocks are replaced, the ones behind them move
+        # by delta; a character of context on each side keeps ^, $ and \b honest
+        lo = self.bisect(start)
+        hi = self.bisect(end - delta, right=True)
+        piece = TextSlice(doc, max(0, start - 2), min(end + 2, doc.characterCount() - 1))
+        starts, ends = self._matches(piece, self.pattern, piece.index(start), end)
+        self._move_shift(hi)
+        self.shift += delta
+        self.starts[lo:hi] = array("q", starts)
+        self.ends[lo:hi] = array("q", ends)
+        self.shift_from = lo + len(starts)
+        self.changed.emit()
+
+    def _move_shift(self, index):
+        """Re-anchor the pending shift at `index`, fixing up the entries in between."""
+        p, d = self.shift_from, self.shift
+        for values in (self.starts, self.ends):
+            if d and p < index:
+                values[p:index] = array("q", [x + d for x in values[p:index]])
+            elif d and index < p:
+                values[index:p] = array("q", [x - d for x in values[index:p]])
+        self.shift_from = index
+
+    def count(self):
+        return len(self.starts)
+
+    def match(self, i):
+        """(start, end) of match `i`."""
+        d = self.shift if i >= self.shift_from else 0
+        return self.starts[i] + d, self.ends[i] + d
+
+    def bisect(self, position, right=False, ends=False):
+        """bisect_left (or bisect_right) of `position` in the match starts (or ends)."""
+        values = self.ends if ends else self.starts
+        find = bisect_right if right else bisect_left
+        p = self.shift_from
+        if p < len(values) and (position >= values[p] + self.shift if right
+                                else position > values[p] + self.shift):
+            return find(values, position - self.shift, p)
+        return find(values, position, 0, p)
+
+class FindBar(QWidget):
+    """Non-modal find: searches as you type, highlights visible matches, shows "i of N"."""
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.editor = None  # editor whose scanner carries our pattern
+        self.edit = QLineEdit()
+        self.edit.setPlaceholderText("Find")
+        self.count = QLabel("")
+        self.count.setMinimumWidth(90)
+        self.case = QCheckBox("Aa")
+        self.case.setToolTip("Match case")
+        self.word = QCheckBox("Word")
+        self.word.setToolTip("Whole word")
+        self.regex = QCheckBox(".*")
+        self.regex.setToolTip("Regular expression")
+        prev_btn = QPushButton("Prev")
+        next_btn = QPushButton("Next")
+        close_btn = QPushButton("Close")
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(2, 0, 2, 0)
+        for w in (self.edit, self.count, self.case, self.word, self.regex, prev_btn, next_btn, close_btn):
+            layout.addWidget(w)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(FIND_DELAY_MS)
+        self.timer.timeout.connect(self.search)
+        self.edit.textChanged.connect(lambda: self.timer.start())
+        for box in (self.case, self.word, self.regex):
+            box.toggled.connect(lambda _: self.search())
+        self.edit.returnPressed.connect(lambda: self.next())
+        prev_btn.clicked.connect(lambda: self.next(backwards=True))
+        next_btn.clicked.connect(lambda: self.next())
+        close_btn.clicked.connect(self.close_bar)
+        esc = QShortcut(QKeySequence(Qt.Key_Escape), self)
+        esc.setContext(Qt.WidgetWithChildrenShortcut)
+        esc.activated.connect(self.close_bar)
+
+        self.match_format = QTextCharFormat()
+        self.match_format.setBackground(QColor(255, 200, 0, 90))
+        self.current_format = QTextCharFormat()
+        self.current_format.setBackground(QColor(255, 140, 0, 180))
+        self.hide()
+
+    def open(self):
+        ed = self.app.tab_widget.get_editor()
+        if ed and ed.textCursor().hasSelection():
+            selected = ed.textCursor().selectedText()
+            if "\u2029" not in selected:
+                self.edit.setText(selected)
+        self.show()
+        self.edit.setFocus()
+        self.edit.selectAll()
+        self.search()
+
+    def close_bar(self):
+        self.hide()
+        self.detach()
+        ed = self.app.tab_widget.get_editor()
+        if ed:
+            ed.setFocus()
+
+    def scanner(self):
+        return self.editor.document().findChild(MatchScanner) if self.editor else None
+
+    def detach(self):
+        if self.editor is None:
+            return
+        try:
+            self.scanner().set_pattern(None)
+            self.editor.setExtraSelections([])
+        except RuntimeError:
+            pass  # tab already closed
+        self.editor = None
+
+    def tab_changed(self):
+        if self.isVisible():
+            self.search()
+
+    def search(self):
+        self.timer.stop()
+        if not self.isVisible():
+            return
+        ed = self.app.tab_widget.get_editor()
+        if ed is not self.editor:
+            self.detach()
+            self.editor = ed
+        if ed is None:
+            self.count.setText("")
+            return  # large file tabs search on Enter
+        pattern = None
+        if self.edit.text():
+            try:
+                pattern = textsearch.compile_pattern(self.edit.text(), regex=self.regex.isChecked(),
+                                                     case=self.case.isChecked(), whole_word=self.word.isChecked())
+            except re.error:
+                self.count.setText("Bad pattern")
+                self.scanner().set_pattern(None)
+                return
+        self.scanner().set_pattern(pattern)
+
+    def refresh(self):
+        ed = self.app.tab_widget.get_editor()
+        if self.isVisible() and ed is not None and ed is self.editor:
+            self.update_count()
+            self.highlight(ed)
+
+    def update_count(self):
+        scanner = self.scanner()
+        if scanner is None or not self.isVisible():
+            return
+        if scanner.pattern is None:
+            self.count.setText("")
+            return
+        if scanner.scanning:
+            self.count.setText("Searching...")
+            return
+        n = scanner.count()
+        c = self.editor.textCursor()
+        i = scanner.bisect(c.selectionStart())
+        if i < n and scanner.match(i) == (c.selectionStart(), c.selectionEnd()):
+            self.count.setText(f"{i + 1} of {n}")
+        else:
+            self.count.setText(f"{n} matches" if n else "No results")
+
+    def next(self, backwards=False):
+        if not self.isVisible():
+            return self.open()
+        view = self.app.tab_widget.get_large_view()
+        if view:
+            if self.edit.text() and not view.find(self.edit.text()):
+                self.count.setText("No results")
+            return
+        scanner = self.scanner()
+        if scanner is None or scanner.scanning or not scanner.count():
+            return
+        c = self.editor.textCursor()
+        if backwards:
+            i = scanner.bisect(c.selectionStart()) - 1
+        elif c.hasSelection():
+            i = scanner.bisect(c.selectionStart(), right=True)
+        else:
+            i = scanner.bisect(c.position())
+        start, end = scanner.match(i % scanner.count())
+        c.setPosition(start)
+        c.setPosition(end, QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(c)
+        self.update_count()
+        self.highlight(self.editor)
+
+    def highlight(self, ed):
+        """Paint only the matches inside the viewport."""
+        if not self.isVisible() or ed is not self.editor:
+            return
+        scanner = self.scanner()
+        if scanner is None:
+            return
+        top = ed.firstVisibleBlock().position()
+        bottom = ed.cursorForPosition(QPoint(ed.viewport().width(), ed.viewport().height())).block()
+        end = bottom.position() + bottom.length()
+        cur = ed.textCursor()
+        sels = []
+        doc = ed.document()
+        for i in range(scanner.bisect(top, ends=True), scanner.bisect(end, right=True)):
+            start, stop = scanner.match(i)
+            sel = QTextEdit.ExtraSelection()
+            sel.cursor = QTextCursor(doc)
+            sel.cursor.setPosition(start)
+            sel.cursor.setPosition(stop, QTextCursor.KeepAnchor)
+            current = (start, stop) == (cur.selectionStart(), cur.selectionEnd())
+            sel.format = self.current_format if current else self.match_format
+            sels.append(sel)
+        ed.setExtraSelections(sels)
+
+# ---------- Find in Files ----------
+class FindInFilesPanel(QWidget):
+    """Greps a folder with a process pool and lists hits as each batch of files completes."""
+    _results = Signal(int, object)  # search id, [(path, hits), ...]
+    _walked = Signal(int, int)      # search id, number of batches submitted
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.pool = None
+        self.search_id = 0
+        self.futures = []
+        self.cancelled = threading.Event()
+        self.pending = None   # batches still running, known once the walk ends
+        self.done = 0
+        self.hits = 0
+        self.files = 0
+
+        self.folder = QLineEdit(os.getcwd())
+        browse = QPushButton("...")
+        self.pattern = QLineEdit()
+        self.pattern.setPlaceholderText("Find")
+        self.include = QLineEdit()
+        self.include.setPlaceholderText("Include, e.g. *.log; *.conf")
+        self.exclude = QLineEdit(".git; __pycache__; node_modules")
+        self.exclude.setToolTip("Exclude globs (files and folders)")
+        self.case = QCheckBox("Aa")
+        self.word = QCheckBox("Word")
+        self.regex = QCheckBox(".*")
+        self.search_btn = QPushButton("Search")
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.summary = QLabel("")
+        self.results = QListWidget()
+
+        top = QHBoxLayout()
+        top.addWidget(self.pattern, 2)
+        top.addWidget(self.case)
+        top.addWidget(self.word)
+        top.addWidget(self.regex)
+        top.addWidget(self.search_btn)
+        top.addWidget(self.cancel_btn)
+        where = QHBoxLayout()
+        where.addWidget(self.folder, 2)
+        where.addWidget(browse)
+        where.addWidget(self.include, 1)
+        where.addWidget(self.exclude, 1)
+        v = QVBoxLayout(self)
+        v.setContentsMargins(2, 2, 2, 2)
+        v.addLayout(top)
+        v.addLayout(where)
+        v.addWidget(self.summary)
+        v.addWidget(self.results)
+
+        browse.clicked.connect(self.browse)
+        self.pattern.returnPressed.connect(self.search)
+        self.search_btn.clicked.connect(self.search)
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.results.itemActivated.connect(self.open_hit)
+        self.results.itemClicked.connect(self.open_hit)
+        self._results.connect(self._add_results)
+        self._walked.connect(self._walk_finished)
+
+    def browse(self):
+        folder = QFileDialog.getExistingDirectory(self, "Find in Files", self.folder.text())
+        if folder:
+            self.folder.setText(folder)
+
+    def search(self):
+        self.cancel()
+        root = self.folder.text()
+        if not self.pattern.text() or not os.path.isdir(root):
+            self.summary.setText("Pick a folder and enter something to find")
+            return
+        try:
+            pattern = textsearch.compile_pattern(self.pattern.text(), regex=self.regex.isChecked(),
+                                                 case=self.case.isChecked(), whole_word=self.word.isChecked())
+        except re.error as e:
+            self.summary.setText(f"Invalid pattern: {e}")
+            return
+        if self.pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawned like start_process: forking a process that runs Qt is unsafe
+            self.pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.search_id += 1
+        self.cancelled = threading.Event()
+        self.futures = []
+        self.pending = None
+        self.done = self.hits = self.files = 0
+        self.results.clear()
+        self.summary.setText("Searching...")
+        self.search_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        include = textsearch.split_globs(self.include.text())
+        exclude = textsearch.split_globs(self.exclude.text())
+        args = (self.search_id, root, include, exclude, pattern, self.cancelled)
+        threading.Thread(target=self._walk, args=args, daemon=True).start()
+
+    def _walk(self, search_id, root, include, exclude, pattern, cancelled):
+        # walker thread: feed the pool in batches while the results stream back
+        batches = 0
+        batch = []
+        for path in textsearch.walk_files(root, include, exclude, cancelled.is_set):
+            batch.append(path)
+            if len(batch) == FIND_FILES_BATCH:
+                self._submit(search_id, batch, pattern, cancelled)
+                batches += 1
+                batch = []
+        if batch and not cancelled.is_set():
+            self._submit(search_id, batch, pattern, cancelled)
+            batches += 1
+        self._walked.emit(search_id, batches)
+
+    def _submit(self, search_id, batch, pattern, cancelled):
+        if cancelled.is_set():
+            return
+        future = self.pool.submit(textsearch.search_files, batch, pattern)
+        self.futures.append(future)
+
+        def done(f):
+            if f.cancelled():
+                return
+            try:
+                self._results.emit(search_id, f.result())
+            except Exception:
+                self._results.emit(search_id, [])
+        future.add_done_callback(done)
+
+    def _add_results(self, search_id, results):
+        if search_id != self.search_id or self.cancelled.is_set():
+            return
+        self.done += 1
+        root = self.folder.text()
+        for path, hits in results:
+            self.files += 1
+            rel = os.path.relpath(path, root)
+            for line, col, text in hits:
+                if self.hits >= FIND_FILES_MAX_HITS:
+                    break
+                item = QListWidgetItem(f"{rel}:{line}: {text.strip()}")
+                item.setData(Qt.UserRole, (path, line))
+                self.results.addItem(item)
+                self.hits += 1
+        self._update_summary()
+
+    def _walk_finished(self, search_id, batches):
+        if search_id == self.search_id:
+            self.pending = batches
+            self._update_summary()
+
+    def _update_summary(self):
+        finished = self.pending is not None and self.done >= self.pending
+        capped = " (list truncated)" if self.hits >= FIND_FILES_MAX_HITS else ""
+        state = "Done" if finished else "Searching..."
+        self.summary.setText(f"{state} {self.hits} hits in {self.files} files{capped}")
+        if finished:
+            self.search_btn.setEnabled(True)
+            self.cancel_btn.setEnabled(False)
+
+    def cancel(self):
+        self.cancelled.set()
+        for f in list(self.futures):
+            f.cancel()
+        self.futures = []
+        self.search_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        if self.summary.text().startswith("Searching"):
+            self.summary.setText(f"Cancelled: {self.hits} hits in {self.files} files")
+
+    def open_hit(self, item):
+        path, line = item.data(Qt.UserRole)
+        self.app.open_file(path, line)
+
+    def shutdown(self):
+        self.cancel()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+# ---------- Worker processes ----------
+def write_snapshot(text):
+    """Write a buffer snapshot to a temp file for a worker process; returns its path."""
+    fd, path = tempfile.mkstemp(prefix="notepad-", suffix=".txt")
+    with open(fd, "w", encoding="utf-8", errors="surrogatepass", newline="\n") as fh:
+        fh.write(text)
+    return path
+
+def start_process(target, *args):
+    """Run target(*args, queue) in a new process; returns (process, queue).
+    Processes are spawned, since forking a process that runs Qt is unsafe."""
+    import multiprocessing
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, out), daemon=True)
+    process.start()
+    return process, out
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+# ---------- Compare ----------
+class ComparePanel(QWidget):
+    """Shows two tabs' documents side by side with their line differences.
+
+    Both sides are hashed and diffed in a separate process (textdiff.compare_files)
+    that streams hunks back; hunks are painted as they arrive, only inside the
+    viewports, and kept in order so next/previous is a step through a list.
+    """
+    _started = Signal(int, object)  # compare id, (process, queue, temp files) or an exception
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.compare_id = 0
+        self.process = None
+        self.queue = None
+        self.temp = []
+        self.conts = []
+        self.docs = []
+        self.hunks = []  # (a1, a2, b1, b2) line ranges, ascending on both sides
+        self.a_starts, self.a_ends, self.b_starts, self.b_ends = [], [], [], []
+        self.current = -1
+        self.state = ""
+        self.percent = 0
+        self.stale = False
+
+        self.left = QPlainTextEdit()
+        self.right = QPlainTextEdit()
+        self.views = (self.left, self.right)
+        # placeholders owned by the panel: a view deletes the document it owns when it
+        # is given another one, and the views here take turns showing tab documents
+        self.blank = []
+        for view in self.views:
+            blank = QTextDocument(self)
+            blank.setDocumentLayout(QPlainTextDocumentLayout(blank))
+            view.setDocument(blank)
+            self.blank.append(blank)
+        self.formats = []
+        for view, color in zip(self.views, ((220, 60, 60), (60, 180, 90))):
+            view.setReadOnly(True)
+            view.setFont(QFont("Consolas", 11))
+            view.verticalScrollBar().valueChanged.connect(lambda _, v=view: self.highlight(v))
+            fmt = QTextCharFormat()
+            fmt.setProperty(QTextFormat.FullWidthSelection, True)
+            fmt.setBackground(QColor(*color, 50))
+            current = QTextCharFormat(fmt)
+            current.setBackground(QColor(*color, 120))
+            self.formats.append((fmt, current))
+        self.names = (QLabel(), QLabel())
+        self.summary = QLabel("")
+        prev_btn = QPushButton("Previous")
+        next_btn = QPushButton("Next")
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
+
+        top = QHBoxLayout()
+        top.addWidget(self.summary, 1)
+        top.addWidget(prev_btn)
+        top.addWidget(next_btn)
+        top.addWidget(self.cancel_btn)
+        splitter = QSplitter(Qt.Horizontal)
+        for name, view in zip(self.names, self.views):
+            side = QWidget()
+            col = QVBoxLayout(side)
+            col.setContentsMargins(0, 0, 0, 0)
+            col.addWidget(name)
+            col.addWidget(view)
+            splitter.addWidget(side)
+        v = QVBoxLayout(self)
+        v.setContentsMargins(2, 2, 2, 2)
+        v.addLayout(top)
+        v.addWidget(splitter)
+
+        prev_btn.clicked.connect(lambda: self.next(backwards=True))
+        next_btn.clicked.connect(self.next)
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.timer = QTimer(self)
+        self.timer.setInterval(30)
+        self.timer.timeout.connect(self._poll)
+        self._started.connect(self._on_started)
+
+    def uses(self, cont):
+        return cont in self.conts
+
+    def start(self, cont_a, cont_b):
+        self.cancel()
+        self.detach()
+        tw = self.app.tab_widget
+        sources = []
+        for cont, view, name in zip((cont_a, cont_b), self.views, self.names):
+            doc = tw.active_pane(cont).document()
+            view.setDocument(doc)  # a view on the tab's document, not a copy
+            name.setText(tw.tabText(tw.indexOf(cont)))
+            doc.contentsChange.connect(self._on_edit)
+            self.docs.append(doc)
+            sources.append(self._source(cont, doc))
+        self.conts = [cont_a, cont_b]
+        self.compare_id += 1
+        self.state = "Comparing..."
+        self.cancel_btn.setEnabled(True)
+        self._update_summary()
+        threading.Thread(target=self._launch, args=(self.compare_id, sources), daemon=True).start()
+
+    def _source(self, cont, doc):
+        """("path", file) when the buffer is known to equal its file line for line,
+        else ("text", snapshot) to be written to a temp file off the GUI thread."""
+        path = cont.property("filepath")
+        signature = self.app.monitor.tabs.get(cont)
+        long_lines = doc.findChild(LongLines)
+        if (path and signature and not doc.isModified() and not cont.property("disk_changed")
+                and not (long_lines and long_lines.active) and cont.findChild(FileFollower) is None):
+            try:
+                st = os.stat(path)
+                if (st.st_mtime_ns, st.st_size) == signature[:2]:
+                    return ("path", path)
+            except OSError:
+                pass
+        return ("text", doc.toPlainText())  # blocks, so hunk lines are block numbers
+
+    def _launch(self, compare_id, sources):
+        # worker thread: snapshots go to temp files, then the diff gets its own process
+        paths, temp = [], []
+        try:
+            for kind, value in sources:
+                if kind == "text":
+                    value = write_snapshot(value)
+                    temp.append(value)
+                paths.append(value)
+            process, out = start_process(textdiff.compare_files, paths[0], paths[1])
+            self._started.emit(compare_id, (process, out, temp))
+        except Exception as e:
+            remove_files(temp)
+            self._started.emit(compare_id, e)
+
+    def _on_started(self, compare_id, result):
+        if isinstance(result, Exception):
+            if compare_id == self.compare_id:
+                self._finish(f"Compare failed: {result}")
+            return
+        process, out, temp = result
+        if compare_id != self.compare_id:
+            process.terminate()  # cancelled while starting
+            remove_files(temp)
+            return
+        self.process, self.queue, self.temp = process, out, temp
+        self.timer.start()
+
+    def _poll(self):
+        deadline = time.perf_counter() + LOAD_SLICE_MS / 1000
+        added = False
+        while time.perf_counter() < deadline:
+            try:
+                msg = self.queue.get_nowait()
+            except queue.Empty:
+                if self.process.exitcode is not None:
+                    self._finish("Compare stopped unexpectedly")
+                break
+            if msg[0] == "hunks":
+                self._add(msg[1])
+                self.percent = msg[2]
+                added = True
+            elif msg[0] == "done":
+                self._finish("Done")
+                break
+            elif msg[0] == "error":
+                self._finish(f"Compare failed: {msg[1]}")
+                break
+        if added:
+            for view in self.views:
+                self.highlight(view)
+        self._update_summary()
+
+    def _add(self, hunks):
+        for a1, a2, b1, b2 in hunks:
+            self.a_starts.append(a1)
+            self.a_ends.append(a2)
+            self.b_starts.append(b1)
+            self.b_ends.append(b2)
+        self.hunks.extend(hunks)
+
+    def _finish(self, state):
+        self.timer.stop()
+        self.state = state
+        self.cancel_btn.setEnabled(False)
+        if self.process is not None:
+            self.process.join(0)
+        self.process = self.queue = None
+        remove_files(self.temp)
+        self.temp = []
+        self._update_summary()
+
+    def _on_edit(self, position, removed, added):
+        if not self.stale:
+            self.stale = True
+            self._update_summary()
+
+    def _update_summary(self):
+        n = len(self.hunks)
+        state = f"Comparing... {self.percent}%" if self.process is not None else self.state
+        where = f"hunk {self.current + 1} of {n}" if self.current >= 0 else f"{n} hunks"
+        if self.state == "Done" and self.process is None and not n:
+            where = "no differences"
+        edited = " (edited since; compare again to refresh)" if self.stale else ""
+        self.summary.setText(f"{state}: {where}{edited}")
+
+    # --- navigation and painting ---
+    def next(self, backwards=False):
+        if not self.hunks:
+            return
+        if backwards:
+            i = (self.current - 1) % len(self.hunks) if self.current >= 0 else len(self.hunks) - 1
+        else:
+            i = (self.current + 1) % len(self.hunks)
+        self.current = i
+        a1, _, b1, _ = self.hunks[i]
+        for view, line in zip(self.views, (a1, b1)):
+            doc = view.document()
+            block = doc.findBlockByNumber(line)
+            view.setTextCursor(QTextCursor(block if block.isValid() else doc.lastBlock()))
+            view.centerCursor()
+        for view in self.views:
+            self.highlight(view)
+        self._update_summary()
+
+    def highlight(self, view):
+        """Paint the hunk lines inside the viewport of one side."""
+        side = self.views.index(view)
+        doc = view.document()
+        if doc is self.blank[side]:
+            return
+        starts, ends = (self.a_starts, self.a_ends) if side == 0 else (self.b_starts, self.b_ends)
+        first = view.firstVisibleBlock().blockNumber()
+        last = view.cursorForPosition(QPoint(0, view.viewport().height())).blockNumber()
+        fmt, current_fmt = self.formats[side]
+        sels = []
+        for i in range(bisect_right(ends, first), bisect_right(starts, last)):
+            block = doc.findBlockByNumber(max(starts[i], first))
+            for _ in range(max(starts[i], first), min(ends[i], last + 1)):
+                if not block.isValid():
+                    break
+                sel = QTextEdit.ExtraSelection()
+                sel.cursor = QTextCursor(block)
+                sel.format = current_fmt if i == self.current else fmt
+                sels.append(sel)
+                block = block.next()
+        view.setExtraSelections(sels)
+
+    # --- stopping ---
+    def cancel(self):
+        self.compare_id += 1  # a compare still starting is dropped when it reports in
+        if self.process is not None:
+            self.process.terminate()
+        if self.cancel_btn.isEnabled():
+            self._finish("Cancelled")
+
+    def detach(self):
+        """Stop showing the compared documents and forget the result."""
+        for doc in self.docs:
+            try:
+                doc.contentsChange.disconnect(self._on_edit)
+            except (RuntimeError, TypeError):
+                pass
+        for view, blank, name in zip(self.views, self.blank, self.names):
+            view.setExtraSelections([])
+            view.setDocument(blank)
+            name.setText("")
+        self.conts, self.docs = [], []
+        self.hunks = []
+        self.a_starts, self.a_ends, self.b_starts, self.b_ends = [], [], [], []
+        self.current = -1
+        self.percent = 0
+        self.stale = False
+
+    def release(self, cont):
+        """`cont` is closing: let go of its document."""
+        if self.uses(cont):
+            self.cancel()
+            self.detach()
+            self.state = "Closed"
+            self._update_summary()
+
+# ---------- Session & recovery ----------
+class SessionStore(QObject):
+    """Persists the tab list and an append-only journal of unsaved edits.
+
+    session.json is small and rewritten every few seconds. journal.log receives one
+    JSON line per contentsChange; a "reset" line means the buffer equals its file on
+    disk and a "text" line carries a whole buffer. Past JOURNAL_COMPACT_BYTES the
+    journal is rewritten as one snapshot per dirty tab. Writes and fsyncs run on one
+    writer thread, in order, so the GUI never waits for the disk.
+    """
+    _flushed = Signal(object, int)  # records that failed to be written (or None), journal size
+    _compacted = Signal()
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.folder = SESSION_FOLDER
+        self.journal_path = os.path.join(self.folder, "journal.log")
+        self.session_path = os.path.join(self.folder, "session.json")
+        self.buffer = []
+        self.replaying = False
+        self.writing = False
+        self.compacting = False
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        self.recovered = {}  # tab id -> {"path", "text", "edits", ...} awaiting materialize
+        self.last_session = None
+        self._flushed.connect(self._on_flushed)
+        self._compacted.connect(self._on_compacted)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(JOURNAL_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
+        self.session_timer = QTimer(self)
+        self.session_timer.setInterval(SESSION_SAVE_MS)
+        self.session_timer.timeout.connect(self.save_session)
+        self.session_timer.start()
+        app.aboutToQuit.connect(self.shutdown)
+
+    # --- recording ---
+    def append(self, record):
+        self.buffer.append(json.dumps(record, ensure_ascii=False))
+
+    def watch(self, cont, editor):
+        doc = editor.document()
+        doc.contentsChange.connect(lambda pos, removed, added: self._on_change(cont, doc, pos, removed, added))
+
+    def _on_change(self, cont, doc, pos, removed, added):
+        loader = cont.findChild(ChunkedFileLoader)
+        if self.replaying or (loader and loader.appending) or cont.findChild(FileFollower):
+            return  # loads are not edits; the file itself is the base
+        end = min(pos + added, doc.characterCount() - 1)
+        text = ""
+        if end > pos:
+            c = QTextCursor(doc)
+            c.setPosition(pos)
+            c.setPosition(end, QTextCursor.KeepAnchor)
+            text = c.selectedText().replace("\u2029", "\n")
+        self.append({"tab": cont.property("tab_id"), "op": "edit", "pos": pos, "del": removed, "ins": text})
+
+    def file_synced(self, cont):
+        """The buffer now equals its file on disk."""
+        path = cont.property("filepath")
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            return
+        self.append({"tab": cont.property("tab_id"), "op": "reset", "path": path,
+                     "mtime": st.st_mtime, "size": st.st_size})
+
+    def snapshot(self, cont, editor):
+        self.append({"tab": cont.property("tab_id"), "op": "text", "path": cont.property("filepath"),
+                     "text": document_text(editor.document())})
+
+    def tab_closed(self, cont):
+        self.recovered.pop(cont.property("tab_id"), None)
+        self.append({"tab": cont.property("tab_id"), "op": "close"})
+
+    def flush(self):
+        """Hand the buffered records to the writer; one batch is in flight at a time."""
+        if not self.buffer or self.writing:
+            return
+        lines, self.buffer = self.buffer, []
+        self.writing = True
+        self.writer.submit(self._write, lines)
+
+    def _write(self, lines):
+        # writer thread
+        try:
+            self._append_lines(lines)
+            self._flushed.emit(None, os.path.getsize(self.journal_path))
+        except OSError:
+            self._flushed.emit(lines, 0)
+
+    def _append_lines(self, lines):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _on_flushed(self, failed, size):
+        self.writing = False
+        if failed is not None:
+            self.buffer[:0] = failed  # retried on the next tick, still in order
+        elif size > JOURNAL_COMPACT_BYTES and not self.compacting:
+            self.compact()
+
+    # --- compaction ---
+    def compact(self):
+        # a snapshot of the tabs supersedes everything recorded so far, written or not
+        self.compacting = True
+        lines = []
+        tw = self.app.tab_widget
+        for i in range(tw.count() - 1):
+            cont = tw.widget(i)
+            tab_id = cont.property("tab_id")
+            ed = tw.get_editor(i)
+            if tab_id in self.recovered:
+                lines.extend(self._recovered_records(tab_id, self.recovered[tab_id]))
+            elif ed and ed.document().isModified():
+                lines.append({"tab": tab_id, "op": "text", "path": cont.property("filepath"),
+                              "text": document_text(ed.document())})
+        lines = [json.dumps(r, ensure_ascii=False) for r in lines]
+        self.buffer = []
+        self.writer.submit(self._write_compacted, lines)
+
+    def _write_compacted(self, lines):
+        try:
+            atomic_write(self.journal_path, "".join(line + "\n" for line in lines))
+        except OSError:
+            pass
+        self._compacted.emit()
+
+    def _on_compacted(self):
+        self.compacting = False
+        self.flush()
+
+    def _recovered_records(self, tab_id, rec):
+        if rec["text"] is not None or not rec["path"]:
+            yield {"tab": tab_id, "op": "text", "path": rec["path"], "text": rec["text"] or ""}
+        else:
+            yield {"tab": tab_id, "op": "reset", "path": rec["path"], "mtime": rec["mtime"], "size": rec["size"]}
+        for e in rec["edits"]:
+            yield dict(e, tab=tab_id)
+
+    # --- session file ---
+    def session_state(self):
+        tw = self.app.tab_widget
+        tabs = []
+        for i in range(tw.count() - 1):
+            cont = tw.widget(i)
+            ed = tw.get_editor(i)
+            entry = {"id": cont.property("tab_id"), "path": cont.property("filepath"), "title": tw.tabText(i)}
+            if ed:
+                entry["cursor"] = ed.textCursor().position()
+                entry["scroll"] = ed.verticalScrollBar().value()
+            elif cont.property("cursor_pos") is not None:
+                entry["cursor"] = cont.property("cursor_pos")
+                entry["scroll"] = cont.property("scroll_pos") or 0
+            tabs.append(entry)
+        return {"current": tw.currentIndex(), "tabs": tabs}
+
+    def save_session(self):
+        text = json.dumps(self.session_state(), indent=1)
+        if text == self.last_session:
+            return
+        self.last_session = text
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            self.app.saver.pool.submit(atomic_write, self.session_path, text)
+        except (OSError, RuntimeError):
+            pass
+
+    def shutdown(self):
+        self.flush_timer.stop()
+        self.writer.shutdown(wait=True)  # batches in flight land first
+        if self.buffer:
+            try:
+                self._append_lines(self.buffer)
+            except OSError:
+                pass
+        text = json.dumps(self.session_state(), indent=1)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            atomic_write(self.session_path, text)
+        except OSError:
+            pass
+
+    # --- restore ---
+    def read_journal(self):
+        """Fold the journal into {tab id: state} for tabs with unsaved changes."""
+        states = {}
+        try:
+            fh = open(self.journal_path, "r", encoding="utf-8")
+        except OSError:
+            return states
+        with fh:
+            for line in fh:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                tab, op = r.get("tab"), r.get("op")
+                if op == "close":
+                    states.pop(tab, None)
+                elif op == "reset":
+                    states[tab] = {"path": r["path"], "mtime": r["mtime"], "size": r["size"],
+                                   "text": None, "edits": []}
+                elif op == "text":
+                    states[tab] = {"path": r["path"], "mtime": None, "size": None,
+                                   "text": r["text"], "edits": []}
+                elif op == "edit":
+                    state = states.setdefault(tab, {"path": None, "mtime": None, "size": None,
+                                                    "text": "", "edits": []})
+                    state["edits"].append({"op": "edit", "pos": r["pos"], "del": r["del"], "ins": r["ins"]})
+        return {t: s for t, s in states.items() if s["edits"] or s["text"] is not None}
+
+    def restore(self):
+        """Recreate last run's tabs as placeholders; False when there is nothing to restore."""
+        try:
+            with open(self.session_path, "r", encoding="utf-8") as fh:
+                session = json.load(fh)
+        except (OSError, ValueError):
+            session = {"current": 0, "tabs": []}
+        dirty = self.read_journal()
+        tw = self.app.tab_widget
+        lost = []
+        seen = set()
+        entries = session.get("tabs", [])
+        # tabs that only the journal knows about (crash before session.json was written)
+        entries += [{"id": t, "path": s["path"], "title": None} for t, s in dirty.items()
+                    if t not in {e.get("id") for e in entries}]
+        for entry in entries:
+            tab_id, path = entry.get("id"), entry.get("path")
+            rec = dirty.get(tab_id)
+            if rec and rec["text"] is None:
+                try:
+                    st = os.stat(rec["path"])
+                    unchanged = (st.st_mtime, st.st_size) == (rec["mtime"], rec["size"])
+                except OSError:
+                    unchanged = False
+                if not unchanged:
+                    lost.append(os.path.basename(rec["path"]))
+                    rec = None
+            if not rec and not (path and os.path.isfile(path)):
+                continue
+            title = entry.get("title") or (os.path.basename(path) if path else "Untitled")
+            idx = tw.insert_lazy_tab(path, title, tab_id)
+            cont = tw.widget(idx)
+            seen.add(tab_id)
+            if entry.get("cursor") is not None:
+                cont.setProperty("cursor_pos", entry["cursor"])
+                cont.setProperty("scroll_pos", entry.get("scroll", 0))
+            if rec:
+                self.recovered[tab_id] = rec
+        # start the new journal from what was actually restored
+        self.buffer = [json.dumps(r, ensure_ascii=False) for t, rec in self.recovered.items()
+                       for r in self._recovered_records(t, rec)]
+        try:
+            os.replace(self.journal_path, self.journal_path + ".old")
+        except OSError:
+            pass
+        self.flush()
+        if lost:
+            QMessageBox.warning(self.app.window, "Recovery",
+                                "These files changed on disk, so their unsaved edits could not be replayed:\n"
+                                + "\n".join(lost))
+        if not seen:
+            return False
+        current = min(max(0, session.get("current", 0)), tw.count() - 2)
+        tw.setCurrentIndex(current)
+        tw.materialize(current)
+        return True
+
+    def has_recovered(self, cont):
+        return cont.property("tab_id") in self.recovered
+
+    def take_recovered(self, cont):
+        return self.recovered.pop(cont.property("tab_id"), None)
+
+    def replay(self, cont, editor, rec):
+        """Apply a recovered journal state to a freshly created or loaded editor."""
+        doc = editor.document()
+        self.replaying = True
+        try:
+            if rec["text"] is not None:
+                set_document_text(editor, rec["text"])
+            c = QTextCursor(doc)
+            c.beginEditBlock()
+            for e in rec["edits"]:
+                last = doc.characterCount() - 1
+                c.setPosition(min(e["pos"], last))
+                c.setPosition(min(e["pos"] + e["del"], last), QTextCursor.KeepAnchor)
+                c.insertText(e["ins"])
+            c.endEditBlock()
+        finally:
+            self.replaying = False
+        # restore() already re-journaled this state, so new edits simply follow it
+        doc.setModified(True)
+        pos = cont.property("cursor_pos")
+        if pos is not None:
+            c = editor.textCursor()
+            c.setPosition(min(pos, doc.characterCount() - 1))
+            editor.setTextCursor(c)
+            cont.setProperty("cursor_pos", None)
+
+# ---------- Syntax highlighting ----------
+class SyntaxHighlighter(QObject):
+    """Incremental, viewport-first highlighter driven by the tokenizers in syntax.py.
+
+    Each block's userState packs the state it was highlighted from and the state it
+    ended in (in * STATE_SPAN + out; -1 = never highlighted). An edit re-highlights
+    from the changed block until a block's input state matches again; unseen blocks
+    are done in short idle slices, visible ones first (provisionally, then verified
+    when the sequential pass reaches them).
+    """
+    STATE_SPAN = 256
+
+    def __init__(self, editor):
+        super().__init__(editor.document())
+        self.views = []
+        self.doc = editor.document()
+        self.language = None
+        self.blocks = self.doc.blockCount()
+        self.dirty_from = None  # first block of the sequential pass, None when settled
+        self.max_dirty = -1     # last block known to need a (re)check
+        self.formats = {}
+        for style, (color, bold) in HIGHLIGHT_STYLES.items():
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            if bold:
+                fmt.setFontWeight(QFont.Bold)
+            self.formats[style] = fmt
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(lambda: self.run(HIGHLIGHT_SLICE_MS))
+        self.doc.contentsChange.connect(self._on_change)
+        self.add_view(editor)
+
+    def add_view(self, editor):
+        """Another pane showing this document; its viewport is also highlighted first."""
+        self.views.append(editor)
+        editor.verticalScrollBar().valueChanged.connect(lambda: self.highlight_visible(editor))
+        editor.destroyed.connect(lambda: self.views.remove(editor) if editor in self.views else None)
+
+    def set_language(self, language):
+        if language is self.language:
+            return
+        self.language = language
+        block = self.doc.firstBlock()
+        while block.isValid():
+            block.setUserState(-1)
+            if language is None:
+                self._apply(block, [])
+            block = block.next()
+        self.blocks = self.doc.blockCount()
+        if language is not None:
+            self._mark(0, self.blocks - 1)
+            self.highlight_visible()
+
+    def _mark(self, first, last):
+        self.dirty_from = first if self.dirty_from is None else min(self.dirty_from, first)
+        self.max_dirty = max(self.max_dirty, last)
+        self.timer.start()
+
+    def _on_change(self, position, removed, added):
+        if self.language is None:
+            self.blocks = self.doc.blockCount()
+            return
+        doc = self.doc
+        first = doc.findBlock(position)
+        last = doc.findBlock(position + added)
+        if not first.isValid():
+            first = doc.lastBlock()
+        if not last.isValid():
+            last = doc.lastBlock()
+        delta = doc.blockCount() - self.blocks
+        self.blocks = doc.blockCount()
+        n = first.blockNumber()
+        if self.max_dirty >= n:
+            self.max_dirty = max(n, self.max_dirty + delta)
+        if self.dirty_from is not None and self.dirty_from > n:
+            self.dirty_from = max(n, self.dirty_from + delta)
+        block = first
+        while block.isValid():
+            block.setUserState(-1)
+            if block == last:
+                break
+            block = block.next()
+        self._mark(n, last.blockNumber())
+        # the edited block itself is redone now so typing never shows plain text
+        self.run(HIGHLIGHT_EDIT_MS)
+
+    def _out_state(self, block):
+        us = block.userState() if block.isValid() else -1
+        return 0 if us < 0 else us % self.STATE_SPAN
+
+    def _highlight(self, block, state):
+        text = block.text()
+        spans, out = self.language.highlight(text, state)
+        if spans and not text.isascii():
+            pos = textsearch.Utf16Map(text)
+            spans = [(pos.to_utf16(a), pos.to_utf16(a + n) - pos.to_utf16(a), st) for a, n, st in spans]
+        self._apply(block, spans)
+        block.setUserState(state * self.STATE_SPAN + out)
+        return out
+
+    def _apply(self, block, spans):
+        ranges = []
+        for start, length, style in spans:
+            r = QTextLayout.FormatRange()
+            r.start = start
+            r.length = length
+            r.format = self.formats[style]
+            ranges.append(r)
+        layout = block.layout()
+        if not ranges and not layout.formats():
+            return
+        layout.setFormats(ranges)
+        self.doc.markContentsDirty(block.position(), block.length())
+
+    def run(self, budget_ms):
+        """Advance the sequential pass for about `budget_ms`."""
+        if self.language is None or self.dirty_from is None:
+            self.timer.stop()
+            return
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        n = self.dirty_from
+        block = self.doc.findBlockByNumber(n)
+        state = self._out_state(block.previous())
+        while block.isValid():
+            us = block.userState()
+            if us >= 0 and us // self.STATE_SPAN == state:
+                if n > self.max_dirty:
+                    break  # settled: everything after is still valid
+                state = us % self.STATE_SPAN
+            else:
+                state = self._highlight(block, state)
+            block = block.next()
+            n += 1
+            if time.perf_counter() > deadline and block.isValid():
+                self.dirty_from = n
+                self.timer.start()
+                return
+        self.dirty_from = None
+        self.max_dirty = -1
+        self.timer.stop()
+
+    def highlight_visible(self, ed=None):
+        """Highlight unseen blocks in the viewport now, from the best state known."""
+        if self.language is None or self.dirty_from is None:
+            return
+        if ed is None:
+            for view in self.views:
+                self.highlight_visible(view)
+            return
+        block = ed.firstVisibleBlock()
+        state = self._out_state(block.previous())
+        rows = ed.viewport().height() // max(1, ed.fontMetrics().height()) + 2
+        for _ in range(rows):
+            if not block.isValid():
+                break
+            us = block.userState()
+            state = self._highlight(block, state) if us < 0 else us % self.STATE_SPAN
+            block = block.next()
+
+# ---------- External changes ----------
+def file_hasher():
+    return hashlib.blake2b(digest_size=16)
+
+def file_signature(path, decode=False):
+    """Stream `path` once: ((mtime_ns, size, digest), text or None)."""
+    digest = file_hasher()
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    parts = []
+    with open(path, "rb") as fh:
+        st = os.fstat(fh.fileno())
+        while True:
+            raw = fh.read(LOAD_CHUNK_SIZE)
+            digest.update(raw)
+            if decode:
+                parts.append(decoder.decode(raw, final=not raw))
+            if not raw:
+                break
+        size = fh.tell()
+    return (st.st_mtime_ns, size, digest.hexdigest()), "".join(parts) if decode else None
+
+class FileMonitor(QObject):
+    """Notices when files open in editor tabs change on disk.
+
+    Idle cost is one QFileSystemWatcher entry per file (plus a stat per tab when the
+    app is re-activated). A change whose mtime/size differ is hashed in a worker; a
+    real content change is diffed there against the buffer and applied as one edit
+    block touching only the differing lines, so cursor, scroll and undo survive.
+    Modified buffers get a prompt instead (deferred until their tab is shown).
+    """
+    _hashed = Signal(object, object, object)       # tab container, signature, new text or error
+    _diffed = Signal(object, object, object, int)  # tab container, signature, edits, revision
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.tabs = {}  # tab container -> signature of the file the buffer was last synced with
+        self.checking = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.path_changed)
+        self._hashed.connect(self._on_hashed)
+        self._diffed.connect(self._on_diffed)
+        app.applicationStateChanged.connect(self._on_app_state)
+
+    def synced(self, cont, signature):
+        """The buffer of `cont` now equals the file described by `signature`."""
+        path = cont.property("filepath")
+        if not path or signature is None:
+            return
+        self.tabs[cont] = signature
+        cont.setProperty("disk_changed", False)
+        if path not in self.watcher.files():
+            self.watcher.addPath(path)
+
+    def forget(self, cont):
+        self.tabs.pop(cont, None)
+        path = cont.property("filepath")
+        if path and not any(c.property("filepath") == path for c in self.tabs):
+            self.watcher.removePath(path)
+
+    def path_changed(self, path):
+        for cont in list(self.tabs):
+            if cont.property("filepath") == path:
+                self.check(cont)
+        if path not in self.watcher.files() and os.path.exists(path):
+            self.watcher.addPath(path)  # replaced by rename: watch the new file
+
+    def _on_app_state(self, state):
+        if state == Qt.ApplicationActive:
+            for cont in list(self.tabs):
+                self.check(cont)
+
+    def changed_on_disk(self, cont):
+        """Cheap test used before saving: does the file still match the last sync?"""
+        sig = self.tabs.get(cont)
+        path = cont.property("filepath")
+        if sig is None or not path:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) == sig[:2]:
+            return False
+        try:
+            return file_signature(path)[0][2] != sig[2]
+        except OSError:
+            return False
+
+    def check(self, cont):
+        sig = self.tabs.get(cont)
+        path = cont.property("filepath")
+        if sig is None or not path or cont in self.checking:
+            return
+        if cont.findChild(ChunkedFileLoader) or cont.findChild(FileFollower) or self.app.saver.writing(path):
+            return  # the loader, follower or our own save will resync it
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if (st.st_mtime_ns, st.st_size) == sig[:2]:
+            return
+        self.checking.add(cont)
+        threading.Thread(target=self._hash, args=(cont, path), daemon=True).start()
+
+    def _hash(self, cont, path):
+        try:
+            sig, text = file_signature(path, decode=True)
+        except (OSError, UnicodeDecodeError) as e:
+            self._hashed.emit(cont, None, e)
+            return
+        self._hashed.emit(cont, sig, text)
+
+    def _on_hashed(self, cont, sig, text):
+        self.checking.discard(cont)
+        old = self.tabs.get(cont)
+        ed = cont.findChild(QPlainTextEdit)
+        if old is None or ed is None or sig is None:
+            return
+        if sig[2] == old[2]:
+            self.tabs[cont] = sig  # touched, not changed
+            return
+        if ed.document().isModified():
+            cont.setProperty("disk_changed", True)
+            if cont is self.app.tab_widget.currentWidget():
+                self.resolve(cont)
+            return
+        self.reload(cont, ed, sig, text)
+
+    def resolve(self, cont):
+        """Ask what to do about a tab whose file changed under unsaved edits."""
+        if not cont.property("disk_changed"):
+            return
+        cont.setProperty("disk_changed", False)
+        path = cont.property("filepath")
+        choice = QMessageBox.question(
+            self.app.window, "File Changed",
+            f"{os.path.basename(path)} was changed by another program.\n"
+            "Reload it and discard your unsaved changes? (Undo brings them back.)",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if choice != QMessageBox.Yes:
+            return  # keep the buffer; saving will ask before overwriting
+        ed = cont.findChild(QPlainTextEdit)
+        try:
+            sig, text = file_signature(path, decode=True)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self.app.window, "Reload failed", str(e))
+            return
+        self.reload(cont, ed, sig, text)
+
+    def reload(self, cont, ed, sig, text):
+        doc = ed.document()
+        if doc.findChild(LongLines).active:
+            # offsets in the file and in the segmented buffer differ: load it again
+            self.forget(cont)
+            ed.clear()
+            doc.setModified(False)
+            self.app.start_load(cont, ed, cont.property("filepath"))
+            return
+        old = doc.toPlainText()
+        revision = doc.revision()
+        threading.Thread(target=lambda: self._diffed.emit(cont, (sig, text), textdiff.text_edits(old, text), revision),
+                         daemon=True).start()
+
+    def _on_diffed(self, cont, new, edits, revision):
+        sig, text = new
+        ed = cont.findChild(QPlainTextEdit)
+        if ed is None or cont not in self.tabs:
+            return
+        doc = ed.document()
+        if doc.revision() != revision:
+            self.reload(cont, ed, sig, text)  # typed while diffing: diff the new buffer
+            return
+        if edits:
+            pos = textsearch.Utf16Map(doc.toPlainText())
+            hbar, vbar = ed.horizontalScrollBar().value(), ed.verticalScrollBar().value()
+            c = QTextCursor(doc)
+            c.beginEditBlock()
+            for start, end, repl in reversed(edits):
+                c.setPosition(pos.to_utf16(start))
+                c.setPosition(pos.to_utf16(end), QTextCursor.KeepAnchor)
+                c.insertText(repl)
+            c.endEditBlock()
+            ed.horizontalScrollBar().setValue(hbar)
+            ed.verticalScrollBar().setValue(vbar)
+        doc.setModified(False)
+        self.app.session.file_synced(cont)
+        self.synced(cont, sig)
+        self.app.show_status(f"Reloaded {os.path.basename(cont.property('filepath'))} "
+                             f"({len(edits)} changed region{'s' if len(edits) != 1 else ''})")
+        self.app.update_window_title()
+
+# ---------- Background saving ----------
+def atomic_write(path, text, encoding="utf-8", digest=None):
+    """Write `text` next to `path`, fsync it and rename it over `path` in one step.
+    `digest`, a hashlib object, is fed the bytes written."""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)  # same line endings as a text-mode write
+    data = text.encode(encoding)
+    if digest is not None:
+        digest.update(data)
+    path = os.path.realpath(path)  # replace a symlink's target, not the link
+    folder = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+class SaveManager(QObject):
+    """Runs atomic writes in a thread pool; saves of one path are serialized, others overlap."""
+    saved = Signal(object, str, int, object)  # tab container, path, revision written, file signature
+    failed = Signal(object, str, str)  # tab container, path, error
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="save")
+        self._running = {}   # path -> future of the write in flight
+        self._pending = {}   # path -> newest snapshot waiting for that write
+        self._lock = threading.Lock()
+
+    def save(self, cont, path, text, revision):
+        """Queue a snapshot for writing; returns a future resolving to True/False."""
+        job = (cont, path, text, revision)
+        with self._lock:
+            if path in self._running:
+                # only the newest snapshot of a file is worth writing next; a snapshot it
+                # supersedes resolves with the outcome of that newer write
+                old = self._pending.get(path)
+                result = Future()
+                self._pending[path] = (job, (old[1] if old else []) + [result])
+                return result
+            return self._submit(job)
+
+    def _submit(self, job, waiters=()):
+        future = self.pool.submit(self._write, *job)
+        self._running[job[1]] = future
+        if waiters:
+            def resolve(f):
+                for waiter in waiters:
+                    waiter.set_result(f.result())
+            future.add_done_callback(resolve)
+        return future
+
+    def _write(self, cont, path, text, revision):
+        try:
+            digest = file_hasher()
+            size = atomic_write(path, text, digest=digest)
+            signature = (os.stat(path).st_mtime_ns, size, digest.hexdigest())
+        except Exception as e:
+            self.failed.emit(cont, path, str(e))
+            ok = False
+        else:
+            self.saved.emit(cont, path, revision, signature)
+            ok = True
+        with self._lock:
+            del self._running[path]
+            nxt = self._pending.pop(path, None)
+            if nxt:
+                self._submit(*nxt)
+        return ok
+
+    def busy(self):
+        with self._lock:
+            return bool(self._running)
+
+    def writing(self, path):
+        with self._lock:
+            return path in self._running
+
+    def shutdown(self):
+        # wait for queued follow-up writes too
+        while self.busy():
+            time.sleep(0.01)
+        self.pool.shutdown(wait=True)
+
+# ---------- Large file viewer ----------
+class LargeFileView(QAbstractScrollArea):
+    """Read-only view of a memory-mapped file that only ever decodes the visible lines.
+
+    A background thread counts newlines per INDEX_BLOCK bytes; a line's offset is found
+    by bisecting those counts and scanning a single block, so memory stays tiny and any
+    line is reachable without reading the file up to it.
+    """
+    positionChanged = Signal()
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._fh = open(path, "rb")
+        self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.mm)
+        # counts[i] = number of newlines before block i
+        self.counts = [0]
+        self.indexed = False
+        self.current_line = 0
+        self.match = None  # (offset, length) of the last find hit
+        self.pending_line = None  # go_to_line request waiting for the index
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._build_index, daemon=True)
+        self._timer = QTimer(self)
+        self._timer.setInterval(100)
+        self._timer.timeout.connect(self._index_progress)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def start_indexing(self):
+        self._thread.start()
+        self._timer.start()
+
+    def close_file(self):
+        self._stop.set()
+        self._timer.stop()
+        self._thread.join()
+        self.mm.close()
+        self._fh.close()
+
+    def _build_index(self):
+        mm = self.mm
+        pos = 0
+        total = 0
+        while pos < self.size and not self._stop.is_set():
+            total += mm[pos:pos + INDEX_BLOCK].count(b"\n")
+            pos += INDEX_BLOCK
+            self.counts.append(total)
+        self.indexed = not self._stop.is_set()
+
+    def _index_progress(self):
+        if self.indexed:
+            self._timer.stop()
+        if self.pending_line is not None and self.go_to_line(self.pending_line):
+            self.pending_line = None
+        self.update_scrollbars()
+        self.positionChanged.emit()
+
+    def indexed_percent(self):
+        if self.indexed or not self.size:
+            return 100
+        return min(99, (len(self.counts) - 1) * INDEX_BLOCK * 100 // self.size)
+
+    def line_count(self):
+        """Lines known so far; exact once indexing has finished."""
+        return self.counts[-1] + 1
+
+    def line_offset(self, line):
+        """Byte offset where `line` (0-based) starts, or None if not indexed yet."""
+        if line <= 0:
+            return 0
+        counts = self.counts
+        if line > counts[-1]:
+            return None
+        block = bisect_left(counts, line) - 1
+        pos = block * INDEX_BLOCK
+        for _ in range(line - counts[block]):
+            pos = self.mm.find(b"\n", pos) + 1
+        return pos
+
+    def offset_line(self, offset):
+        """Line number containing byte `offset`, or None if not indexed yet."""
+        block = offset // INDEX_BLOCK
+        if block >= len(self.counts):
+            return None
+        return self.counts[block] + self.mm[block * INDEX_BLOCK:offset].count(b"\n")
+
+    # --- navigation ---
+    def go_to_line(self, line):
+        """Show `line` (0-based) at the top of the view; False if it is not indexed yet."""
+        if line < 0 or line >= self.line_count():
+            return False
+        self.current_line = line
+        self.update_scrollbars()
+        self.verticalScrollBar().setValue(max(0, line - self.visible_rows() // 3))
+        self.viewport().update()
+        self.positionChanged.emit()
+        return True
+
+    def find(self, text, from_start=False):
+        """Case-sensitive byte search from after the last hit, wrapping once."""
+        needle = text.encode("utf-8")
+        if not needle:
+            return False
+        if from_start or self.match is None:
+            start = self.line_offset(self.current_line) or 0
+        else:
+            start = self.match[0] + 1
+        hit = self.mm.find(needle, start)
+        if hit < 0 and start:
+            hit = self.mm.find(needle, 0, start + len(needle))
+        if hit < 0:
+            return False
+        line = self.offset_line(hit)
+        if line is None:
+            return False
+        self.match = (hit, len(needle))
+        return self.go_to_line(line)
+
+    # --- painting ---
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def update_scrollbars(self):
+        rows = self.visible_rows()
+        vbar = self.verticalScrollBar()
+        vbar.setPageStep(rows)
+        vbar.setRange(0, max(0, self.line_count() - rows))
+        hbar = self.horizontalScrollBar()
+        hbar.setPageStep(self.viewport().width())
+        hbar.setRange(0, self.fontMetrics().horizontalAdvance("M") * VIEW_MAX_LINE)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self.update_scrollbars()
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        vbar = self.verticalScrollBar()
+        if event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            vbar.setValue(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            vbar.setValue(vbar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        p = QPainter(self.viewport())
+        pal = self.palette()
+        p.fillRect(event.rect(), pal.base())
+        fm = self.fontMetrics()
+        lh = fm.height()
+        x = 4 - self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        start = self.line_offset(first)
+        for row in range(self.visible_rows() + 1):
+            if start is None or start > self.size:
+                break
+            line = first + row
+            cap = min(self.size, start + VIEW_MAX_LINE * 4)
+            end = self.mm.find(b"\n", start, cap)
+            truncated = end < 0
+            if truncated:
+                end = cap
+            y = row * lh
+            if line == self.current_line:
+                p.fillRect(0, y, self.viewport().width(), lh, pal.alternateBase())
+            text = self.mm[start:end].decode("utf-8", errors="replace")[:VIEW_MAX_LINE].rstrip("\r").expandtabs(4)
+            if self.match and start <= self.match[0] < end:
+                hit, length = self.match
+                col = len(self.mm[start:hit].decode("utf-8", errors="replace").expandtabs(4))
+                width = fm.horizontalAdvance(self.mm[hit:hit + length].decode("utf-8", errors="replace"))
+                p.fillRect(x + fm.horizontalAdvance(text[:col]), y, width, lh, pal.highlight())
+            p.setPen(pal.text().color())
+            p.drawText(x, y + fm.ascent(), text)
+            # an over-long line is cut off, so jump to the next one through the index
+            start = self.line_offset(line + 1) if truncated else end + 1
+        p.end()
+
+# ---------- Themes ----------
+class ThemeRegistry:
+    """Theme names and .qss stylesheets, each read from disk only once."""
+    DEFAULTS = ("one_dark_two", "monokai", "nord", "catppuccin_latte", "catppuccin_frappe", "catppuccin_macchiato",
+                "catppuccin_mocha", "atom_one", "github_dark", "github_light", "dracula")
+
+    def __init__(self):
+        self.sheets = {}     # .qss file name -> stylesheet text
+        self._names = None
+        self.sheet_active = False
+
+    def qss_files(self):
+        folder = resource_path(THEMES_FOLDER)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f for f in os.listdir(folder) if f.lower().endswith(".qss"))
+
+    def names(self):
+        if self._names is None:
+            try:
+                import qt_themes
+                names = list(qt_themes.list_themes())
+            except Exception:
+                names = []
+            names += [d for d in self.DEFAULTS if d not in names]
+            names += [f for f in self.qss_files() if f not in names]
+            self._names = names
+        return self._names
+
+    def sheet(self, name):
+        """Stylesheet text of a local theme, or None if `name` is not a .qss file."""
+        if name not in self.sheets:
+            path = resource_path(os.path.join(THEMES_FOLDER, name))
+            if not os.path.isfile(path):
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    self.sheets[name] = fh.read()
+            except Exception:
+                return None
+        return self.sheets[name]
+
+    def preload(self):
+        """Read every local stylesheet (and the theme list) in a background thread."""
+        def run():
+            for f in self.qss_files():
+                self.sheet(f)
+            self.names()
+        threading.Thread(target=run, daemon=True).start()
+
+    def apply(self, app, name):
+        # setStyleSheet replaces the previous sheet itself; clearing it first would
+        # cost a second repolish of every widget
+        sheet = self.sheet(name)
+        if sheet is not None:
+            app.setStyleSheet(sheet)
+            self.sheet_active = True
+            return
+        # fallback to qt_themes (imported on demand: it is slow to load)
+        try:
+            import qt_themes  # pip install qt-themes
+            qt_themes.set_theme(name)
+        except Exception:
+            pass
+        if self.sheet_active:
+            app.setStyleSheet("")
+            self.sheet_active = False
+
+# ---------- Dialog helpers with .ui fallback ----------
+class DialogLoader:
+    """Small helper: tries to load a .ui; falls back to programmatic dialog.
+    Dialogs are built once and handed out again on later calls."""
+    def __init__(self, parent, loader=None):
+        self.parent = parent
+        self.loader = loader  # QUiLoader, created on first use
+        self.cache = {}
+
+    def load_ui(self, name, base, parent=None):
+        """Build `name`.ui from the ui_<name> module compile.py generates, else parse
+        the .ui at runtime; None when neither is available."""
+        try:
+            module = importlib.import_module("ui_" + name)
+        except ImportError:
+            module = None
+        if module is not None:
+            ui_class = next(v for k, v in vars(module).items() if k.startswith("Ui_"))
+            widget = base(parent)
+            ui_class().setupUi(widget)
+            return widget
+        ui_path = resource_path(name + ".ui")
+        if os.path.exists(ui_path):
+            f = QFile(ui_path)
+            if f.open(QFile.ReadOnly):
+                if self.loader is None:
+                    from PySide6.QtUiTools import QUiLoader
+                    self.loader = QUiLoader()
+                widget = self.loader.load(f, parent)
+                f.close()
+                return widget
+        return None
+
+    def load_settings_dialog(self, current_theme):
+        if "settings" not in self.cache:
+            self.cache["settings"] = self._build_settings_dialog()
+        return self.cache["settings"]
+
+    def _build_settings_dialog(self):
+        dlg = self.load_ui("settings", QDialog, self.parent)
+        if dlg is not None:
+            # Expect combo named TcomboBox, but fallback to any QComboBox in dialog
+            combo = dlg.findChild(QComboBox, "TcomboBox") or dlg.findChild(QComboBox)
+            return dlg, combo
+
+        # Fallback: build a simple dialog
+        dlg = QDialog(self.parent)
+        dlg.setWindowTitle("Themes")
+        combo = QComboBox(dlg)
+        box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, parent=dlg)
+        h = QHBoxLayout()
+        h.addWidget(QLabel("Themes"))
+        h.addWidget(combo)
+        v = QVBoxLayout(dlg)
+        v.addLayout(h)
+        v.addWidget(box)
+        box.accepted.connect(dlg.accept)
+        box.rejected.connect(dlg.reject)
+        return dlg, combo
+
+    def load_replace_dialog(self):
+        """Returns (dialog, find edit, with edit, options) where options maps
+        regex/case/word to checkboxes and scope to the scope combo."""
+        if "replace" not in self.cache:
+            self.cache["replace"] = self._build_replace_dialog()
+        return self.cache["replace"]
+
+    def _build_replace_dialog(self):
+        dlg = self.load_ui("replace", QDialog, self.parent)
+        if dlg is not None:
+            find_edit = dlg.findChild(QLineEdit, "ReplacelineEdit")
+            with_edit = dlg.findChild(QLineEdit, "WithlineEdit")
+            options = {
+                "regex": dlg.findChild(QCheckBox, "RegexcheckBox"),
+                "case": dlg.findChild(QCheckBox, "CasecheckBox"),
+                "word": dlg.findChild(QCheckBox, "WordcheckBox"),
+                "scope": dlg.findChild(QComboBox, "ScopecomboBox"),
+            }
+            return dlg, find_edit, with_edit, options
+
+        # Fallback replace dialog
+        dlg = QDialog(self.parent)
+        dlg.setWindowTitle("Replace")
+        find_edit = QLineEdit()
+        with_edit = QLineEdit()
+        box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        form = QHBoxLayout()
+        form.addWidget(QLabel("Find:"))
+        form.addWidget(find_edit)
+        form.addWidget(QLabel("With:"))
+        form.addWidget(with_edit)
+        options = {
+            "regex": QCheckBox("Regex"),
+            "case": QCheckBox("Match case"),
+            "word": QCheckBox("Whole word"),
+            "scope": QComboBox(),
+        }
+        options["case"].setChecked(True)
+        options["scope"].addItems(["Current tab", "Selection", "All tabs"])
+        opts = QHBoxLayout()
+        for key in ("regex", "case", "word", "scope"):
+            opts.addWidget(options[key])
+        v = QVBoxLayout(dlg)
+        v.addLayout(form)
+        v.addLayout(opts)
+        v.addWidget(box)
+        box.accepted.connect(dlg.accept)
+        box.rejected.connect(dlg.reject)
+        return dlg, find_edit, with_edit, options
+
+# ---------- Single instance ----------
+class InstanceServer(QObject):
+    """Accepts file lists from later launches (see launch.forward) and opens them."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        from PySide6.QtNetwork import QLocalServer  # only needed in single-instance mode
+        self.app = app
+        self.buffers = {}
+        self.server = QLocalServer(self)
+        try:
+            name, _ = launch.server_address()
+        except OSError:
+            return  # nowhere private for the socket: this instance just doesn't listen
+        if not self.server.listen(name):
+            # a crashed instance can leave its socket file behind
+            QLocalServer.removeServer(name)
+            self.server.listen(name)
+        self.server.newConnection.connect(self._on_connection)
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self.buffers[sock] = b""
+            sock.readyRead.connect(lambda s=sock: self._on_ready(s))
+            sock.disconnected.connect(lambda s=sock: self._drop(s))
+
+    def _drop(self, sock):
+        self.buffers.pop(sock, None)
+        sock.deleteLater()
+
+    def _on_ready(self, sock):
+        data = self.buffers.get(sock, b"") + bytes(sock.readAll())
+        self.buffers[sock] = data
+        if len(data) < 4:
+            return
+        size = int.from_bytes(data[:4], "big")
+        if len(data) < 4 + size:
+            return
+        try:
+            files = launch.decode_request(data[4:4 + size])
+        except (ValueError, KeyError, TypeError):
+            files = None
+        sock.write(b"ok" if files is not None else b"no")
+        sock.flush()
+        sock.disconnectFromServer()
+        if files is not None:
+            # answer first: the other process is waiting to exit
+            QTimer.singleShot(0, lambda: self.app.open_forwarded(files))
+
+# ---------- Instrumentation ----------
+class Instrumentation(QObject):
+    """Times wrapped slots and watches the GUI thread for stalls; only built when enabled.
+
+    Durations go into per-name log2 histograms and a bounded list of trace spans.
+    A watchdog thread compares a GUI heartbeat against STALL_MS and grabs the GUI
+    thread's Python stack while the stall is still in progress.
+    """
+
+    def __init__(self, app, stall_ms=STALL_MS):
+        super().__init__(app)
+        self.stall_s = stall_ms / 1000.0
+        self.origin = time.perf_counter()
+        self.stats = {}   # name -> [count, total, max, buckets]
+        self.events = deque(maxlen=TRACE_EVENTS)
+        self.stalls = deque(maxlen=200)
+        self.stall = None  # the stall in progress: {"start", "stack"}
+        self.lock = threading.Lock()
+        self.gui_thread = threading.get_ident()
+        self.beat = time.perf_counter()
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(self._on_heartbeat)
+        self.heartbeat.start()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    # --- timing ---
+    def add(self, name, start, duration):
+        st = self.stats.get(name)
+        if st is None:
+            st = self.stats[name] = [0, 0.0, 0.0, [0] * HIST_BUCKETS]
+        st[0] += 1
+        st[1] += duration
+        st[2] = max(st[2], duration)
+        bucket = 0
+        limit = 0.00025
+        while duration >= limit and bucket < HIST_BUCKETS - 1:
+            limit *= 2
+            bucket += 1
+        st[3][bucket] += 1
+        self.events.append((name, start, duration))
+
+    def wrap(self, name, fn):
+        """`fn` timed under `name`; arguments pass through."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, start, time.perf_counter() - start)
+        return timed
+
+    def wrap_action(self, name, slot):
+        """Like wrap, for triggered(): the checked flag is not passed on."""
+        def timed(*_):
+            start = time.perf_counter()
+            try:
+                slot()
+            finally:
+                self.add(name, start, time.perf_counter() - start)
+        return timed
+
+    # --- stall watchdog ---
+    def _on_heartbeat(self):
+        now = time.perf_counter()
+        with self.lock:
+            self.beat = now
+            stall, self.stall = self.stall, None
+        if stall:
+            stall["duration"] = now - stall["start"]
+            self.stalls.append(stall)
+            self.add("stall", stall["start"], stall["duration"])
+
+    def _watch(self):
+        while True:
+            time.sleep(HEARTBEAT_MS / 2000.0)
+            with self.lock:
+                late = time.perf_counter() - self.beat - HEARTBEAT_MS / 1000.0
+                if late < self.stall_s or self.stall is not None:
+                    continue
+                frame = sys._current_frames().get(self.gui_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame else ""
+                self.stall = {"start": self.beat, "stack": stack}
+
+    # --- reporting ---
+    def percentile(self, buckets, q):
+        """Upper bound (ms) of the bucket holding the q-th quantile."""
+        target = q * sum(buckets)
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= target and n:
+                return 0.25 * 2 ** i
+        return 0.0
+
+    def summary(self):
+        out = {}
+        for name, (count, total, peak, buckets) in sorted(self.stats.items()):
+            out[name] = {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "max_ms": round(peak * 1000, 3),
+                "p50_ms": self.percentile(buckets, 0.5),
+                "p95_ms": self.percentile(buckets, 0.95),
+                "histogram": list(buckets),
+            }
+        return out
+
+    def export_json(self, path):
+        data = {
+            "buckets_ms": [0.25 * 2 ** i for i in range(HIST_BUCKETS)],
+            "stats": self.summary(),
+            "stalls": [{"at_s": round(s["start"] - self.origin, 3), "duration_ms": round(s["duration"] * 1000, 1),
+                        "stack": s["stack"]} for s in self.stalls],
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+
+    def export_trace(self, path):
+        """Chrome trace format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = [{"name": name, "cat": "gui", "ph": "X", "pid": pid, "tid": 1,
+                   "ts": round((start - self.origin) * 1e6), "dur": round(dur * 1e6)}
+                  for name, start, dur in list(self.events) if name != "stall"]
+        events += [{"name": "stall", "cat": "stall", "ph": "X", "pid": pid, "tid": 1,
+                    "ts": round((s["start"] - self.origin) * 1e6), "dur": round(s["duration"] * 1e6),
+                    "args": {"stack": s["stack"]}} for s in self.stalls]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
+
+    def clear(self):
+        self.stats.clear()
+        self.events.clear()
+        self.stalls.clear()
+
+class Histogram(QWidget):
+    """Bar chart of one name's duration buckets."""
+
+    def __init__(self):
+        super().__init__()
+        self.buckets = []
+        self.setMinimumHeight(90)
+
+    def set_buckets(self, buckets):
+        self.buckets = buckets
+        self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        color = self.palette().text().color()
+        p.setPen(color)
+        if not self.buckets or not any(self.buckets):
+            p.drawText(self.rect(), Qt.AlignCenter, "No samples")
+            return
+        label_h = self.fontMetrics().height()
+        h = self.height() - label_h - 2
+        w = self.width() / len(self.buckets)
+        top = max(self.buckets)
+        bar = QColor(color)
+        bar.setAlpha(140)
+        for i, n in enumerate(self.buckets):
+            bh = int(h * n / top)
+            p.fillRect(int(i * w) + 1, h - bh, max(1, int(w) - 2), bh, bar)
+            if i % 2 == 0:
+                ms = 0.25 * 2 ** i
+                p.drawText(int(i * w), self.height() - 2, f"<{ms:g}")
+
+class PerfPanel(QWidget):
+    """Per-slot timing histograms and captured stalls, refreshed while visible."""
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.names = QListWidget()
+        self.histogram = Histogram()
+        self.stalls = QListWidget()
+        self.stack = QPlainTextEdit()
+        self.stack.setReadOnly(True)
+        self.stack.setFont(QFont("Consolas", 9))
+        export_json = QPushButton("Export JSON")
+        export_trace = QPushButton("Export Chrome Trace")
+        clear = QPushButton("Clear")
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(export_json)
+        buttons.addWidget(export_trace)
+        buttons.addWidget(clear)
+        buttons.addStretch(1)
+        v = QVBoxLayout(self)
+        v.setContentsMargins(2, 2, 2, 2)
+        v.addLayout(buttons)
+        v.addWidget(self.names, 2)
+        v.addWidget(self.histogram, 1)
+        v.addWidget(QLabel("Stalls"))
+        v.addWidget(self.stalls, 1)
+        v.addWidget(self.stack, 2)
+
+        self.names.currentRowChanged.connect(lambda _: self.show_histogram())
+        self.stalls.currentRowChanged.connect(self.show_stack)
+        export_json.clicked.connect(lambda: self.export(False))
+        export_trace.clicked.connect(lambda: self.export(True))
+        clear.clicked.connect(self.clear)
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        inst = self.app.instrument
+        current = self.names.currentItem()
+        current = current.data(Qt.UserRole) if current else None
+        self.names.clear()
+        for name, st in inst.summary().items():
+            item = QListWidgetItem(f"{name}   n={st['count']}  mean {st['mean_ms']:.2f} ms  "
+                                   f"p95 <{st['p95_ms']:g} ms  max {st['max_ms']:.1f} ms")
+            item.setData(Qt.UserRole, name)
+            self.names.addItem(item)
+            if name == current:
+                self.names.setCurrentItem(item)
+        if self.stalls.count() != len(inst.stalls):
+            self.stalls.clear()
+            for s in inst.stalls:
+                self.stalls.addItem(f"{s['start'] - inst.origin:9.1f} s   {s['duration'] * 1000:.0f} ms")
+        self.show_histogram()
+
+    def show_histogram(self):
+        item = self.names.currentItem()
+        st = self.app.instrument.stats.get(item.data(Qt.UserRole)) if item else None
+        self.histogram.set_buckets(st[3] if st else [])
+
+    def show_stack(self, row):
+        stalls = self.app.instrument.stalls
+        self.stack.setPlainText(stalls[row]["stack"] if 0 <= row < len(stalls) else "")
+
+    def export(self, trace):
+        kind = "Chrome Trace (*.json)" if trace else "JSON (*.json)"
+        path, _ = QFileDialog.getSaveFileName(self, "Export", "trace.json" if trace else "timings.json", kind)
+        if not path:
+            return
+        try:
+            if trace:
+                self.app.instrument.export_trace(path)
+            else:
+                self.app.instrument.export_json(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export failed", str(e))
+
+    def clear(self):
+        self.app.instrument.clear()
+        self.stalls.clear()
+        self.stack.clear()
+        self.refresh()
+
+# ---------- Main application ----------
+class StartupProfile:
+    """Wall-clock time per startup phase, printed when --profile-startup is given."""
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.last = STARTED_AT
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        self.mark("event loop start")
+        width = max(len(p) for p, _ in self.phases)
+        for phase, secs in self.phases:
+            print(f"{phase:<{width}}  {secs * 1000:8.1f} ms")
+        print(f"{'total':<{width}}  {(self.last - STARTED_AT) * 1000:8.1f} ms")
+        sys.stdout.flush()
+
+class NotepadApp(QApplication):
+    def __init__(self, argv):
+        self.profile = StartupProfile("--profile-startup" in argv)
+        self.profile.mark("imports")
+        super().__init__(argv)
+        self.profile.mark("QApplication")
+        self.dialogs = DialogLoader(None)  # parent set later
+        self.themes = ThemeRegistry()
+        self.saver = SaveManager(self)
+        self.saver.saved.connect(self.on_saved)
+        self.saver.failed.connect(self.on_save_failed)
+        self.session = SessionStore(self)
+        self.monitor = FileMonitor(self)
+        self.find_files = None
+        self.find_files_dock = None
+        self.compare = None
+        self.compare_dock = None
+        self.unload_timer = QTimer(self)
+        self.unload_timer.setInterval(UNLOAD_CHECK_MS)
+        self.unload_timer.timeout.connect(self.unload_idle_tabs)
+        self.unload_timer.start()
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.setInterval(STATUS_REFRESH_MS)
+        self.status_timer.timeout.connect(lambda: self.update_status())
+        self.current_theme = "atom_one"
+        self.large_file_mb = LARGE_FILE_MB
+        self.tab_memory_mb = TAB_MEMORY_MB
+        self.tab_idle_seconds = TAB_IDLE_SECONDS
+        self.follow_max_lines = FOLLOW_MAX_LINES
+        self.line_ops_memory_mb = LINE_OPS_MEMORY_MB
+        self.follow_action = None
+        self.instrument_setting = False
+        self.stall_ms = STALL_MS
+        self.single_instance = False
+        self.load_settings()
+        self.profile.mark("settings")
+        # None when off: the hooks below then cost one attribute test or nothing at all
+        enabled = "--instrument" in argv or self.instrument_setting
+        self.instrument = Instrumentation(self, self.stall_ms) if enabled else None
+        self.perf_dock = None
+        if self.instrument:
+            self.update_status = self.instrument.wrap("update_status", self.update_status)
+        # Try to apply theme early (will fallback internally); styling before any
+        # widget exists avoids repolishing them all afterwards
+        self.apply_theme(self.current_theme)
+        self.profile.mark("theme")
+
+        # Load main UI (precompiled ui_main if built, else main.ui); if missing, create a minimal layout
+        self.window = self.dialogs.load_ui("main", QMainWindow)
+        if self.window is None:
+            # Minimal main window fallback
+            mw = QMainWindow()
+            central = QWidget()
+            mw.setCentralWidget(central)
+            layout = QVBoxLayout(central)
+            tabWidget = QTabWidget()
+            tabWidget.setObjectName("tabWidget")
+            layout.addWidget(tabWidget)
+            mw.setMenuBar(QMenuBar())
+            mw.setStatusBar(QStatusBar())
+            mw.resize(900, 600)
+            self.window = mw
+        self.profile.mark("main window")
+
+        # set dialog parent now
+        self.dialogs.parent = self.window
+
+        # replace the existing tabWidget with our ModernTabWidget
+        old_tab = self.window.findChild(QTabWidget, "tabWidget")
+        self.tab_widget = ModernTabWidget(self)
+        # the find bar sits under the tabs, sharing the tab widget's slot
+        self.find_bar = FindBar(self)
+        editor_area = QWidget()
+        area_layout = QVBoxLayout(editor_area)
+        area_layout.setContentsMargins(0, 0, 0, 0)
+        area_layout.addWidget(self.tab_widget)
+        area_layout.addWidget(self.find_bar)
+        if old_tab is not None:
+            layout = old_tab.parentWidget().layout()
+            layout.replaceWidget(old_tab, editor_area)
+            old_tab.setParent(None)
+        else:
+            # attach into main layout if no named widget existed
+            central = getattr(self.window, "centralWidget", None)
+            if central:
+                central.layout().addWidget(editor_area)
+
+        # progress of background file loads (shown for the current tab)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(160)
+        self.load_cancel = QPushButton("Cancel")
+        self.load_cancel.clicked.connect(self.cancel_load)
+
+        # statusbar reference (fallback)
+        self.statusbar = getattr(self.window, "statusbar", None) or self.window.findChild(QStatusBar) or self.window.statusBar()
+        if self.statusbar is None:
+            # create a status bar if not present
+            self.statusbar = QStatusBar()
+            try:
+                self.window.setStatusBar(self.statusbar)
+            except Exception:
+                pass
+        # cursor position lives in a normal widget: show_status messages cover it for
+        # their timeout instead of being overwritten by the next cursor move
+        self.position_label = QLabel("Ln 1, Col 1, Ch 0")
+        self.statusbar.addWidget(self.position_label, 1)
+        self.statusbar.addPermanentWidget(self.load_progress)
+        self.statusbar.addPermanentWidget(self.load_cancel)
+        self.load_progress.hide()
+        self.load_cancel.hide()
+
+        self.profile.mark("tabs and status bar")
+        self.connect_actions()
+        self.profile.mark("actions")
+        # Qt strips its own options from arguments(); "file" and "file:line" remain
+        files = launch.parse_file_args(self.arguments()[1:])
+        if not self.session.restore() and not files:
+            self.tab_widget.insert_new_tab()
+        self.profile.mark("session restore")
+        self.open_paths(files)
+        self.window.setWindowTitle("Untitled - Notepad")
+        self.window.show()
+        self.profile.mark("show")
+        self.instance_server = None
+        if launch.single_instance_enabled(self.arguments()[1:], SETTINGS_FILE):
+            self.instance_server = InstanceServer(self)
+        self.themes.preload()
+        QTimer.singleShot(0, self.profile.report)
+
+    # --- settings persistence ---
+    def load_settings(self):
+        try:
+            if os.path.exists(SETTINGS_FILE):
+                with open(SETTINGS_FILE, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                    self.current_theme = data.get("theme", "atom_one")
+                    self.large_file_mb = data.get("large_file_mb", LARGE_FILE_MB)
+                    self.tab_memory_mb = data.get("tab_memory_mb", TAB_MEMORY_MB)
+                    self.tab_idle_seconds = data.get("tab_idle_seconds", TAB_IDLE_SECONDS)
+                    self.follow_max_lines = data.get("follow_max_lines", FOLLOW_MAX_LINES)
+                    self.line_ops_memory_mb = data.get("line_ops_memory_mb", LINE_OPS_MEMORY_MB)
+                    self.instrument_setting = data.get("instrument", False)
+                    self.single_instance = data.get("single_instance", False)
+                    self.stall_ms = data.get("stall_ms", STALL_MS)
+        except Exception:
+            self.current_theme = "atom_one"
+
+    def save_settings(self):
+        try:
+            with open(SETTINGS_FILE, "w", encoding="utf-8") as fh:
+                json.dump({
+                    "theme": self.current_theme,
+                    "large_file_mb": self.large_file_mb,
+                    "tab_memory_mb": self.tab_memory_mb,
+                    "tab_idle_seconds": self.tab_idle_seconds,
+                    "follow_max_lines": self.follow_max_lines,
+                    "line_ops_memory_mb": self.line_ops_memory_mb,
+                    "instrument": self.instrument_setting,
+                    "stall_ms": self.stall_ms,
+                    "single_instance": self.single_instance,
+                }, fh, indent=2)
+        except Exception:
+            pass
+
+    def apply_theme(self, theme_name):
+        self.themes.apply(self, theme_name)
+
+    # --- connect actions ---
+    def connect_actions(self):
+        w = self.window
+
+        def a(name):
+            return w.findChild(QAction, name)
+
+        def on(name, slot):
+            if a(name): a(name).triggered.connect(self.action_slot(name, slot))
+
+        # File
+        on("actionNew", lambda: self.tab_widget.insert_new_tab())
+        on("actionOpen", lambda: self.open_files())
+        on("actionSave", lambda: self.save_file())
+        on("actionSave_As", lambda: self.save_file_as())
+        on("actionSave_All", self.save_all)
+        on("actionExit", self.exit_app)
+
+        # Edit
+        on("actionFind", self.find_text)
+        on("actionFind_Next", self.find_next)
+        on("actionReplace", self.replace_text)
+        self.inject_action("menuEdit", "actionFind_Previous", "Find Previous", self.find_previous, "Shift+F3")
+        self.inject_action("menuEdit", "actionFind_in_Files", "Find in Files", self.show_find_in_files, "Ctrl+Shift+F")
+        self.inject_action("menuEdit", "actionGo_To_Line", "Go To Line", self.go_to_line, "Ctrl+G")
+        self.inject_action("menuEdit", "actionSort_Lines", "Sort Lines...", self.sort_lines, "F9")
+        self.inject_action("menuEdit", "actionRemove_Duplicates", "Remove Duplicate Lines",
+                           lambda: self.start_line_job("dedupe", {}, "Removing duplicate lines"))
+        self.inject_action("menuEdit", "actionKeep_Matching", "Keep Matching Lines...",
+                           lambda: self.filter_lines(keep=True))
+        self.inject_action("menuEdit", "actionRemove_Matching", "Remove Matching Lines...",
+                           lambda: self.filter_lines(keep=False))
+
+        # View
+        self.follow_action = self.inject_action("menuView", "actionFollow", "Follow File", self.toggle_follow,
+                                                "Ctrl+Shift+L")
+        self.follow_action.setCheckable(True)
+
+        self.inject_action("menuView", "actionSplit_Side", "Split Side by Side",
+                           lambda: self.split_current(Qt.Horizontal), "Ctrl+\\")
+        self.inject_action("menuView", "actionSplit_Stacked", "Split Stacked",
+                           lambda: self.split_current(Qt.Vertical), "Ctrl+Shift+\\")
+        self.inject_action("menuView", "actionUnsplit", "Unsplit", self.unsplit_current)
+        self.inject_action("menuView", "actionCompare", "Compare Tabs...", self.compare_tabs, "Ctrl+Shift+D")
+        self.inject_action("menuView", "actionNext_Difference", "Next Difference",
+                           lambda: self.compare and self.compare.next(), "Alt+F5")
+        self.inject_action("menuView", "actionPrevious_Difference", "Previous Difference",
+                           lambda: self.compare and self.compare.next(backwards=True), "Shift+Alt+F5")
+        if self.instrument:
+            self.inject_action("menuView", "actionPerformance", "Performance Monitor", self.show_perf_panel)
+
+        # Zoom
+        on("actionZoom_In", lambda: self.zoom_in_current())
+        on("actionZoom_Out", lambda: self.zoom_out_current())
+
+        # Settings: inject if not present
+        settings_action = w.findChild(QAction, "actionSettings")
+        menu_settings = w.findChild(QMenu, "menuSettings")
+        if settings_action is None:
+            settings_action = QAction("Themes", self.window)
+            settings_action.setObjectName("actionSettings")
+            settings_action.triggered.connect(self.action_slot("actionSettings", self.open_settings))
+            if menu_settings:
+                menu_settings.addAction(settings_action)
+            else:
+                # append to menubar if no menu
+                try:
+                    w.menuBar().addAction(settings_action)
+                except Exception:
+                    pass
+        else:
+            settings_action.triggered.connect(self.action_slot("actionSettings", self.open_settings))
+
+    def inject_action(self, menu_name, name, text, slot, shortcut=None):
+        """Connect an action from main.ui, or create it in `menu_name` when the .ui lacks it."""
+        w = self.window
+        action = w.findChild(QAction, name)
+        if action is None:
+            action = QAction(text, w)
+            action.setObjectName(name)
+            if shortcut:
+                action.setShortcut(shortcut)
+            menu = w.findChild(QMenu, menu_name)
+            if menu:
+                menu.addAction(action)
+            else:
+                try:
+                    w.menuBar().addAction(action)
+                except Exception:
+                    pass
+        action.triggered.connect(self.action_slot(name, slot))
+        return action
+
+    def action_slot(self, name, slot):
+        """What triggered() connects to: `slot` itself, or timed when instrumenting."""
+        if self.instrument:
+            return self.instrument.wrap_action(name, slot)
+        return lambda: slot()
+
+    # --- open settings ---
+    def open_settings(self):
+        dlg, combo = self.dialogs.load_settings_dialog(self.current_theme)
+        if combo:
+            # the dialog is reused, so the list is only filled the first time
+            if combo.count() == 0:
+                combo.addItems(self.themes.names())
+            idx = combo.findText(self.current_theme)
+            if idx >= 0:
+                combo.setCurrentIndex(idx)
+        res = dlg.exec() if hasattr(dlg, "exec") else dlg.exec_()
+        if res == QDialog.Accepted and combo:
+            chosen = combo.currentText()
+            if chosen:
+                self.current_theme = chosen
+                self.apply_theme(chosen)
+                self.save_settings()
+                self.show_status(f"Theme changed to {chosen}")
+
+    # --- replace ---
+    def replace_text(self):
+        dlg, find_edit, with_edit, options = self.dialogs.load_replace_dialog()
+        res = dlg.exec() if hasattr(dlg, "exec") else dlg.exec_()
+        if res != QDialog.Accepted:
+            return
+        a = find_edit.text() if find_edit else ""
+        b = with_edit.text() if with_edit else ""
+        if not a:
+            return
+
+        def checked(key, default=False):
+            return options[key].isChecked() if options.get(key) else default
+
+        regex = checked("regex")
+        try:
+            pattern = textsearch.compile_pattern(a, regex=regex, case=checked("case", True),
+                                                 whole_word=checked("word"))
+        except re.error as e:
+            QMessageBox.warning(self.window, "Replace", f"Invalid pattern: {e}")
+            return
+        scope = options["scope"].currentText() if options.get("scope") else "Current tab"
+        tw = self.tab_widget
+        if scope == "All tabs":
+            conts = [tw.widget(i) for i in range(tw.count() - 1)]
+            for cont in conts:
+                if cont.property("lazy"):
+                    tw.materialize(tw.indexOf(cont))  # a file too big for an editor becomes a viewer tab
+            indexes = range(tw.count() - 1)
+        else:
+            indexes = [tw.currentIndex()]
+        selection = scope == "Selection"
+        editors, loading, skipped = [], [], []
+        for i in indexes:
+            ed, loader = tw.get_editor(i), tw.get_loader(i)
+            if ed is None or (loader and selection):
+                skipped.append(tw.tabText(i))
+            elif loader:
+                loading.append(loader)
+            else:
+                editors.append(ed)
+        # each run keeps its own tally, so overlapping runs never mix their counts
+        run = {"pending": len(editors) + len(loading), "count": 0, "tabs": 0, "skipped": skipped,
+               "label": f"'{a}' with '{b}'"}
+        if not run["pending"]:
+            if skipped:
+                self.show_status(f"Nothing replaced; skipped {', '.join(skipped)}")
+            return
+        self.show_status(f"Replacing {run['label']}...", 0)
+        for loader in loading:
+            loader.replaces.append((pattern, b, regex, run))
+        for ed in editors:
+            self.start_replace(ed, pattern, b, regex, selection, run)
+
+    def start_replace(self, ed, pattern, repl, regex, selection, run):
+        if selection:
+            c = ed.textCursor()
+            piece = TextSlice(ed.document(), c.selectionStart(), c.selectionEnd())
+        else:
+            piece = TextSlice(ed.document())
+        job = ReplaceJob(ed, piece, pattern, repl, regex, selection, run)
+        # bound to the app so the worker's signals are queued onto the GUI thread
+        job.done.connect(self.apply_replace)
+        job.failed.connect(self.on_replace_failed)
+        job.start()
+
+    def apply_replace(self, job, edits):
+        ed = job.editor
+        job.setParent(None)
+        job.deleteLater()
+        doc = ed.document()
+        if doc.revision() != job.revision:
+            # the buffer changed under the scan; offsets are stale
+            if not job.selection:
+                return self.start_replace(ed, job.pattern, job.repl, job.regex, False, job.run)
+            edits = []
+            self.show_status("Selection changed during replace; nothing replaced")
+        if edits:
+            doc.findChild(LongLines).replace(QTextCursor(doc), edits)  # one undo step
+            job.run["tabs"] += 1
+        job.run["count"] += len(edits)
+        self.finish_replace_step(job.run)
+
+    def on_replace_failed(self, job, message):
+        job.setParent(None)
+        job.deleteLater()
+        QMessageBox.warning(self.window, "Replace failed", message)
+        self.finish_replace_step(job.run)
+
+    def finish_replace_step(self, run):
+        run["pending"] -= 1
+        if run["pending"] == 0:
+            tabs = f" in {run['tabs']} tabs" if run["tabs"] > 1 else ""
+            skipped = f"; skipped {', '.join(run['skipped'])}" if run["skipped"] else ""
+            self.show_status(f"Replaced {run['count']} occurrence(s) of {run['label']}{tabs}{skipped}",
+                             0 if skipped else 5000)
+
+    def skip_replaces(self, loader):
+        """The load of a tab with queued replaces failed or was cancelled."""
+        for _, _, _, run in loader.replaces:
+            run["skipped"].append(os.path.basename(loader.path))
+            self.finish_replace_step(run)
+
+    # --- line operations ---
+    def sort_lines(self):
+        orders = ["Ascending", "Descending", "Ascending, ignoring case", "Descending, ignoring case",
+                  "Ascending, removing duplicates"]
+        order, ok = QInputDialog.getItem(self.window, "Sort Lines", "Order:", orders, 0, False)
+        if ok:
+            self.start_line_job("sort", {"reverse": order.startswith("Descending"),
+                                         "ignore_case": "ignoring case" in order,
+                                         "unique": "duplicates" in order}, "Sorting lines")
+
+    def filter_lines(self, keep):
+        title = "Keep Matching Lines" if keep else "Remove Matching Lines"
+        dlg = QDialog(self.window)
+        dlg.setWindowTitle(title)
+        find_edit = QLineEdit(self.find_bar.edit.text())
+        regex, case, word = QCheckBox("Regex"), QCheckBox("Match case"), QCheckBox("Whole word")
+        case.setChecked(True)
+        box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        opts = QHBoxLayout()
+        for check in (regex, case, word):
+            opts.addWidget(check)
+        v = QVBoxLayout(dlg)
+        v.addWidget(find_edit)
+        v.addLayout(opts)
+        v.addWidget(box)
+        box.accepted.connect(dlg.accept)
+        box.rejected.connect(dlg.reject)
+        if dlg.exec() != QDialog.Accepted or not find_edit.text():
+            return
+        try:
+            pattern = textsearch.compile_pattern(find_edit.text(), regex=regex.isChecked(),
+                                                 case=case.isChecked(), whole_word=word.isChecked())
+        except re.error as e:
+            QMessageBox.warning(self.window, title, f"Invalid pattern: {e}")
+            return
+        self.start_line_job("keep" if keep else "drop", {"pattern": pattern},
+                            "Keeping matching lines" if keep else "Removing matching lines")
+
+    def start_line_job(self, op, options, label):
+        tw = self.tab_widget
+        cont = tw.currentWidget()
+        ed = tw.get_editor()
+        if ed is None:
+            self.show_status("Line operations work on editor tabs")
+            return
+        if tw.get_loader() or tw.get_follower() or ed.isReadOnly():
+            self.show_status("This tab cannot be edited right now")
+            return
+        if cont.findChild(LineJob):
+            self.show_status("A line operation is already running in this tab")
+            return
+        options["budget"] = self.line_ops_memory_mb * 1024 * 1024
+        job = LineJob(cont, ed, op, options, label)
+        # bound to the app so the job's signals are handled on the GUI thread
+        job.done.connect(self.apply_line_job)
+        job.failed.connect(self.on_line_job_failed)
+        job.progress.connect(lambda _: self.update_load_progress())
+        job.start(document_text(ed.document()))
+        self.update_load_progress()
+
+    def apply_line_job(self, job, result):
+        text, lines_in, lines_out = result
+        self.end_line_job(job)
+        doc = job.editor.document()
+        if doc.revision() != job.revision:
+            self.show_status(f"{job.label}: the buffer changed meanwhile, nothing was changed")
+            return
+        doc.findChild(LongLines).set_text(QTextCursor(doc), text)  # one undo step
+        self.show_status(f"{job.label}: {lines_in} lines in, {lines_out} out")
+
+    def on_line_job_failed(self, job, message):
+        self.end_line_job(job)
+        QMessageBox.warning(self.window, "Line operation failed", message)
+
+    def end_line_job(self, job):
+        job.setParent(None)
+        job.deleteLater()
+        self.update_load_progress()
+
+    # --- open / save ---
+    def open_file(self, path=None, line=None):
+        """Open `path` (asks when None) in a tab; `line` (1-based) is jumped to once loaded."""
+        if not path:
+            path, _ = QFileDialog.getOpenFileName(self.window, "Open File", "", "Text Files (*.txt);;All Files (*)")
+        if not path:
+            return
+        if not os.path.isfile(path):
+            QMessageBox.warning(self.window, "Open failed", f"No such file: {path}")
+            return
+        # one document per file: an open file is shown again, never loaded twice
+        idx = self.tab_widget.find_tab(path)
+        if idx >= 0:
+            self.tab_widget.setCurrentIndex(idx)
+            loader = self.tab_widget.get_loader(idx)
+            if line is not None and loader:
+                loader.goto_line = line
+            elif line is not None:
+                self.jump_to_line(self.tab_widget.widget(idx), line)
+            return
+        if os.path.getsize(path) >= self.large_file_mb * 1024 * 1024:
+            try:
+                view = self.tab_widget.insert_large_file_tab(path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self.window, "Open failed", str(e))
+                return
+            if line is not None:
+                view.pending_line = line - 1
+            return
+
+        replaced = False
+        for i in range(self.tab_widget.count() - 1):
+            w = self.tab_widget.widget(i)
+            title = self.tab_widget.tabText(i)
+            ed = self.tab_widget.get_editor(i)
+            if title == "Untitled" and ed and ed.document().isEmpty() and not w.property("filepath"):
+                self.tab_widget.set_path(w, path)
+                self.tab_widget.setTabText(i, os.path.basename(path))
+                self.tab_widget.setCurrentIndex(i)
+                replaced = True
+                break
+        if not replaced:
+            self.tab_widget.insert_new_tab("", os.path.basename(path))
+            idx = self.tab_widget.currentIndex()
+            self.tab_widget.set_path(self.tab_widget.widget(idx), path)
+        idx = self.tab_widget.currentIndex()
+        loader = self.start_load(self.tab_widget.widget(idx), self.tab_widget.get_editor(idx), path)
+        if loader:
+            loader.goto_line = line
+        self.update_window_title()
+
+    def jump_to_line(self, cont, line):
+        """Put the cursor of the tab `cont` on `line` (1-based)."""
+        view = cont.findChild(LargeFileView)
+        if view:
+            if not view.go_to_line(line - 1):
+                view.pending_line = line - 1
+            return
+        ed = cont.findChild(QPlainTextEdit)
+        if ed:
+            self.go_to_offset(ed, line)
+
+    def go_to_offset(self, ed, line):
+        """Cursor to the start of `line` (1-based), looked up in the line index."""
+        index = ed.document().findChild(LineIndex)
+        c = ed.textCursor()
+        if index:
+            c.setPosition(index.offset(line - 1))
+        else:
+            c = QTextCursor(ed.document().findBlockByNumber(line - 1))
+        ed.setTextCursor(c)
+        ed.centerCursor()
+
+    def open_paths(self, files):
+        """Open [(path, line or None), ...], switching to tabs that already show a path."""
+        for path, line in files:
+            self.open_file(path, line)
+
+    def open_forwarded(self, files):
+        """Files handed over by another launch: open them and come to the front."""
+        self.open_paths(files)
+        if self.window.isMinimized():
+            self.window.showNormal()
+        self.window.raise_()
+        self.window.activateWindow()
+
+    def open_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self.window, "Open Files", "", "Text Files (*.txt);;All Files (*)")
+        if not paths:
+            return
+        # only the last file is loaded now; the others wait as placeholders
+        for path in paths[:-1]:
+            if os.path.isfile(path) and self.tab_widget.find_tab(path) < 0:
+                self.tab_widget.insert_lazy_tab(path)
+        self.open_file(paths[-1])
+
+    # --- tab memory budget ---
+    def schedule_unload(self):
+        QTimer.singleShot(0, self.unload_idle_tabs)
+
+    def unload_idle_tabs(self):
+        """Unload least recently used, unmodified file tabs until loaded text fits the budget."""
+        tw = self.tab_widget
+        loaded = []
+        total = 0
+        for i in range(tw.count() - 1):
+            ed = tw.get_editor(i)
+            if ed is None:
+                continue
+            doc = ed.document()
+            # UTF-16 text plus a rough per-block layout cost
+            size = doc.characterCount() * 2 + doc.blockCount() * 100
+            total += size
+            loaded.append((tw.widget(i).property("last_used") or 0.0, i, size))
+        budget = self.tab_memory_mb * 1024 * 1024
+        if total <= budget:
+            return
+        now = time.monotonic()
+        current = tw.currentIndex()
+        for last_used, i, size in sorted(loaded):
+            if total <= budget:
+                break
+            ed = tw.get_editor(i)
+            if (i == current or now - last_used < self.tab_idle_seconds or ed.document().isModified()
+                    or not tw.widget(i).property("filepath") or tw.get_loader(i) or tw.get_follower(i)
+                    or tw.widget(i).findChild(LineJob) or (self.compare and self.compare.uses(tw.widget(i)))):
+                continue
+            tw.unload_tab(i)
+            total -= size
+
+    def start_load(self, cont, editor, path, replay=None):
+        """Stream `path` into `editor`; `replay` is a recovered journal state to apply once it is in."""
+        try:
+            loader = ChunkedFileLoader(path, editor, cont)
+        except OSError as e:
+            QMessageBox.warning(self.window, "Open failed", str(e))
+            self.reset_tab(cont)
+            return None
+        loader.replay = replay
+        if replay is None:
+            # the file is the journal's base, so edits typed while it loads can follow it
+            self.session.file_synced(cont)
+        highlighter = editor.document().findChild(SyntaxHighlighter)
+        if highlighter:
+            highlighter.set_language(syntax.language_for(path))
+        loader.progress.connect(lambda _: self.update_load_progress())
+        loader.finished.connect(lambda: self.on_load_finished(loader))
+        loader.failed.connect(lambda msg: self.on_load_failed(loader, msg))
+        loader.start()
+        self.update_load_progress()
+        return loader
+
+    def on_load_finished(self, loader):
+        cont = loader.parent()
+        loader.setParent(None)
+        loader.deleteLater()
+        if loader.replay is not None:
+            self.session.replay(cont, loader.editor, loader.replay)
+        elif not loader.editor.document().isModified():
+            self.session.file_synced(cont)
+        self.monitor.synced(cont, loader.signature)
+        for pattern, repl, regex, run in loader.replaces:
+            self.start_replace(loader.editor, pattern, repl, regex, False, run)
+        if loader.goto_line is not None:
+            self.jump_to_line(cont, loader.goto_line)
+        elif cont.property("cursor_pos") is not None:
+            # back from an unload: put cursor and scroll where they were
+            ed = cont.findChild(QPlainTextEdit)
+            c = ed.textCursor()
+            c.setPosition(min(cont.property("cursor_pos"), ed.document().characterCount() - 1))
+            ed.setTextCursor(c)
+            ed.verticalScrollBar().setValue(cont.property("scroll_pos") or 0)
+            cont.setProperty("cursor_pos", None)
+        self.show_status(f"Loaded {os.path.basename(loader.path)}")
+        self.update_load_progress()
+        self.update_status()
+
+    def on_load_failed(self, loader, message):
+        cont = loader.parent()
+        loader.setParent(None)
+        loader.deleteLater()
+        QMessageBox.warning(self.window, "Open failed", message)
+        self.reset_tab(cont)
+        self.skip_replaces(loader)
+        self.update_load_progress()
+
+    def cancel_load(self):
+        loader = self.tab_widget.get_loader()
+        if not loader:
+            cont = self.tab_widget.currentWidget()
+            job = cont.findChild(LineJob) if cont is not None else None
+            if job:
+                job.cancel()
+                self.end_line_job(job)
+                self.show_status(f"Cancelled: {job.label}")
+            return
+        cont = loader.parent()
+        loader.cancel()
+        loader.setParent(None)
+        loader.deleteLater()
+        # a partial buffer must never be saved over the real file
+        self.reset_tab(cont)
+        self.skip_replaces(loader)
+        self.show_status(f"Cancelled loading {os.path.basename(loader.path)}")
+        self.update_load_progress()
+
+    def reset_tab(self, cont):
+        idx = self.tab_widget.indexOf(cont)
+        if idx < 0:
+            return
+        ed = self.tab_widget.get_editor(idx)
+        if ed:
+            ed.clear()
+            ed.document().setModified(False)
+        self.monitor.forget(cont)
+        self.tab_widget.set_path(cont, None)
+        self.tab_widget.setTabText(idx, "Untitled")
+        self.update_window_title()
+
+    def update_load_progress(self):
+        """Progress of the current tab's load or line operation."""
+        loader = self.tab_widget.get_loader()
+        cont = self.tab_widget.currentWidget()
+        job = cont.findChild(LineJob) if cont is not None else None
+        if loader is not None and not loader.is_cancelled():
+            self.load_progress.setValue(loader.percent)
+            self.load_progress.setFormat(f"{os.path.basename(loader.path)} %p%")
+        elif job is not None:
+            self.load_progress.setValue(job.percent)
+            self.load_progress.setFormat(f"{job.label} %p%")
+        else:
+            self.load_progress.hide()
+            self.load_cancel.hide()
+            return
+        self.load_progress.show()
+        self.load_cancel.show()
+
+    # --- follow mode ---
+    def toggle_follow(self):
+        tw = self.tab_widget
+        cont = tw.widget(tw.currentIndex())
+        ed = tw.get_editor()
+        follower = tw.get_follower()
+        if follower:
+            self.stop_follow(cont, follower)
+        elif ed is None or not cont.property("filepath"):
+            self.show_status("Only file tabs can be followed")
+        elif tw.get_loader():
+            self.show_status(f"{os.path.basename(cont.property('filepath'))} is still loading")
+        elif ed.document().isModified():
+            self.show_status("Save or discard the changes before following this file")
+        else:
+            self.start_follow(cont, ed)
+        self.follow_action.setChecked(tw.get_follower() is not None)
+
+    def start_follow(self, cont, ed):
+        path = cont.property("filepath")
+        follower = FileFollower(path, ed, self.follow_max_lines, cont)
+        follower.restarted.connect(lambda reason: self.show_status(f"{os.path.basename(path)} was {reason}; "
+                                                                   "showing the new file"))
+        follower.start()
+        ed.moveCursor(QTextCursor.End)
+        ed.verticalScrollBar().setValue(ed.verticalScrollBar().maximum())
+        self.show_status(f"Following {os.path.basename(path)}")
+
+    def stop_follow(self, cont, follower):
+        follower.stop()
+        follower.setParent(None)
+        follower.deleteLater()
+        path = cont.property("filepath")
+        if follower.trimmed:
+            # the buffer only holds the tail; bring the whole file back so it can be edited
+            ed = follower.editor
+            ed.clear()
+            ed.document().setModified(False)
+            self.start_load(cont, ed, path)
+        else:
+            self.session.file_synced(cont)
+            self.monitor.check(cont)  # catch up with the file; usually an empty diff
+        self.show_status(f"Stopped following {os.path.basename(path)}")
+
+    def save_file(self, index=None):
+        """Snapshot the tab and queue an atomic write; returns the save's future or None."""
+        if index is None:
+            index = self.tab_widget.currentIndex()
+        w = self.tab_widget.widget(index)
+        if w is None:
+            return None
+        ed = self.tab_widget.get_editor(index)
+        path = w.property("filepath")
+        if ed is None:
+            return None  # large file viewer tabs are read-only
+        if self.tab_widget.get_loader(index):
+            self.show_status(f"{os.path.basename(path)} is still loading")
+            return None
+        if self.tab_widget.get_follower(index):
+            self.show_status(f"{os.path.basename(path)} is being followed (read-only)")
+            return None
+        if not path:
+            return self.save_file_as(index)
+        if self.monitor.changed_on_disk(w):
+            choice = QMessageBox.question(
+                self.window, "File Changed",
+                f"{os.path.basename(path)} was changed by another program since it was opened.\n"
+                "Overwrite those changes?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if choice != QMessageBox.Yes:
+                return None
+        return self.queue_save(w, ed, path)
+
+    def save_file_as(self, index=None):
+        if index is None:
+            index = self.tab_widget.currentIndex()
+        w = self.tab_widget.widget(index)
+        if w is None:
+            return None
+        ed = self.tab_widget.get_editor(index)
+        if ed is None:
+            self.show_status("Large file tabs are read-only")
+            return None
+        path, _ = QFileDialog.getSaveFileName(self.window, "Save As", "", "Text Files (*.txt);;All Files (*)")
+        if not path:
+            return None
+        other = self.tab_widget.find_tab(path)
+        if other >= 0 and other != index:
+            QMessageBox.warning(self.window, "Save As", f"{os.path.basename(path)} is open in another tab; "
+                                                        "close that tab first.")
+            return None
+        self.monitor.forget(w)
+        self.tab_widget.set_path(w, path)
+        self.tab_widget.setTabText(index, os.path.basename(path))
+        self.update_window_title(index)
+        highlighter = ed.document().findChild(SyntaxHighlighter)
+        if highlighter:
+            highlighter.set_language(syntax.language_for(path))
+        return self.queue_save(w, ed, path)
+
+    def queue_save(self, cont, ed, path):
+        doc = ed.document()
+        self.show_status(f"Saving {os.path.basename(path)}...")
+        return self.saver.save(cont, path, document_text(doc), doc.revision())
+
+    def on_saved(self, cont, path, revision, signature):
+        idx = self.tab_widget.indexOf(cont)
+        if idx < 0:
+            return
+        ed = self.tab_widget.get_editor(idx)
+        # edits made while the write ran keep the tab modified
+        if ed and ed.document().revision() == revision:
+            ed.document().setModified(False)
+            self.session.file_synced(cont)
+        elif ed:
+            self.session.snapshot(cont, ed)
+        if ed and cont.property("filepath") == path:
+            self.monitor.synced(cont, signature)
+        self.tab_widget.tabBar().setTabTextColor(idx, QColor())
+        self.tab_widget.setTabToolTip(idx, path)
+        self.show_status(f"Saved {os.path.basename(path)}")
+        self.update_window_title(idx)
+
+    def on_save_failed(self, cont, path, message):
+        idx = self.tab_widget.indexOf(cont)
+        if idx >= 0:
+            self.tab_widget.tabBar().setTabTextColor(idx, QColor("red"))
+            self.tab_widget.setTabToolTip(idx, f"Save failed: {message}")
+        self.show_status(f"Save failed for {os.path.basename(path)}: {message}", 10000)
+
+    def save_all(self):
+        # snapshots are taken here; the writes overlap in the save pool
+        for i in range(self.tab_widget.count() - 1):
+            ed = self.tab_widget.get_editor(i)
+            w = self.tab_widget.widget(i)
+            if ed and (ed.document().isModified() or not w.property("filepath")):
+                self.save_file(i)
+
+    # --- find / find next ---
+    def find_text(self):
+        self.find_bar.open()
+
+    def find_next(self):
+        self.find_bar.next()
+
+    def find_previous(self):
+        self.find_bar.next(backwards=True)
+
+    def show_find_in_files(self):
+        if self.find_files_dock is None:
+            self.find_files = FindInFilesPanel(self)
+            self.find_files_dock = QDockWidget("Find in Files", self.window)
+            self.find_files_dock.setObjectName("findInFilesDock")
+            self.find_files_dock.setWidget(self.find_files)
+            self.window.addDockWidget(Qt.BottomDockWidgetArea, self.find_files_dock)
+        self.find_files_dock.show()
+        self.find_files.pattern.setFocus()
+        self.find_files.pattern.selectAll()
+
+    # --- compare ---
+    def compare_tabs(self):
+        """Pick two editor tabs and show their differences in the Compare panel."""
+        tw = self.tab_widget
+        tabs = [i for i in range(tw.count() - 1) if tw.get_editor(i) is not None and not tw.get_loader(i)]
+        if len(tabs) < 2:
+            self.show_status("Compare needs two open (and loaded) editor tabs")
+            return
+        dlg = QDialog(self.window)
+        dlg.setWindowTitle("Compare Tabs")
+        combos = (QComboBox(), QComboBox())
+        for combo in combos:
+            for i in tabs:
+                combo.addItem(tw.tabText(i), i)
+        first = tabs.index(tw.currentIndex()) if tw.currentIndex() in tabs else 0
+        combos[0].setCurrentIndex(first)
+        combos[1].setCurrentIndex((first + 1) % len(tabs))
+        box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        h = QHBoxLayout()
+        h.addWidget(combos[0])
+        h.addWidget(QLabel("with"))
+        h.addWidget(combos[1])
+        v = QVBoxLayout(dlg)
+        v.addLayout(h)
+        v.addWidget(box)
+        box.accepted.connect(dlg.accept)
+        box.rejected.connect(dlg.reject)
+        if dlg.exec() != QDialog.Accepted:
+            return
+        a, b = combos[0].currentData(), combos[1].currentData()
+        if a == b:
+            self.show_status("Pick two different tabs to compare")
+            return
+        self.show_compare(tw.widget(a), tw.widget(b))
+
+    def show_compare(self, cont_a, cont_b):
+        if self.compare_dock is None:
+            self.compare = ComparePanel(self)
+            self.compare_dock = QDockWidget("Compare", self.window)
+            self.compare_dock.setObjectName("compareDock")
+            self.compare_dock.setWidget(self.compare)
+            self.window.addDockWidget(Qt.BottomDockWidgetArea, self.compare_dock)
+        self.compare_dock.show()
+        self.compare.start(cont_a, cont_b)
+
+    # --- split panes ---
+    def split_current(self, orientation):
+        cont = self.tab_widget.currentWidget()
+        if cont is None or self.tab_widget.get_editor() is None:
+            self.show_status("Only editor tabs can be split")
+            return
+        self.tab_widget.split(cont, orientation)
+
+    def unsplit_current(self):
+        cont = self.tab_widget.currentWidget()
+        if cont is not None:
+            self.tab_widget.unsplit(cont)
+            self.update_status()
+
+    def show_perf_panel(self):
+        if self.perf_dock is None:
+            self.perf_panel = PerfPanel(self)
+            self.perf_dock = QDockWidget("Performance", self.window)
+            self.perf_dock.setObjectName("performanceDock")
+            self.perf_dock.setWidget(self.perf_panel)
+            self.window.addDockWidget(Qt.RightDockWidgetArea, self.perf_dock)
+        self.perf_dock.show()
+        self.perf_panel.refresh()
+
+    # --- go to line ---
+    def go_to_line(self):
+        ed = self.tab_widget.get_editor()
+        view = self.tab_widget.get_large_view()
+        if view:
+            current, total = view.current_line + 1, view.line_count()
+        elif ed:
+            index = ed.document().findChild(LineIndex)
+            current, total = index.line_of(ed.textCursor().position()) + 1, index.count()
+        else:
+            return
+        line, ok = QInputDialog.getInt(self.window, "Go To Line", f"Line (1 - {total}):", current, 1, min(max(1, total), 2**31 - 1))
+        if not ok:
+            return
+        if view:
+            if not view.go_to_line(line - 1):
+                self.show_status(f"Line {line} is not indexed yet")
+            return
+        self.go_to_offset(ed, line)
+
+    # --- status / title ---
+    def request_status(self, editor=None):
+        """Coalesce bursts of cursor/selection changes into one status refresh per frame."""
+        if editor is not None and editor is not self.tab_widget.get_editor():
+            return  # background tabs (e.g. still loading) don't own the status bar
+        if not self.status_timer.isActive():
+            self.status_timer.start()
+
+    def update_status(self, editor=None):
+        editor = editor or self.tab_widget.get_editor()
+        view = None if editor else self.tab_widget.get_large_view()
+        if editor:
+            c = editor.textCursor()
+            pos = c.position()
+            doc = editor.document()
+            chars = doc.characterCount() - 1
+            index = doc.findChild(LineIndex)
+            line = index.line_of(pos)
+            start = index.offset(line)
+            # soft breaks between the line start and the cursor are not columns
+            col = pos - start - (c.blockNumber() - doc.findBlock(start).blockNumber()) + 1
+            percent = pos * 100 // chars if chars else 100
+            msg = f"Ln {line + 1} of {index.count()}, Col {col}, {percent}%, Ch {chars}"
+            stats = doc.findChild(DocumentStats)
+            if stats:
+                msg += f", Words {stats.words}"
+            if doc.findChild(LongLines).active:
+                msg += ", long-line mode"
+            if stats and c.hasSelection():
+                chars, words, lines = stats.selection(c)
+                msg += f"  |  Sel {chars} ch, {words} words, {lines} lines"
+            self.position_label.setText(msg)
+            self.find_bar.update_count()
+        elif view:
+            indexing = "" if view.indexed else f", indexing {view.indexed_percent()}%"
+            percent = (view.line_offset(view.current_line) or 0) * 100 // view.size if view.size else 100
+            self.position_label.setText(f"Ln {view.current_line + 1} of {view.line_count()}, {percent}%, "
+                                        f"{view.size} bytes, read-only{indexing}")
+        else:
+            self.position_label.setText("Ln 1, Col 1, Ch 0")
+
+    def show_status(self, message, timeout=5000):
+        try:
+            self.statusbar.showMessage(message, timeout)
+        except Exception:
+            pass
+
+    def update_window_title(self, index=None):
+        if index is None:
+            index = self.tab_widget.currentIndex()
+        w = self.tab_widget.widget(index)
+        if w is None:
+            self.window.setWindowTitle("Notepad")
+            return
+        path = w.property("filepath")
+        if path:
+            name = os.path.basename(path)
+        else:
+            name = self.tab_widget.tabText(index)
+        self.window.setWindowTitle(f"{name} - Notepad")
+
+    # --- zooming (fixed zoom out) ---
+    def zoom_in_current(self, step=1):
+        ed = self.tab_widget.get_editor() or self.tab_widget.get_large_view()
+        if not ed:
+            return
+        f = ed.font()
+        size = max(6, f.pointSize() + step)
+        f.setPointSize(size)
+        ed.setFont(f)
+
+    def zoom_out_current(self, step=1):
+        ed = self.tab_widget.get_editor() or self.tab_widget.get_large_view()
+        if not ed:
+            return
+        f = ed.font()
+        size = max(6, f.pointSize() - step)
+        f.setPointSize(size)   # <-- fixed: previously point size was computed but not applied
+        ed.setFont(f)
+
+    def eventFilter(self, source, event):
+        if self.instrument is not None:
+            start = time.perf_counter()
+            result = self.filter_event(source, event)
+            self.instrument.add("eventFilter", start, time.perf_counter() - start)
+            return result
+        return self.filter_event(source, event)
+
+    def filter_event(self, source, event):
+        if event.type() == QEvent.FocusIn and isinstance(source, QPlainTextEdit):
+            self.tab_widget.pane_focused(source)
+        if isinstance(source, (QPlainTextEdit, LargeFileView)) and event.type() == QEvent.Wheel:
+            if event.modifiers() & Qt.ControlModifier:
+                delta = event.angleDelta().y()
+                if delta > 0:
+                    self.zoom_in_current()
+                else:
+                    self.zoom_out_current()
+                return True
+        return super().eventFilter(source, event)
+
+    # --- exit ---
+    def exit_app(self):
+        unsaved = False
+        for i in range(self.tab_widget.count() - 1):
+            ed = self.tab_widget.get_editor(i)
+            if ed and ed.document().isModified():
+                unsaved = True
+                break
+        if unsaved:
+            c = QMessageBox.question(self.window, "Exit", "You have unsaved changes. Exit anyway?",
+                                     QMessageBox.Yes | QMessageBox.No)
+            if c == QMessageBox.No:
+                return
+        self.saver.shutdown()
+        if self.find_files:
+            self.find_files.shutdown()
+        if self.compare:
+            self.compare.cancel()
+        self.quit()
+
+# ---------- run ----------
+def run(argv, started_at=None):
+    """Start the GUI; `started_at` is when the entry script began, for --profile-startup."""
+    global STARTED_AT
+    if started_at is not None:
+        STARTED_AT = started_at
+    app = NotepadApp(argv)
+    return app.exec()
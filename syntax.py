@@ -0,0 +1,145 @@
+"""Line-at-a-time tokenizers for syntax highlighting (kept free of Qt imports).
+
+A Language turns one line plus the state the previous line ended in into
+(start, length, style) spans and the state this line ends in. State 0 means
+"nothing open"; state i + 1 means "inside multi-line construct i" (a block
+comment or a triple-quoted string), so the editor can stop re-highlighting
+once a line ends in the same state as before.
+"""
+import os
+import re
+
+LANGUAGES = []
+
+
+class Language:
+    def __init__(self, name, extensions, tokens, multiline=()):
+        """`tokens` is an ordered list of (style, regex); earlier entries win.
+        `multiline` is a list of (style, start regex, end regex)."""
+        self.name = name
+        self.extensions = tuple(extensions)
+        self.multiline = [(style, re.compile(end)) for style, _, end in multiline]
+        parts = [f"(?P<ml{i}>{start})" for i, (_, start, _) in enumerate(multiline)]
+        parts += [f"(?P<t{i}>{expr})" for i, (_, expr) in enumerate(tokens)]
+        self.styles = {f"t{i}": style for i, (style, _) in enumerate(tokens)}
+        self.master = re.compile("|".join(parts))
+
+    def highlight(self, text, state=0):
+        """Return ([(start, length, style), ...], end state) for one line."""
+        spans = []
+        pos = 0
+        if state:
+            pos, state = self._close(text, 0, state - 1, spans)
+            if state:
+                return spans, state
+        while True:
+            m = self.master.search(text, pos)
+            if m is None or m.end() == m.start():
+                return spans, 0
+            group = m.lastgroup
+            if group.startswith("ml"):
+                pos, state = self._close(text, m.start(), int(group[2:]), spans, m.end())
+                if state:
+                    return spans, state
+            else:
+                spans.append((m.start(), m.end() - m.start(), self.styles[group]))
+                pos = m.end()
+
+    def _close(self, text, start, index, spans, search_from=None):
+        """Style a multi-line construct from `start`; returns (next pos, state)."""
+        style, end = self.multiline[index]
+        m = end.search(text, start if search_from is None else search_from)
+        if m is None:
+            spans.append((start, len(text) - start, style))
+            return len(text), index + 1
+        spans.append((start, m.end() - start, style))
+        return m.end(), 0
+
+
+def register(language):
+    LANGUAGES.append(language)
+    return language
+
+
+def language_for(path):
+    """The Language for a file name, by extension; None when there is none."""
+    if not path:
+        return None
+    ext = os.path.splitext(path)[1].lower()
+    for language in LANGUAGES:
+        if ext in language.extensions:
+            return language
+    return None
+
+
+def keywords(*words):
+    return r"\b(?:" + "|".join(words) + r")\b"
+
+
+NUMBER = r"\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+DQ_STRING = r'"(?:\\.|[^"\\])*"'
+SQ_STRING = r"'(?:\\.|[^'\\])*'"
+
+register(Language("Python", [".py", ".pyw"], [
+    ("comment", r"#.*"),
+    ("string", r"[rbfuRBFU]{0,2}(?:" + DQ_STRING + "|" + SQ_STRING + ")"),
+    ("keyword", keywords("and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del",
+                         "elif", "else", "except", "finally", "for", "from", "global", "if", "import", "in",
+                         "is", "lambda", "nonlocal", "not", "or", "pass", "raise", "return", "try", "while",
+                         "with", "yield", "None", "True", "False", "self")),
+    ("decorator", r"^\s*@[\w.]+"),
+    ("number", NUMBER),
+], multiline=[
+    ("string", r'[rbfuRBFU]{0,2}"""', r'"""'),
+    ("string", r"[rbfuRBFU]{0,2}'''", r"'''"),
+]))
+
+C_KEYWORDS = keywords(
+    "auto", "break", "case", "catch", "char", "class", "const", "continue", "default", "delete", "do", "double",
+    "else", "enum", "export", "extends", "extern", "false", "final", "float", "for", "function", "if", "import",
+    "int", "interface", "let", "long", "namespace", "new", "null", "private", "protected", "public", "return",
+    "short", "signed", "static", "struct", "switch", "this", "throw", "true", "try", "typedef", "typeof",
+    "union", "unsigned", "using", "var", "void", "volatile", "while", "yield", "async", "await")
+
+register(Language("C-like", [".c", ".h", ".cpp", ".hpp", ".cc", ".java", ".cs", ".js", ".mjs", ".ts", ".go",
+                             ".rs", ".kt", ".swift"], [
+    ("comment", r"//.*"),
+    ("string", DQ_STRING + "|" + SQ_STRING + r"|`(?:\\.|[^`\\])*`"),
+    ("preprocessor", r"^\s*#\s*\w+"),
+    ("keyword", C_KEYWORDS),
+    ("number", NUMBER),
+], multiline=[
+    ("comment", r"/\*", r"\*/"),
+]))
+
+register(Language("JSON", [".json", ".jsonl", ".geojson"], [
+    ("key", DQ_STRING + r"(?=\s*:)"),
+    ("string", DQ_STRING),
+    ("keyword", keywords("true", "false", "null")),
+    ("number", r"-?" + NUMBER),
+]))
+
+register(Language("CSS", [".css", ".qss"], [
+    ("string", DQ_STRING + "|" + SQ_STRING),
+    ("keyword", r"[\w-]+(?=\s*:[^:{]*;)"),
+    ("number", r"#[0-9a-fA-F]{3,8}\b|" + NUMBER + r"(?:px|pt|em|%)?"),
+], multiline=[
+    ("comment", r"/\*", r"\*/"),
+]))
+
+register(Language("INI", [".ini", ".cfg", ".conf", ".toml", ".properties", ".env"], [
+    ("comment", r"^\s*[;#].*"),
+    ("section", r"^\s*\[[^\]]*\]"),
+    ("key", r"^\s*[\w.\-]+(?=\s*[=:])"),
+    ("string", DQ_STRING + "|" + SQ_STRING),
+    ("number", NUMBER),
+]))
+
+register(Language("Log", [".log", ".out", ".err"], [
+    ("error", r"\b(?:FATAL|CRITICAL|ERROR|ERR|EXCEPTION|Traceback)\b"),
+    ("warning", r"\b(?:WARNING|WARN)\b"),
+    ("keyword", r"\b(?:INFO|NOTICE)\b"),
+    ("comment", r"\b(?:DEBUG|TRACE)\b"),
+    ("number", r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    ("string", DQ_STRING),
+]))
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp(tmp_path_factory):
+    """The editor application, one per run as Qt allows, with its settings and session
+    in a temp folder (skipped without PySide6)."""
+    pytest.importorskip("PySide6.QtWidgets")
+    import notepad
+    tmp = tmp_path_factory.mktemp("app")
+    notepad.SETTINGS_FILE = str(tmp / "settings.json")
+    notepad.SESSION_FOLDER = str(tmp / "session")
+    return notepad.NotepadApp([sys.argv[0]])
+
+
+@pytest.fixture
+def wait(qapp):
+    """wait(done): run the event loop until done() is true (fails after `timeout` s)."""
+    def wait(done, timeout=10):
+        deadline = time.perf_counter() + timeout
+        while not done():
+            qapp.processEvents()
+            assert time.perf_counter() < deadline, "timed out"
+            time.sleep(0.001)
+    return wait
+
+
+@pytest.fixture
+def tabs(qapp):
+    """The app's tab widget; tabs opened by the test are closed afterwards without prompts."""
+    tw = qapp.tab_widget
+    yield tw
+    for i in reversed(range(tw.count() - 1)):
+        ed = tw.get_editor(i)
+        if ed:
+            ed.document().setModified(False)
+        tw.close_tab(i)
+    qapp.processEvents()
+
+
+@pytest.fixture
+def open_tab(qapp, tabs, wait):
+    """open_tab(path): open a file in a tab, wait for it to load, return the tab."""
+    def open_tab(path):
+        qapp.open_file(str(path))
+        index = tabs.find_tab(str(path))
+        wait(lambda: tabs.get_loader(index) is None)
+        return tabs.widget(index)
+    return open_tab
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import batch
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_bytes(b"foo bar\r\nfoo\r\n")
+    (tmp_path / "sub" / "b.txt").write_bytes(b"no match\n")
+    (tmp_path / "sub" / "c.log").write_bytes(b"foo\n")
+    (tmp_path / "bin.txt").write_bytes(b"foo\0")
+    return tmp_path
+
+
+def test_expand_globs_once_in_order(tree):
+    assert list(batch.expand(["*.txt", "**/*.txt", "missing.txt"], exclude=["bin.*"])) == \
+        ["a.txt", os.path.join("sub", "b.txt")]
+
+
+def test_count_only(tree, capsys):
+    assert batch.main(["--find", "foo", "a.txt", "sub/b.txt"]) == 0
+    out = capsys.readouterr().out
+    assert "a.txt: 2 matches" in out
+    assert out.splitlines()[-1] == "2 files, 2 matches in 1"
+    assert (tree / "a.txt").read_bytes() == b"foo bar\r\nfoo\r\n"
+
+
+def test_literal_replace_keeps_line_endings(tree):
+    assert batch.main(["--find", "foo", "--replace", "baz", "--jobs", "1", "a.txt"]) == 0
+    assert (tree / "a.txt").read_bytes() == b"baz bar\r\nbaz\r\n"
+
+
+def test_regex_replace_and_eol(tree):
+    assert batch.main(["--find", r"^(\w+)$", "--regex", "--replace", r"[\1]", "--eol", "lf", "a.txt"]) == 0
+    assert (tree / "a.txt").read_bytes() == b"foo bar\n[foo]\n"
+
+
+def test_regex_replace_keeps_mixed_line_endings(tree):
+    (tree / "mixed.txt").write_bytes(b"a\r\nb\nca\r\n")
+    assert batch.main(["--find", "a$", "--regex", "--replace", "A", "mixed.txt"]) == 0
+    assert (tree / "mixed.txt").read_bytes() == b"A\r\nb\ncA\r\n"
+    assert batch.main(["--find", "A\nb", "--regex", "--replace", "x\ny", "mixed.txt"]) == 0
+    assert (tree / "mixed.txt").read_bytes() == b"x\ny\ncA\r\n"
+
+
+def test_replace_through_a_symlink_keeps_the_link(tree):
+    os.symlink("a.txt", "link.txt")
+    assert batch.main(["--find", "bar", "--regex", "--replace", "baz", "link.txt"]) == 0
+    assert os.path.islink("link.txt")
+    assert (tree / "a.txt").read_bytes() == b"foo baz\r\nfoo\r\n"
+
+
+def test_dry_run_writes_nothing(tree, capsys):
+    assert batch.main(["--find", "foo", "--replace", "x", "--dry-run", "a.txt", "sub/c.log"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "2 files, 3 replacements in 2, 2 would change"
+    assert (tree / "sub" / "c.log").read_bytes() == b"foo\n"
+
+
+def test_pool_matches_serial(tree, capsys):
+    for i in range(20):
+        (tree / f"n{i}.txt").write_text("foo\n" * i)
+    assert batch.main(["--find", "foo", "--jobs", "1", "n*.txt"]) == 0
+    serial = capsys.readouterr().out
+    assert batch.main(["--find", "foo", "--jobs", "3", "n*.txt"]) == 0
+    assert capsys.readouterr().out == serial
+
+
+def test_exit_codes(tree, capsys):
+    assert batch.main(["--find", "nothing", "a.txt"]) == 1
+    assert batch.main(["--find", "foo", "bin.txt"]) == 2
+    assert "bin.txt: binary, skipped" in capsys.readouterr().err
+    assert batch.main(["--find", "(", "--regex", "a.txt"]) == 2
+    with pytest.raises(SystemExit):
+        batch.main(["a.txt"])
@@ -0,0 +1,17 @@
+def test_compare_twice_then_close_a_compared_tab(qapp, tabs, wait, open_tab, tmp_path):
+    a, b, c = (tmp_path / name for name in ("a.txt", "b.txt", "c.txt"))
+    a.write_text("one\ntwo\nthree\n")
+    b.write_text("one\n2\nthree\n")
+    c.write_text("zero\none\n")
+    cont_a, cont_b, cont_c = (open_tab(p) for p in (a, b, c))
+    qapp.show_compare(cont_a, cont_b)
+    panel = qapp.compare
+    wait(lambda: not panel.cancel_btn.isEnabled())
+    assert panel.hunks == [(1, 2, 1, 2)]
+    qapp.show_compare(cont_a, cont_c)
+    wait(lambda: not panel.cancel_btn.isEnabled())
+    assert panel.left.document() is cont_a.findChild(type(panel.left)).document()
+    tabs.close_tab(tabs.indexOf(cont_c))
+    assert tabs.indexOf(cont_c) < 0
+    assert panel.right.document() is not None and panel.right.document().isEmpty()
+    assert not panel.uses(cont_c)
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+TEXT = "needle hay needle\nhay \U0001F600needle\n" * 50
+
+
+@pytest.fixture
+def editor(qapp):
+    import notepad
+    from PySide6.QtWidgets import QPlainTextEdit
+    ed = QPlainTextEdit()
+    doc = ed.document()
+    notepad.LongLines(doc)
+    ed.setPlainText(TEXT)
+    return ed, notepad.MatchScanner(doc)
+
+
+def scan(scanner, wait, pattern, regex=False):
+    import textsearch
+    scanner.set_pattern(textsearch.compile_pattern(pattern, regex=regex))
+    wait(lambda: not scanner.scanning)
+    return [scanner.match(i) for i in range(scanner.count())]
+
+
+def test_scan_offsets_are_utf16(editor, wait):
+    ed, scanner = editor
+    found = scan(scanner, wait, "needle")
+    assert found[:3] == [(0, 6), (11, 17), (24, 30)]  # the emoji takes two units
+    assert len(found) == 150
+
+
+def test_edits_update_matches_like_a_rescan(editor, wait):
+    from PySide6.QtGui import QTextCursor
+    ed, scanner = editor
+    doc = ed.document()
+    rng = random.Random(2)
+    pattern = r"ne+dle|^hay|\bhay$"
+    scan(scanner, wait, pattern, regex=True)
+    for _ in range(150):
+        c = QTextCursor(doc)
+        a = rng.randrange(doc.characterCount())
+        c.setPosition(a)
+        c.setPosition(min(doc.characterCount() - 1, a + rng.randrange(4)), QTextCursor.KeepAnchor)
+        c.insertText(rng.choice(["e", "needle", "\n", "hay\n", "\U0001F600", ""]))
+        if rng.random() < 0.1:
+            incremental = [scanner.match(i) for i in range(scanner.count())]
+            assert incremental == scan(scanner, wait, pattern, regex=True)
+        # lookups see the pending shift
+        position = rng.randrange(doc.characterCount())
+        starts = [scanner.match(i)[0] for i in range(scanner.count())]
+        assert scanner.bisect(position) == sum(s < position for s in starts)
+        assert scanner.bisect(position, right=True) == sum(s <= position for s in starts)
@@ -0,0 +1,93 @@
+import os
+import sys
+import socket
+import tempfile
+import threading
+
+import pytest
+
+import launch
+
+
+def test_parse_file_args(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "odd:12").write_text("")
+    assert launch.parse_file_args(["a.txt", "b.py:30", "c:0", "odd:12"]) == [
+        (str(tmp_path / "a.txt"), None),
+        (str(tmp_path / "b.py"), 30),
+        (str(tmp_path / "c"), 1),
+        (str(tmp_path / "odd:12"), None),
+    ]
+
+
+def test_parse_file_args_skips_options():
+    args = ["--new-instance", "-platform", "offscreen", "-style=fusion", "-style", "fusion",
+            "-reverse", "f.txt", "--profile-startup"]
+    assert launch.parse_file_args(args) == [(os.path.abspath("f.txt"), None)]
+
+
+def test_single_instance_enabled(tmp_path):
+    settings = tmp_path / "settings.json"
+    assert not launch.single_instance_enabled([], str(settings))
+    settings.write_text('{"single_instance": true}')
+    assert launch.single_instance_enabled([], str(settings))
+    assert not launch.single_instance_enabled(["--new-instance"], str(settings))
+    settings.write_text("not json")
+    assert not launch.single_instance_enabled([], str(settings))
+    assert launch.single_instance_enabled(["--single-instance"], str(settings))
+
+
+def test_request_round_trip():
+    files = [("/tmp/a b.txt", None), ("/tmp/é.py", 3)]
+    framed = launch.frame(launch.encode_request(files))
+    assert int.from_bytes(framed[:4], "big") == len(framed) - 4
+    assert launch.decode_request(framed[4:]) == files
+
+
+def test_forward_without_a_running_instance(tmp_path, monkeypatch):
+    settings = tmp_path / "settings.json"
+    address = str(tmp_path / "sock")
+    monkeypatch.setattr(launch, "server_address", lambda: (address, address))
+    assert not launch.forward(["a.txt"], str(settings))  # single instance off
+    assert not launch.forward(["--single-instance", "a.txt"], str(settings))
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Unix socket transport")
+def test_forward_hands_files_over(monkeypatch):
+    # not under tmp_path: socket paths are limited to ~100 bytes
+    address = os.path.join(tempfile.gettempdir(), f"notepad-test-{os.getpid()}")
+    monkeypatch.setattr(launch, "server_address", lambda: (address, address))
+    received = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(address)
+        server.listen()
+
+        def answer():
+            conn, _ = server.accept()
+            with conn:
+                received.append(conn.recv(65536))
+                conn.sendall(b"ok")
+
+        thread = threading.Thread(target=answer)
+        thread.start()
+        assert launch.forward(["--single-instance", "-platform", "offscreen", "a.txt:4"], "missing.json")
+        thread.join()
+    os.unlink(address)
+    assert launch.decode_request(received[0][4:]) == [(os.path.abspath("a.txt"), 4)]
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Unix socket transport")
+def test_socket_lives_in_a_private_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    path, _ = launch.server_address()
+    assert os.path.dirname(path) == str(tmp_path)
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    path, _ = launch.server_address()
+    folder = os.path.dirname(path)
+    assert os.path.dirname(folder) == str(tmp_path)
+    assert os.stat(folder).st_mode & 0o777 == 0o700
+    os.chmod(folder, 0o755)  # someone else could plant a socket there
+    with pytest.raises(OSError):
+        launch.server_address()
+    assert not launch.forward(["--single-instance", "a.txt"], "missing.json")
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+TEXT = "a\U0001F600b\nx\U00020000y \U0001F600z w\nplain\n"
+
+
+@pytest.fixture
+def editor(qapp):
+    notepad = pytest.importorskip("notepad")
+    from PySide6.QtWidgets import QPlainTextEdit
+    ed = QPlainTextEdit()
+    doc = ed.document()
+    return ed, notepad.LineIndex(doc), notepad.DocumentStats(doc)
+
+
+def block_starts(doc):
+    return [doc.findBlockByNumber(i).position() for i in range(doc.blockCount())]
+
+
+def test_offsets_count_utf16_units(editor):
+    ed, index, _ = editor
+    ed.setPlainText(TEXT)
+    assert [index.offset(i) for i in range(index.count())] == [0, 5, 16, 22]
+    assert block_starts(ed.document()) == [0, 5, 16, 22]
+    assert index.line_of(15) == 1
+    assert index.line_of(16) == 2
+
+
+def test_random_edits_match_document(editor):
+    from PySide6.QtGui import QTextCursor
+    ed, index, _ = editor
+    doc = ed.document()
+    ed.setPlainText(TEXT * 20)
+    rng = random.Random(7)
+    pieces = ["x", "\n", "\U0001F600", "ab\ncd", "\U00020000\n\U0001F600", ""]
+    for _ in range(300):
+        c = QTextCursor(doc)
+        a = rng.randrange(doc.characterCount())
+        b = min(doc.characterCount() - 1, a + rng.randrange(4))
+        c.setPosition(a)
+        c.setPosition(b, QTextCursor.KeepAnchor)
+        c.insertText(rng.choice(pieces))
+        assert index.count() == doc.blockCount()
+        line = rng.randrange(doc.blockCount())
+        assert index.offset(line) == doc.findBlockByNumber(line).position()
+    assert [index.offset(i) for i in range(index.count())] == block_starts(doc)
+
+
+def test_selection_words_after_astral_characters(editor):
+    from PySide6.QtGui import QTextCursor
+    ed, _, stats = editor
+    doc = ed.document()
+    ed.setPlainText(TEXT)
+    block = doc.findBlockByNumber(1)
+    c = QTextCursor(doc)
+    c.setPosition(block.position() + 5)  # after "x\U00020000y " (5 UTF-16 units)
+    c.setPosition(block.position() + 8, QTextCursor.KeepAnchor)
+    assert c.selectedText() == "\U0001F600z"
+    assert stats.selection(c) == (3, 1, 1)
+    c.setPosition(block.position() + 5)
+    c.setPosition(doc.findBlockByNumber(2).position() + 2, QTextCursor.KeepAnchor)
+    assert stats.selection(c) == (8, 3, 2)  # "\U0001F600z", "w", "pl"
@@ -0,0 +1,132 @@
+import pytest
+
+LONG = ",".join(f"item{i}" for i in range(6000))  # well past LONG_LINE_CHARS
+TEXT = f"first\n{LONG}\nlast\n"
+
+
+@pytest.fixture
+def long_tab(qapp, tabs, open_tab, tmp_path):
+    import notepad
+    path = tmp_path / "min.js"
+    path.write_text(TEXT)
+    cont = open_tab(path)
+    ed = tabs.active_pane(cont)
+    assert ed.document().findChild(notepad.LongLines).active
+    assert ed.document().blockCount() > 4
+    return ed
+
+
+def soft_blocks(doc):
+    import notepad
+    block, starts = doc.firstBlock(), []
+    while block.isValid():
+        if block.blockFormat().property(notepad.SOFT_BREAK):
+            starts.append(block.position())
+        block = block.next()
+    return starts
+
+
+def replace_all(app, ed, wait, pattern, repl, regex=False):
+    import textsearch
+    run = {"pending": 1, "count": 0, "tabs": 0, "skipped": [], "label": ""}
+    app.start_replace(ed, textsearch.compile_pattern(pattern, regex=regex), repl, regex, False, run)
+    wait(lambda: run["pending"] == 0)
+    return run["count"]
+
+
+def scan(ed, wait, pattern, regex=False):
+    import notepad
+    import textsearch
+    scanner = ed.document().findChild(notepad.MatchScanner)
+    scanner.set_pattern(textsearch.compile_pattern(pattern, regex=regex))
+    wait(lambda: not scanner.scanning)
+    return scanner
+
+
+def matches(scanner):
+    return [scanner.match(i) for i in range(scanner.count())]
+
+
+def test_line_index_counts_file_lines(qapp, long_tab):
+    import notepad
+    doc = long_tab.document()
+    index = doc.findChild(notepad.LineIndex)
+    assert index.count() == 4
+    qapp.go_to_offset(long_tab, 3)
+    assert long_tab.textCursor().block().text() == "last"
+    qapp.update_status(long_tab)
+    assert qapp.position_label.text().startswith("Ln 3 of 4, Col 1,")
+
+
+def test_regex_anchors_only_match_real_lines(qapp, long_tab, wait):
+    import notepad
+    assert scan(long_tab, wait, "^", regex=True).count() == 0  # empty matches are not listed
+    assert scan(long_tab, wait, r"\d$", regex=True).count() == 1
+    assert replace_all(qapp, long_tab, wait, "$", "END", regex=True) == 4
+    assert notepad.document_text(long_tab.document()) == f"firstEND\n{LONG}END\nlastEND\nEND"
+
+
+def test_literal_match_across_a_soft_break(long_tab, wait):
+    doc = long_tab.document()
+    cut = soft_blocks(doc)[0]
+    before, after = doc.findBlock(cut - 1).text()[-3:], doc.findBlock(cut).text()[:3]
+    scanner = scan(long_tab, wait, before + after)
+    assert any(s < cut < e for s, e in matches(scanner))
+
+
+def test_replace_all_and_undo_keep_soft_breaks(qapp, long_tab, wait):
+    import notepad
+    doc = long_tab.document()
+    soft = len(soft_blocks(doc))
+    assert replace_all(qapp, long_tab, wait, ",", ";\n") == LONG.count(",")
+    assert notepad.document_text(doc) == TEXT.replace(",", ";\n")
+    doc.undo()
+    assert notepad.document_text(doc) == TEXT
+    assert len(soft_blocks(doc)) == soft
+    doc.redo()
+    assert notepad.document_text(doc) == TEXT.replace(",", ";\n")
+
+
+def test_typing_keeps_the_scanner_and_index_in_step(qapp, long_tab, wait):
+    import notepad
+    from PySide6.QtGui import QTextCursor
+    doc = long_tab.document()
+    scanner = scan(long_tab, wait, r"item1\d*,", regex=True)
+    index = doc.findChild(notepad.LineIndex)
+    cut = soft_blocks(doc)[1]
+    c = QTextCursor(doc)
+    for text in ("item1,", "\n", "x"):  # \n typed into a segment is a real break
+        c.setPosition(cut)
+        c.insertText(text)
+        incremental = matches(scanner)
+        scan(long_tab, wait, r"item1\d*,", regex=True)
+        assert incremental == matches(scanner)
+    assert index.count() == 5
+    assert notepad.document_text(doc).count("\n") == 4
+
+
+def test_random_edits_keep_the_index_on_real_lines(long_tab):
+    import random
+    import notepad
+    from PySide6.QtGui import QTextCursor
+    doc = long_tab.document()
+    index = doc.findChild(notepad.LineIndex)
+    rng = random.Random(5)
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.15:
+            doc.undo()
+        elif action < 0.2:
+            doc.redo()
+        else:
+            c = QTextCursor(doc)
+            a = rng.randrange(doc.characterCount())
+            c.setPosition(a)
+            c.setPosition(min(doc.characterCount() - 1, a + rng.randrange(3)), QTextCursor.KeepAnchor)
+            c.insertText(rng.choice(["x", "\n", "a\nb", ""]))
+        starts, pos = [0], 0
+        for line in notepad.document_text(doc).split("\n")[:-1]:
+            pos += len(line) + 1
+            starts.append(pos)
+        slices = notepad.TextSlice(doc)
+        assert [index.offset(i) for i in range(index.count())] == [slices.to_doc(s) for s in starts]
@@ -0,0 +1,26 @@
+def replace_in_all_tabs(app, monkeypatch, find, repl):
+    from PySide6.QtWidgets import QDialog
+    dlg, find_edit, with_edit, options = app.dialogs.load_replace_dialog()
+    monkeypatch.setattr(dlg, "exec", lambda: QDialog.Accepted)
+    find_edit.setText(find)
+    with_edit.setText(repl)
+    options["scope"].setCurrentText("All tabs")
+    app.replace_text()
+
+
+def test_all_tabs_loads_placeholders_and_reports_viewers(qapp, tabs, wait, open_tab, tmp_path, monkeypatch):
+    loaded, lazy, big = (tmp_path / name for name in ("loaded.txt", "lazy.txt", "big.txt"))
+    loaded.write_text("foo\n" * 100)
+    lazy.write_text("foo\n" * 100)
+    big.write_text("foo\n" * 1000)
+    loaded_cont = open_tab(loaded)
+    lazy_cont = tabs.widget(tabs.insert_lazy_tab(str(lazy)))
+    tabs.insert_lazy_tab(str(big))
+    monkeypatch.setattr(qapp, "large_file_mb", 1000 / (1024 * 1024))  # big.txt opens in a viewer
+    statuses = []
+    monkeypatch.setattr(qapp, "show_status", lambda message, timeout=5000: statuses.append(message))
+    replace_in_all_tabs(qapp, monkeypatch, "foo", "bar")
+    wait(lambda: statuses and statuses[-1].startswith("Replaced"))
+    assert statuses[-1] == "Replaced 200 occurrence(s) of 'foo' with 'bar' in 2 tabs; skipped big.txt"
+    for cont in (loaded_cont, lazy_cont):
+        assert tabs.active_pane(cont).toPlainText() == "bar\n" * 100
@@ -0,0 +1,23 @@
+def test_edits_typed_while_loading_are_journaled(qapp, tabs, wait, tmp_path):
+    from PySide6.QtGui import QTextCursor
+    path = tmp_path / "slow.txt"
+    text = "".join(f"line {i}\n" for i in range(40000))  # several load chunks
+    path.write_text(text)
+    qapp.open_file(str(path))
+    index = tabs.currentIndex()
+    cont, ed = tabs.widget(index), tabs.get_editor(index)
+    wait(lambda: not ed.document().isEmpty())
+    assert tabs.get_loader(index) is not None
+    c = QTextCursor(ed.document())
+    c.setPosition(5)
+    c.insertText("typed ")
+    wait(lambda: tabs.get_loader(index) is None)
+    assert ed.document().isModified()
+    session = qapp.session
+    session.flush()
+    wait(lambda: not session.writing and not session.buffer)
+    rec = session.read_journal()[cont.property("tab_id")]
+    assert rec["text"] is None and rec["path"] == str(path)
+    for e in rec["edits"]:
+        text = text[:e["pos"]] + e["ins"] + text[e["pos"] + e["del"]:]
+    assert text == ed.toPlainText()
@@ -0,0 +1,11 @@
+import syntax
+
+
+def test_python_prefixed_triple_quotes_open_multiline_state():
+    python = syntax.language_for("x.py")
+    for line in ('x = f"""hello', "x = rb'''hello", 'x = """hello'):
+        spans, state = python.highlight(line)
+        assert state, line
+        assert spans[-1][2] == "string"
+    spans, state = python.highlight('world"""', state)
+    assert state == 0 and spans == [(0, 8, "string")]
@@ -0,0 +1,85 @@
+import random
+
+import textdiff
+
+
+def apply_edits(text, edits):
+    out = []
+    pos = 0
+    for start, end, replacement in edits:
+        assert start >= pos
+        out.append(text[pos:start])
+        out.append(replacement)
+        pos = end
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def test_text_edits_touch_only_changed_lines():
+    old = "a\nb\nc\nd\n"
+    new = "a\nB\nc\nd\ne\n"
+    edits = textdiff.text_edits(old, new)
+    assert edits == [(2, 4, "B\n"), (8, 8, "e\n")]
+    assert apply_edits(old, edits) == new
+
+
+def test_text_edits_random():
+    rng = random.Random(3)
+    for _ in range(50):
+        old = "".join(rng.choice("ab\n") for _ in range(rng.randrange(60)))
+        new = "".join(rng.choice("abc\n") for _ in range(rng.randrange(60)))
+        assert apply_edits(old, textdiff.text_edits(old, new)) == new
+
+
+def test_line_opcodes_trim_common_ends(monkeypatch):
+    monkeypatch.setattr(textdiff, "MATCH_LINES", 2)
+    a = [0, 1, 2, 3, 4, 9]
+    b = [0, 5, 6, 7, 9]
+    assert textdiff.line_opcodes(a, b) == [
+        ("equal", 0, 1, 0, 1), ("replace", 1, 5, 1, 4), ("equal", 5, 6, 4, 5)]
+    assert textdiff.line_opcodes([1, 2], [1, 2, 3]) == [("equal", 0, 2, 0, 2), ("insert", 2, 2, 2, 3)]
+
+
+def check_hunks(a, b, hunks):
+    """The hunks are ordered and everything between them is equal."""
+    i = j = 0
+    for a1, a2, b1, b2 in hunks:
+        assert a1 >= i and b1 >= j and (a2 > a1 or b2 > b1)
+        assert a[i:a1] == b[j:b1]
+        i, j = a2, b2
+    assert a[i:] == b[j:]
+
+
+def test_iter_hunks_random():
+    rng = random.Random(11)
+    for _ in range(40):
+        a = [rng.randrange(6) for _ in range(rng.randrange(300))]
+        b = list(a)
+        for _ in range(rng.randrange(10)):
+            k = rng.randrange(len(b) + 1)
+            b[k:k + rng.randrange(5)] = [rng.randrange(9) for _ in range(rng.randrange(5))]
+        check_hunks(a, b, list(textdiff.iter_hunks(a, b, window=128)))
+
+
+def test_iter_hunks_identical():
+    assert list(textdiff.iter_hunks([1, 2, 3], [1, 2, 3])) == []
+
+
+class Queue(list):
+    put = list.append
+
+
+def test_compare_files(tmp_path):
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_text("one\ntwo\nthree\n")
+    b.write_text("one\n2\nthree\nfour")
+    out = Queue()
+    textdiff.compare_files(str(a), str(b), out)
+    assert out[0] == ("sizes", 4, 4)
+    hunks = [h for msg in out if msg[0] == "hunks" for h in msg[1]]
+    assert hunks == [(1, 2, 1, 2), (3, 4, 3, 4)]
+    assert out[-1] == ("done",)
+    out = Queue()
+    textdiff.compare_files(str(a), str(tmp_path / "missing"), out)
+    assert out[-1][0] == "error"
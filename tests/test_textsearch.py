@@ -0,0 +1,80 @@
+import os
+import re
+
+import pytest
+
+import textsearch
+
+TEXT = "a\U0001F600b x\U00020000y\n\U0001F600\U0001F600 z"
+
+
+def test_compile_pattern_literal_is_escaped():
+    p = textsearch.compile_pattern("a.b")
+    assert p.findall("a.b axb") == ["a.b"]
+
+
+def test_compile_pattern_options():
+    assert textsearch.compile_pattern("cat", case=False).findall("Cat CAT cat") == ["Cat", "CAT", "cat"]
+    assert textsearch.compile_pattern("cat", whole_word=True).findall("cat concat cats cat.") == ["cat", "cat"]
+    assert textsearch.compile_pattern(r"^\d+", regex=True).findall("12 a\n34 b") == ["12", "34"]
+    with pytest.raises(re.error):
+        textsearch.compile_pattern("(", regex=True)
+
+
+def test_replacement_expands_groups_only_in_regex_mode():
+    m = re.search(r"(\w+)@(\w+)", "me@host")
+    assert textsearch.replacement_for(m, r"\2 at \1", True) == "host at me"
+    assert textsearch.replacement_for(m, r"\2 at \1", False) == r"\2 at \1"
+
+
+def test_iter_matches_batches(monkeypatch):
+    monkeypatch.setattr(textsearch, "BATCH", 3)
+    p = textsearch.compile_pattern("x")
+    sizes = [len(batch) for batch in textsearch.iter_matches("x" * 8, p)]
+    assert sizes == [3, 3, 2]
+    assert [len(b) for b in textsearch.iter_matches("x" * 8, p, cancelled=lambda: True)] == [3]
+
+
+def test_find_replacements():
+    p = textsearch.compile_pattern(r"(\d)", regex=True)
+    assert textsearch.find_replacements("a1b22", p, r"<\1>", regex=True) == \
+        [(1, 2, "<1>"), (3, 4, "<2>"), (4, 5, "<2>")]
+    assert textsearch.find_replacements("a1", p, "", cancelled=lambda: True) is None
+
+
+def test_utf16_len():
+    assert textsearch.utf16_len("plain") == 5
+    assert textsearch.utf16_len("é") == 1
+    assert textsearch.utf16_len(TEXT) == len(TEXT.encode("utf-16-le")) // 2
+
+
+def test_utf16_map_round_trip():
+    m = textsearch.Utf16Map(TEXT)
+    for index in range(len(TEXT) + 1):
+        utf16 = m.to_utf16(index)
+        assert utf16 == len(TEXT[:index].encode("utf-16-le")) // 2
+        assert m.to_index(utf16) == index
+
+
+def test_split_globs():
+    assert textsearch.split_globs("*.py; *.txt,*.md ;") == ["*.py", "*.txt", "*.md"]
+
+
+def test_walk_files_include_exclude(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "build").mkdir()
+    for rel in ("a.py", "b.txt", "src/c.py", "build/d.py"):
+        (tmp_path / rel).write_text("x")
+    found = textsearch.walk_files(str(tmp_path), include=["*.py"], exclude=["build"])
+    assert sorted(os.path.relpath(f, tmp_path) for f in found) == ["a.py", os.path.join("src", "c.py")]
+
+
+def test_search_files_skips_binary_and_reports_columns(tmp_path):
+    text = tmp_path / "t.txt"
+    text.write_text("one\nfind me\nand find\n")
+    binary = tmp_path / "b.bin"
+    binary.write_bytes(b"find\0")
+    p = textsearch.compile_pattern("find")
+    assert textsearch.search_files([str(text), str(binary), str(tmp_path / "gone")], p) == \
+        [(str(text), [(2, 1, "find me"), (3, 5, "and find")])]
+    assert textsearch.search_files([str(text)], p, max_hits=1) == [(str(text), [(2, 1, "find me")])]
@@ -0,0 +1,139 @@
+"""Line diffs between two texts (kept free of Qt imports)."""
+import time
+from array import array
+from difflib import SequenceMatcher
+
+MATCH_LINES = 20000  # past this many differing lines each side, the middle is replaced whole
+
+
+def line_ids(*texts):
+    """Split texts into lines (keeping ends) and number the distinct lines, so
+    comparing two lines is comparing two ints."""
+    ids = {}
+    out = []
+    for text in texts:
+        lines = text.splitlines(keepends=True)
+        out.append((lines, [ids.setdefault(line, len(ids)) for line in lines]))
+    return out
+
+
+def line_opcodes(a, b):
+    """SequenceMatcher-style opcodes over two lists of line ids; the common head and
+    tail are trimmed first so small edits to big files stay cheap."""
+    head = 0
+    limit = min(len(a), len(b))
+    while head < limit and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    a_mid, b_mid = a[head:len(a) - tail], b[head:len(b) - tail]
+    ops = []
+    if head:
+        ops.append(("equal", 0, head, 0, head))
+    if a_mid or b_mid:
+        if len(a_mid) > MATCH_LINES or len(b_mid) > MATCH_LINES or not a_mid or not b_mid:
+            tag = "replace" if a_mid and b_mid else ("delete" if a_mid else "insert")
+            ops.append((tag, head, head + len(a_mid), head, head + len(b_mid)))
+        else:
+            for tag, i1, i2, j1, j2 in SequenceMatcher(None, a_mid, b_mid, autojunk=False).get_opcodes():
+                ops.append((tag, i1 + head, i2 + head, j1 + head, j2 + head))
+    if tail:
+        ops.append(("equal", len(a) - tail, len(a), len(b) - tail, len(b)))
+    return ops
+
+
+def text_edits(old, new):
+    """[(start, end, replacement), ...] turning `old` into `new`, as str indexes into
+    `old` in ascending order; only the differing lines are touched."""
+    (a_lines, a), (b_lines, b) = line_ids(old, new)
+    starts = [0]
+    for line in a_lines:
+        starts.append(starts[-1] + len(line))
+    edits = []
+    for tag, i1, i2, j1, j2 in line_opcodes(a, b):
+        if tag != "equal":
+            edits.append((starts[i1], starts[i2], "".join(b_lines[j1:j2])))
+    return edits
+
+
+# ---------- Compare (worker process) ----------
+WINDOW = 4000         # most lines per side matched at once when streaming hunks
+MIN_WINDOW = 64       # first try; doubled while a window holds no common line
+BATCH_SECONDS = 0.1   # hunks are sent to the GUI at least this often
+
+
+def read_line_hashes(path):
+    """array of hash(line) for a UTF-8 file, one entry per editor block; only 8
+    bytes per line stay in memory, whatever the file size."""
+    hashes = array("q")
+    ends_with_newline = True
+    with open(path, "r", encoding="utf-8", errors="replace", newline=None) as fh:
+        for line in fh:
+            ends_with_newline = line.endswith("\n")
+            hashes.append(hash(line[:-1] if ends_with_newline else line))
+    if ends_with_newline:
+        hashes.append(hash(""))  # the (empty) line after a final newline
+    return hashes
+
+
+def iter_hunks(a, b, window=WINDOW):
+    """Yield (a1, a2, b1, b2) line ranges that differ, front to back.
+
+    Common runs are skipped directly; a differing stretch is matched in a window
+    that starts small and doubles (up to `window` lines) until it holds a common
+    line, and the hunks before the last match in it are final, so results stream
+    out and the cost stays linear in the input.
+    """
+    i = j = 0
+    n, m = len(a), len(b)
+    while True:
+        while i < n and j < m and a[i] == b[j]:
+            i += 1
+            j += 1
+        if i >= n or j >= m:
+            if i < n or j < m:
+                yield (i, n, j, m)
+            return
+        size = min(MIN_WINDOW, window)
+        while True:
+            sa, sb = a[i:i + size], b[j:j + size]
+            blocks = [blk for blk in SequenceMatcher(None, sa, sb, autojunk=False).get_matching_blocks()
+                      if blk.size]
+            if blocks or size >= window or (i + size >= n and j + size >= m):
+                break
+            size *= 2
+        if not blocks:
+            yield (i, i + len(sa), j, j + len(sb))
+            i += len(sa)
+            j += len(sb)
+            continue
+        ai = bj = 0
+        for blk in blocks:
+            if blk.a > ai or blk.b > bj:
+                yield (i + ai, i + blk.a, j + bj, j + blk.b)
+            ai, bj = blk.a + blk.size, blk.b + blk.size
+        i += ai
+        j += bj
+
+
+def compare_files(a_path, b_path, out):
+    """Process entry point: diff two files, putting messages on the queue `out`:
+    ("sizes", lines_a, lines_b), ("hunks", [(a1, a2, b1, b2), ...], percent), ("done",)
+    or ("error", message)."""
+    try:
+        a = read_line_hashes(a_path)
+        b = read_line_hashes(b_path)
+        out.put(("sizes", len(a), len(b)))
+        batch = []
+        sent = time.monotonic()
+        for hunk in iter_hunks(a, b):
+            batch.append(hunk)
+            if time.monotonic() - sent > BATCH_SECONDS:
+                out.put(("hunks", batch, hunk[1] * 100 // max(1, len(a))))
+                batch = []
+                sent = time.monotonic()
+        out.put(("hunks", batch, 100))
+        out.put(("done",))
+    except Exception as e:
+        out.put(("error", str(e)))
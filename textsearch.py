@@ -0,0 +1,141 @@
+"""Find/replace engine shared by the editor and batch tools (kept free of Qt imports)."""
+import os
+import re
+import time
+from fnmatch import fnmatch
+from bisect import bisect_left
+
+ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+BATCH = 4096  # matches handed back between cancellation checks
+
+
+def compile_pattern(find, regex=False, case=True, whole_word=False):
+    """Compile the search the way the Replace dialog describes it; raises re.error."""
+    expr = find if regex else re.escape(find)
+    if whole_word:
+        expr = r"(?<!\w)(?:" + expr + r")(?!\w)"
+    flags = re.MULTILINE
+    if not case:
+        flags |= re.IGNORECASE
+    return re.compile(expr, flags)
+
+
+def replacement_for(match, repl, regex):
+    """Replacement text for one match: group references only expand in regex mode."""
+    return match.expand(repl) if regex else repl
+
+
+def iter_matches(text, pattern, start=0, end=None, cancelled=None):
+    """Yield lists of match objects over text[start:end], in batches of BATCH."""
+    end = len(text) if end is None else end
+    batch = []
+    for m in pattern.finditer(text, start, end):
+        batch.append(m)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+            if cancelled and cancelled():
+                return
+            time.sleep(0)  # let the GUI thread have the GIL between batches
+    if batch:
+        yield batch
+
+
+def find_replacements(text, pattern, repl, regex=False, cancelled=None, progress=None):
+    """List (start, end, replacement) for every match; None if cancelled."""
+    edits = []
+    for batch in iter_matches(text, pattern, cancelled=cancelled):
+        for m in batch:
+            edits.append((m.start(), m.end(), replacement_for(m, repl, regex)))
+        if progress and text:
+            progress(batch[-1].end() * 100 // len(text))
+    if cancelled and cancelled():
+        return None
+    return edits
+
+
+def utf16_len(text):
+    """Length of `text` in UTF-16 units: astral characters count twice."""
+    return len(text) if text.isascii() else len(text) + len(ASTRAL.findall(text))
+
+
+class Utf16Map:
+    """Converts str indexes into UTF-16 positions (what QTextDocument counts)."""
+
+    def __init__(self, text):
+        self.astral = [] if text.isascii() else [m.start() for m in ASTRAL.finditer(text)]
+
+    def to_utf16(self, index):
+        # every astral character before `index` takes two UTF-16 units
+        return index + bisect_left(self.astral, index)
+
+    def to_index(self, utf16):
+        """The str index of a UTF-16 position (inverse of to_utf16)."""
+        # the i-th astral character sits at UTF-16 position astral[i] + i
+        lo, hi = 0, len(self.astral)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.astral[mid] + mid < utf16:
+                lo = mid + 1
+            else:
+                hi = mid
+        return utf16 - lo
+
+
+# ---------- Find in Files ----------
+PROBE_BYTES = 8192    # files with a NUL byte in their head are treated as binary
+MAX_HIT_TEXT = 300    # characters of a matching line kept for display
+
+
+def split_globs(text):
+    """'*.py; *.txt,*.md' -> ['*.py', '*.txt', '*.md']"""
+    return [g.strip() for g in text.replace(",", ";").split(";") if g.strip()]
+
+
+def walk_files(root, include=(), exclude=(), cancelled=None):
+    """Yield files under `root` whose name matches `include` (all if empty) and no `exclude`
+    glob; excluded directory names are not descended into."""
+    def excluded(name, rel):
+        return any(fnmatch(name, g) or fnmatch(rel, g) for g in exclude)
+
+    for folder, dirs, files in os.walk(root):
+        if cancelled and cancelled():
+            return
+        rel_folder = os.path.relpath(folder, root)
+        dirs[:] = [d for d in dirs if not excluded(d, os.path.normpath(os.path.join(rel_folder, d)))]
+        for name in files:
+            rel = os.path.normpath(os.path.join(rel_folder, name))
+            if include and not any(fnmatch(name, g) or fnmatch(rel, g) for g in include):
+                continue
+            if not excluded(name, rel):
+                yield os.path.join(folder, name)
+
+
+def is_binary(path):
+    with open(path, "rb") as fh:
+        return b"\0" in fh.read(PROBE_BYTES)
+
+
+def search_files(paths, pattern, max_hits=1000):
+    """Process-pool task: [(path, [(line, column, text), ...]), ...] for the files that match.
+
+    Files are streamed line by line, so memory does not depend on file size.
+    """
+    results = []
+    for path in paths:
+        try:
+            if is_binary(path):
+                continue
+            hits = []
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                for number, line in enumerate(fh, 1):
+                    m = pattern.search(line)
+                    if m:
+                        hits.append((number, m.start() + 1, line.rstrip("\r\n")[:MAX_HIT_TEXT]))
+                        if len(hits) >= max_hits:
+                            break
+            if hits:
+                results.append((path, hits))
+        except OSError:
+            continue
+    return results